@@ -1,8 +1,20 @@
 """Pydantic models for ephemeral namespace operations."""
 
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+
+class NamespaceReservationInfo(BaseModel):
+    """A namespace reservation from the bonfire namespace listing."""
+
+    name: str = Field(..., description="Namespace name")
+    reserved: bool = Field(..., description="Whether the namespace is reserved")
+    status: Optional[str] = Field(None, description="Environment status")
+    apps_ready: Optional[str] = Field(None, description="Ready apps, e.g. '3/3'")
+    requester: Optional[str] = Field(None, description="User holding the reservation")
+    pool: Optional[str] = Field(None, description="Namespace pool type")
+    expires_in: Optional[str] = Field(None, description="Time until expiry")
 
 
 class NamespaceDetails(BaseModel):
@@ -14,6 +26,10 @@ class NamespaceDetails(BaseModel):
     password: Optional[str] = Field(
         None, description="Namespace password (if requested)"
     )
+    reservations: List[NamespaceReservationInfo] = Field(
+        default_factory=list,
+        description="All of the user's reservations (the first is 'name')",
+    )
 
 
 class NamespaceExtendRequest(BaseModel):
@@ -24,6 +40,107 @@ class NamespaceExtendRequest(BaseModel):
     )
 
 
+class NamespaceBatchExtendRequest(BaseModel):
+    """Request to extend several namespaces."""
+
+    namespaces: Optional[List[str]] = Field(
+        None,
+        max_length=100,
+        description="Namespaces to extend (default: all of the user's reservations)",
+    )
+    duration: str = Field(
+        default="72h",
+        pattern=r"^(\d+[dhms])+$",
+        description="Duration to extend each by (e.g., '72h', '48h')",
+    )
+    concurrency: int = Field(
+        default=4, ge=1, le=16, description="Maximum extensions run at once"
+    )
+
+
+class NamespaceBatchItem(BaseModel):
+    """Result of a batch operation for one namespace."""
+
+    name: str = Field(..., description="Namespace name")
+    success: bool = Field(..., description="Whether the operation succeeded")
+    error: Optional[str] = Field(None, description="Why the operation failed")
+    reservation: Optional[NamespaceReservationInfo] = Field(
+        None, description="The namespace's listing entry"
+    )
+    route: Optional[str] = Field(None, description="Namespace route (if requested)")
+    password: Optional[str] = Field(
+        None, description="Namespace password (if requested)"
+    )
+
+
+class NamespaceBatchResponse(BaseModel):
+    """Per-namespace results of a batch operation."""
+
+    succeeded: int = Field(..., description="Namespaces the operation succeeded for")
+    failed: int = Field(..., description="Namespaces the operation failed for")
+    duration: Optional[str] = Field(None, description="Extension duration")
+    namespaces: List[NamespaceBatchItem] = Field(
+        default_factory=list, description="Results in request order"
+    )
+
+
+class NamespaceReserveRequest(BaseModel):
+    """Request to reserve a namespace in a background job."""
+
+    duration: str = Field(
+        default="24h",
+        pattern=r"^(\d+[dhms])+$",
+        description="Reservation duration (e.g., '24h')",
+    )
+    pool: Optional[str] = Field(
+        None, pattern=r"^[a-z0-9-]+$", description="Namespace pool (default pool)"
+    )
+    apps: List[str] = Field(
+        default_factory=list,
+        max_length=20,
+        description="Apps to deploy with `bonfire deploy` once reserved",
+    )
+    wait: bool = Field(
+        default=True,
+        description="Wait for the namespace's resources (deploying always waits)",
+    )
+    timeout: int = Field(
+        default=600, ge=60, le=3600, description="Timeout of each stage (seconds)"
+    )
+    release_on_cancel: bool = Field(
+        default=True, description="Release the namespace if the job is cancelled"
+    )
+
+
+class NamespaceReleaseRequest(BaseModel):
+    """Request to release a namespace."""
+
+    namespace: Optional[str] = Field(
+        None, description="Namespace to release (default: your primary namespace)"
+    )
+
+
+class JobInfo(BaseModel):
+    """A background namespace job."""
+
+    id: str = Field(..., description="Job ID")
+    kind: str = Field(..., description="Operation, e.g. 'reserve'")
+    state: str = Field(
+        ..., description="'running', 'succeeded', 'failed' or 'cancelled'"
+    )
+    stage: Optional[str] = Field(
+        None,
+        description="Current or last stage: authenticate, reserve, deploy, wait, "
+        "warm or release",
+    )
+    namespace: Optional[str] = Field(None, description="Reserved namespace")
+    error: Optional[str] = Field(None, description="Why the job failed")
+    created_at: float = Field(..., description="Start time (Unix time)")
+    finished_at: Optional[float] = Field(None, description="End time (Unix time)")
+    last_seq: int = Field(..., description="Sequence number of the latest event")
+    options: dict = Field(default_factory=dict, description="Job options")
+
+
 class NamespaceStatus(BaseModel):
     """Current namespace status."""
 
@@ -31,3 +148,238 @@ class NamespaceStatus(BaseModel):
     name: Optional[str] = Field(None, description="Namespace name")
     expires: Optional[str] = Field(None, description="Expiration timestamp")
     details: Optional[dict] = Field(None, description="Additional namespace details")
+    reservations: List[NamespaceReservationInfo] = Field(
+        default_factory=list, description="All of the user's reservations"
+    )
+
+
+class AutoExtendPolicyConfig(BaseModel):
+    """A user's auto-extend policy."""
+
+    enabled: bool = Field(
+        default=False, description="Extend reservations automatically"
+    )
+    window_minutes: int = Field(
+        default=120, ge=5, le=10080, description="Extend when less than this remains"
+    )
+    duration: str = Field(
+        default="72h",
+        pattern=r"^(\d+[dhms])+$",
+        description="Duration of each extension (e.g., '72h', '1h30m')",
+    )
+    max_lifetime_hours: Optional[int] = Field(
+        None, ge=1, description="Stop extending past this total lifetime (hours)"
+    )
+    working_hours_only: bool = Field(
+        default=False, description="Only extend during working hours"
+    )
+    working_hours_start: int = Field(
+        default=9, ge=0, le=23, description="Start of working hours (local hour)"
+    )
+    working_hours_end: int = Field(
+        default=18, ge=1, le=24, description="End of working hours (local hour)"
+    )
+    working_days: List[int] = Field(
+        default_factory=lambda: [0, 1, 2, 3, 4],
+        description="Working days (Monday = 0)",
+    )
+    jitter_seconds: int = Field(
+        default=60, ge=0, le=3600, description="Maximum random delay before extending"
+    )
+    max_retries: int = Field(
+        default=3, ge=0, le=10, description="Retries after a failed extension"
+    )
+    retry_delay_seconds: int = Field(
+        default=300, ge=30, description="Delay before the first retry (doubles)"
+    )
+
+    @model_validator(mode="after")
+    def check_working_hours(self) -> "AutoExtendPolicyConfig":
+        if self.working_hours_start >= self.working_hours_end:
+            raise ValueError("working_hours_start must be before working_hours_end")
+        if not self.working_days or any(d not in range(7) for d in self.working_days):
+            raise ValueError("working_days must be weekday numbers 0-6")
+        return self
+
+
+class AutoExtendDecisionInfo(BaseModel):
+    """A decision made by the auto-extend scheduler."""
+
+    at: float = Field(..., description="Decision time as Unix time")
+    username: str = Field(..., description="Requester of the reservation")
+    namespace: str = Field(..., description="Namespace name")
+    action: str = Field(
+        ..., description="'extend', 'extended', 'skip', 'retry' or 'failed'"
+    )
+    reason: str = Field(..., description="Why the action was taken")
+    expires_at: Optional[float] = Field(None, description="Expiry as Unix time")
+    duration: Optional[str] = Field(None, description="Extension duration")
+
+
+class AutoExtendReservationInfo(BaseModel):
+    """A reservation tracked by the auto-extend scheduler."""
+
+    namespace: str = Field(..., description="Namespace name")
+    expires_at: Optional[float] = Field(None, description="Expiry as Unix time")
+    first_seen: Optional[float] = Field(None, description="When first seen")
+    attempts: int = Field(..., description="Failed attempts since the last success")
+    next_attempt_at: Optional[float] = Field(None, description="Next retry time")
+    last_decision: Optional[AutoExtendDecisionInfo] = Field(
+        None, description="Most recent decision"
+    )
+
+
+class AutoExtendStatus(BaseModel):
+    """Auto-extend scheduler state for the user."""
+
+    running: bool = Field(..., description="Whether the scheduler is running")
+    interval: float = Field(..., description="Seconds between checks")
+    last_check: Optional[float] = Field(None, description="Last check as Unix time")
+    policy: AutoExtendPolicyConfig = Field(..., description="The user's policy")
+    reservations: List[AutoExtendReservationInfo] = Field(
+        default_factory=list, description="The user's tracked reservations"
+    )
+
+
+class SessionStatus(BaseModel):
+    """Validity of the service's login to the ephemeral cluster."""
+
+    cluster_id: str = Field(..., description="Cluster identifier")
+    kubeconfig_path: str = Field(..., description="Service-owned kubeconfig")
+    valid: bool = Field(..., description="Whether requests can use the login")
+    expires_at: Optional[float] = Field(
+        None, description="Token expiry as Unix time (null if it does not expire)"
+    )
+    expiry_source: Optional[str] = Field(
+        None,
+        description="'oauth' if confirmed with the cluster, 'jwt' or 'mtime' if "
+        "read from the kubeconfig",
+    )
+    verified_at: Optional[float] = Field(
+        None, description="Last confirmation with the cluster"
+    )
+    refreshing: bool = Field(..., description="Whether a background login is running")
+    last_refresh_at: Optional[float] = Field(
+        None, description="Last successful background login"
+    )
+    last_error: Optional[str] = Field(None, description="Last login failure")
+    last_used: Optional[float] = Field(None, description="Last use by a request")
+
+
+class DeploymentStatusInfo(BaseModel):
+    """Rollout state of a Deployment."""
+
+    name: str = Field(..., description="Deployment name")
+    ready: bool = Field(..., description="Whether the rollout is complete")
+    replicas: int = Field(..., description="Desired replicas")
+    ready_replicas: int = Field(..., description="Ready replicas")
+    updated_replicas: int = Field(..., description="Replicas on the latest spec")
+    available_replicas: int = Field(..., description="Available replicas")
+    message: Optional[str] = Field(None, description="Why the rollout is stuck")
+
+
+class PodStatusInfo(BaseModel):
+    """State of a Pod."""
+
+    name: str = Field(..., description="Pod name")
+    phase: Optional[str] = Field(None, description="Pod phase")
+    ready: bool = Field(..., description="Whether the pod is ready")
+    restarts: int = Field(..., description="Container restarts")
+    reason: Optional[str] = Field(
+        None, description="Why a container is waiting, e.g. CrashLoopBackOff"
+    )
+    app: Optional[str] = Field(None, description="The pod's 'app' label")
+
+
+class ClowdAppStatusInfo(BaseModel):
+    """Readiness of a ClowdApp."""
+
+    name: str = Field(..., description="ClowdApp name")
+    ready: bool = Field(..., description="Whether all its deployments are ready")
+    managed_deployments: int = Field(..., description="Deployments it manages")
+    ready_deployments: int = Field(..., description="Ready deployments")
+    message: Optional[str] = Field(None, description="Why it is not ready")
+
+
+class DeployStatus(BaseModel):
+    """Deployment status of a namespace, kept current by watches."""
+
+    namespace: str = Field(..., description="Namespace name")
+    ready: bool = Field(
+        ..., description="Whether all deployments and ClowdApps are ready"
+    )
+    synced: bool = Field(..., description="Whether every kind was listed")
+    version: int = Field(..., description="Increases on every change")
+    updated_at: Optional[float] = Field(None, description="Last change (Unix time)")
+    deployments_ready: int = Field(..., description="Ready deployments")
+    deployments_total: int = Field(..., description="Deployments")
+    pods_ready: int = Field(..., description="Ready pods (excluding finished)")
+    pods_total: int = Field(..., description="Pods (excluding finished)")
+    clowdapps_available: bool = Field(
+        ..., description="Whether the ClowdApp API exists on the cluster"
+    )
+    errors: List[str] = Field(
+        default_factory=list, description="Current list/watch errors"
+    )
+    deployments: List[DeploymentStatusInfo] = Field(default_factory=list)
+    pods: List[PodStatusInfo] = Field(default_factory=list)
+    clowdapps: List[ClowdAppStatusInfo] = Field(default_factory=list)
+
+
+class PortForwardRequest(BaseModel):
+    """Request to forward a local port into a namespace."""
+
+    namespace: Optional[str] = Field(
+        None, description="Namespace (default: your primary namespace)"
+    )
+    target: str = Field(
+        ...,
+        description="Service name, or svc/, pod/ or deploy/ followed by a name",
+        examples=["svc/advisor-api"],
+    )
+    port: int = Field(..., ge=1, le=65535, description="Port on the target")
+    local_port: Optional[int] = Field(
+        None, ge=1024, le=65535, description="Local port (default: any free port)"
+    )
+    idle_timeout: int = Field(
+        default=900,
+        ge=30,
+        le=86400,
+        description="Seconds without connections before it is torn down",
+    )
+
+
+class PortForwardInfo(BaseModel):
+    """A managed port-forward and its traffic counters."""
+
+    id: str = Field(..., description="Forward ID")
+    namespace: str = Field(..., description="Namespace")
+    target: str = Field(..., description="Target as kind/name")
+    remote_port: int = Field(..., description="Port on the target")
+    local_port: int = Field(..., description="Local port")
+    local_address: str = Field(..., description="Address to connect to")
+    state: str = Field(
+        ..., description="'starting', 'ready', 'reconnecting' or 'stopped'"
+    )
+    error: Optional[str] = Field(None, description="Last kubectl error")
+    restarts: int = Field(..., description="Times kubectl was restarted")
+    active_connections: int = Field(..., description="Open connections")
+    total_connections: int = Field(..., description="Connections relayed")
+    failed_connections: int = Field(
+        ..., description="Connections closed because the tunnel was down"
+    )
+    bytes_in: int = Field(..., description="Bytes received from the target")
+    bytes_out: int = Field(..., description="Bytes sent to the target")
+    latency_ms: Optional[float] = Field(
+        None, description="Smoothed time from request to first response byte"
+    )
+    last_latency_ms: Optional[float] = Field(
+        None, description="Time to first response byte of the last connection"
+    )
+    idle_timeout: int = Field(..., description="Idle teardown (seconds)")
+    created_at: float = Field(..., description="Start time (Unix time)")
+    last_activity: float = Field(..., description="Last traffic (Unix time)")
+    pid: Optional[int] = Field(None, description="kubectl process ID")
+    reused: bool = Field(
+        default=False, description="Whether an existing forward was returned"
+    )
@@ -0,0 +1,78 @@
+"""Pydantic models for kubeconfig management."""
+
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class KubeconfigInfo(BaseModel):
+    """Summary of a per-cluster kubeconfig file (tokens are never returned)."""
+
+    path: str = Field(..., description="Path to the kubeconfig file")
+    cluster_id: str = Field(..., description="Cluster identifier from rhtoken.json")
+    namespace: Optional[str] = Field(
+        None, description="Namespace the config is isolated to (from the file name)"
+    )
+    context: Optional[str] = Field(None, description="Current context")
+    server: Optional[str] = Field(None, description="API server URL")
+    user: Optional[str] = Field(None, description="User of the current context")
+    context_namespace: Optional[str] = Field(
+        None, description="Namespace set on the current context"
+    )
+    expires_at: Optional[float] = Field(
+        None, description="Token expiry as Unix time (estimated for opaque tokens)"
+    )
+    expiry_source: Optional[str] = Field(
+        None,
+        description="'jwt' if read from the token, 'mtime' if estimated from the file",
+    )
+    expired: bool = Field(..., description="Whether the token is (about to be) expired")
+    valid: bool = Field(..., description="Whether the config is ready to use")
+
+
+class KubeconfigEnsureResponse(KubeconfigInfo):
+    """Result of ensuring a ready kubeconfig."""
+
+    reauthenticated: bool = Field(
+        ..., description="Whether a login was needed to refresh the token"
+    )
+
+
+class KubeProxyInfo(BaseModel):
+    """A running local API proxy for a cluster."""
+
+    cluster_id: str = Field(..., description="Cluster identifier")
+    url: str = Field(..., description="Local proxy URL")
+    port: int = Field(..., description="Local port")
+    kubeconfig_path: str = Field(
+        ..., description="Kubeconfig that points local tools at the proxy"
+    )
+    started_at: float = Field(..., description="Start time as Unix time")
+    requests: int = Field(..., description="Requests forwarded so far")
+    running: bool = Field(..., description="Whether the proxy is serving")
+
+
+class KubeFanoutRequest(BaseModel):
+    """A read-only resource query to run on several clusters."""
+
+    clusters: List[str] = Field(
+        default_factory=list,
+        description="Cluster IDs to query (empty = every cluster in the catalog)",
+    )
+    resource: str = Field(..., description="Resource plural, e.g. 'pods'")
+    api_version: str = Field(
+        default="v1", description="API group/version, e.g. 'v1' or 'apps/v1'"
+    )
+    namespace: Optional[str] = Field(
+        None, description="Namespace (omit for all namespaces)"
+    )
+    name: Optional[str] = Field(None, description="Get a single object by name")
+    label_selector: Optional[str] = Field(None, description="Label selector")
+    field_selector: Optional[str] = Field(None, description="Field selector")
+    limit: Optional[int] = Field(None, ge=1, description="Maximum items per cluster")
+    timeout: float = Field(
+        default=10.0, gt=0, le=120, description="Per-cluster timeout in seconds"
+    )
+    max_concurrency: int = Field(
+        default=8, ge=1, le=64, description="Maximum clusters queried at once"
+    )
@@ -0,0 +1,39 @@
+"""Debug API routes.
+
+Introspection endpoints for the running service.
+"""
+
+import logging
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends
+
+from api.dependencies.auth import verify_token
+from services.process_supervisor import process_supervisor
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get("/processes")
+def list_processes(_token: str = Depends(verify_token)) -> List[Dict[str, Any]]:
+    """
+    List helper processes spawned by the service.
+
+    Returns:
+    - One entry per tracked helper (rhtoken, terminals, VPN scripts, ...)
+      with the live processes in its tree and their resident memory
+    """
+    return process_supervisor.list_processes()
+
+
+@router.post("/processes/reap")
+def reap_processes(_token: str = Depends(verify_token)) -> Dict[str, int]:
+    """
+    Run a reaper pass immediately.
+
+    Returns:
+    - reaped: Number of exited helpers that were cleaned up
+    """
+    return {"reaped": process_supervisor.reap()}
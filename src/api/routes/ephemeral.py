@@ -4,40 +4,113 @@ These routes interact with external Kubernetes instances where
 ephemeral pipelines are run (bonfire/OpenShift environments).
 """
 
+import asyncio
 import logging
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
 from api.models.ephemeral import (
+    AutoExtendDecisionInfo,
+    AutoExtendPolicyConfig,
+    AutoExtendStatus,
+    DeployStatus,
+    JobInfo,
+    NamespaceBatchExtendRequest,
+    NamespaceBatchItem,
+    NamespaceBatchResponse,
     NamespaceDetails,
     NamespaceExtendRequest,
+    NamespaceReleaseRequest,
+    NamespaceReservationInfo,
+    NamespaceReserveRequest,
     NamespaceStatus,
+    PortForwardInfo,
+    PortForwardRequest,
+    SessionStatus,
+)
+from api.utils.streaming import event_stream, wants_sse
+from services.auto_extend import AutoExtendPolicy, auto_extend_scheduler
+from services.deploy_status import deploy_watchers
+from services.ephemeral import (
+    BATCH_CONCURRENCY,
+    MAX_BATCH_CONCURRENCY,
+    NamespaceListError,
+    NamespaceResult,
+    NamespaceSnapshot,
+    ephemeral_session,
 )
 from services.ephemeral import extend_namespace as extend_namespace_service
+from services.ephemeral import extend_namespaces as extend_namespaces_service
 from services.ephemeral import (
-    get_namespace_expires,
-    get_namespace_list,
-    get_namespace_name,
     get_namespace_password,
-    get_namespace_route,
+    inspect_namespaces,
+    namespace_cache,
+    release_namespace,
 )
+from services.ephemeral_jobs import Job, ReserveOptions, ephemeral_jobs
+from services.kube_api import KubeAPIError
+from services.kube_session import SessionExpiredError
 from services.password_store import password_store
+from services.pod_logs import (
+    MAX_STREAMS_PER_REQUEST,
+    LogOptions,
+    PodLogError,
+    find_sources,
+    stream_logs,
+)
+from services.port_forward import PortForwardError, port_forwards
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ephemeral", tags=["ephemeral"])
 
+# Combined deadline in seconds for all lookups of a details request
+DETAILS_DEADLINE = 60.0
+
+# Seconds between keep-alives on an idle event stream
+EVENT_KEEPALIVE = 15.0
+
+# Seconds a deploy status request waits for a new watcher's first lists
+DEPLOY_STATUS_SYNC_WAIT = 10.0
+
 
 # Import verify_token from main - we'll use a dependency function
 # Import verify_token from auth dependencies
 from api.dependencies.auth import verify_token as get_verify_token
 
 
+def session_unavailable(error: SessionExpiredError) -> HTTPException:
+    """503 telling the client to retry once the background login is done."""
+    return HTTPException(
+        status_code=503, detail=str(error), headers={"Retry-After": "30"}
+    )
+
+
+def listing_unavailable(error: NamespaceListError) -> HTTPException:
+    """502 when bonfire could not list the namespaces."""
+    return HTTPException(status_code=502, detail=str(error))
+
+
+async def get_username() -> str:
+    """Get the username from the password store without blocking the loop."""
+    username = await run_in_threadpool(password_store.get_from_store, "username")
+    if not username:
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to retrieve username from password store",
+        )
+    return str(username).strip()
+
+
 @router.get("/namespace/details", response_model=NamespaceDetails)
-def get_namespace_details(
+async def get_namespace_details(
     headless: bool = Query(
-        default=False, description="Use headless mode for authentication"
+        default=False,
+        deprecated=True,
+        description="Ignored: namespace lookups never log in",
     ),
     include_password: bool = Query(
         default=False, description="Include namespace password in response"
@@ -51,48 +124,67 @@ def get_namespace_details(
     including the namespace name, route, and expiration date.
     """
     try:
-        # Get username from password store
-        username = password_store.get_from_store("username")
-        if not username:
+        username = await get_username()
+
+        async def lookup_password() -> Optional[str]:
+            # Starts as soon as the namespace name is known, concurrently
+            # with the route lookup of the snapshot refresh
+            name = await namespace_cache.get_name(username)
+            return await get_namespace_password(name) if name else None
+
+        async def lookup() -> Tuple[NamespaceSnapshot, Optional[str]]:
+            password_task = (
+                asyncio.create_task(lookup_password()) if include_password else None
+            )
+            try:
+                snapshot = await namespace_cache.get(username)
+                password = await password_task if password_task else None
+            finally:
+                if password_task is not None:
+                    password_task.cancel()
+            return snapshot, password
+
+        try:
+            snapshot, password = await asyncio.wait_for(lookup(), DETAILS_DEADLINE)
+        except asyncio.TimeoutError:
             raise HTTPException(
-                status_code=500,
-                detail="Failed to retrieve username from password store",
+                status_code=504,
+                detail=f"Namespace lookups did not finish within {DETAILS_DEADLINE}s",
             )
 
-        username = username.strip()
-
-        # Get namespace details
-        namespace_name = get_namespace_name(username, headless)
-        if not namespace_name:
+        if not snapshot.name:
             raise HTTPException(
                 status_code=404,
                 detail="No visible namespace reservation found for user",
             )
 
-        # Get additional details
-        route = get_namespace_route(namespace_name)
-        expires = get_namespace_expires(username, headless)
-
-        # Optionally get password
-        password = None
-        if include_password:
-            password = get_namespace_password(namespace_name)
-
         return NamespaceDetails(
-            name=namespace_name, route=route, expires=expires, password=password
+            name=snapshot.name,
+            route=snapshot.route,
+            expires=snapshot.expires,
+            password=password,
+            reservations=[
+                NamespaceReservationInfo(**r.to_dict()) for r in snapshot.reservations
+            ],
         )
 
     except HTTPException:
         raise
+    except SessionExpiredError as e:
+        raise session_unavailable(e)
+    except NamespaceListError as e:
+        raise listing_unavailable(e)
     except Exception as e:
         logger.error(f"Error getting namespace details: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/namespace/status", response_model=NamespaceStatus)
-def get_namespace_status(
+async def get_namespace_status(
     headless: bool = Query(
-        default=False, description="Use headless mode for authentication"
+        default=False,
+        deprecated=True,
+        description="Ignored: namespace lookups never log in",
     ),
     token: str = Depends(get_verify_token),
 ):
@@ -102,42 +194,35 @@ def get_namespace_status(
     Returns information about whether a namespace exists and its current state.
     """
     try:
-        # Get username from password store
-        username = password_store.get_from_store("username")
-        if not username:
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to retrieve username from password store",
-            )
+        username = await get_username()
 
-        username = username.strip()
-
-        # Get namespace list
-        namespace_list = get_namespace_list(username, headless)
-
-        if not namespace_list or len(namespace_list) == 0:
+        snapshot = await namespace_cache.get(username)
+        if not snapshot.exists:
             return NamespaceStatus(exists=False, name=None, expires=None, details=None)
 
-        # Namespace exists
-        namespace_name = namespace_list[0] if len(namespace_list) > 0 else None
-        expires = namespace_list[6] if len(namespace_list) > 6 else None
-
         return NamespaceStatus(
             exists=True,
-            name=namespace_name,
-            expires=expires,
-            details={"full_info": namespace_list},
+            name=snapshot.name,
+            expires=snapshot.expires,
+            details={"full_info": snapshot.fields, "state": snapshot.state},
+            reservations=[
+                NamespaceReservationInfo(**r.to_dict()) for r in snapshot.reservations
+            ],
         )
 
     except HTTPException:
         raise
+    except SessionExpiredError as e:
+        raise session_unavailable(e)
+    except NamespaceListError as e:
+        raise listing_unavailable(e)
     except Exception as e:
         logger.error(f"Error getting namespace status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/namespace/extend")
-def extend_namespace(
+async def extend_namespace(
     request: Optional[NamespaceExtendRequest] = None,
     headless: bool = Query(
         default=False, description="Use headless mode for authentication"
@@ -150,18 +235,10 @@ def extend_namespace(
     This extends the namespace reservation to prevent it from being cleaned up.
     """
     try:
-        # Get username from password store
-        username = password_store.get_from_store("username")
-        if not username:
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to retrieve username from password store",
-            )
-
-        username = username.strip()
+        username = await get_username()
 
         # Get namespace name
-        namespace_name = get_namespace_name(username, headless)
+        namespace_name = await namespace_cache.get_name(username)
         if not namespace_name:
             raise HTTPException(
                 status_code=404,
@@ -174,15 +251,15 @@ def extend_namespace(
             duration = request.duration
 
         # Extend the namespace
-        success = extend_namespace_service(namespace_name, duration)
+        success = await extend_namespace_service(namespace_name, duration, headless)
         if not success:
             raise HTTPException(
                 status_code=500, detail=f"Failed to extend namespace {namespace_name}"
             )
 
-        # Get updated namespace info
-        namespace_list = get_namespace_list(username, headless)
-        expires = get_namespace_expires(username, headless)
+        # The cached expiry is now stale; fetch the updated namespace info
+        namespace_cache.invalidate(username)
+        snapshot = await namespace_cache.get(username, force=True)
 
         logger.info(f"Extended namespace {namespace_name} by {duration}")
 
@@ -191,44 +268,43 @@ def extend_namespace(
             "message": f"Namespace {namespace_name} extended by {duration}",
             "namespace": namespace_name,
             "duration": duration,
-            "new_expiration": expires,
-            "details": namespace_list,
+            "new_expiration": snapshot.expires,
+            "details": snapshot.fields,
         }
 
     except HTTPException:
         raise
+    except SessionExpiredError as e:
+        raise session_unavailable(e)
+    except NamespaceListError as e:
+        raise listing_unavailable(e)
     except Exception as e:
         logger.error(f"Error extending namespace: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/namespace/clear-cache")
-def clear_namespace_cache(
+async def clear_namespace_cache(
     headless: bool = Query(
-        default=False, description="Use headless mode for authentication"
+        default=False,
+        deprecated=True,
+        description="Ignored: namespace lookups never log in",
     ),
     token: str = Depends(get_verify_token),
 ):
     """
     Clear the namespace cache and refresh data.
 
-    This forces a fresh lookup of namespace information from bonfire.
-    Note: The current implementation doesn't use a cache at the service layer,
-    so this endpoint mainly serves for compatibility with the old API.
+    Drops the cached namespace snapshot and forces a fresh lookup of
+    namespace information from bonfire.
     """
     try:
-        # Get username from password store
-        username = password_store.get_from_store("username")
-        if not username:
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to retrieve username from password store",
-            )
-
-        username = username.strip()
+        username = await get_username()
 
         # Get fresh namespace info
-        namespace_list = get_namespace_list(username, headless)
+        namespace_cache.invalidate(username)
+        snapshot = await namespace_cache.get(username, force=True)
+        namespace_list = snapshot.fields
 
         if not namespace_list:
             raise HTTPException(
@@ -240,10 +316,579 @@ def clear_namespace_cache(
             "success": True,
             "message": "Cache cleared and namespace info refreshed",
             "namespace_info": namespace_list,
+            "reservations": [r.to_dict() for r in snapshot.reservations],
         }
 
     except HTTPException:
         raise
+    except SessionExpiredError as e:
+        raise session_unavailable(e)
+    except NamespaceListError as e:
+        raise listing_unavailable(e)
     except Exception as e:
         logger.error(f"Error clearing namespace cache: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/namespace/reserve", response_model=JobInfo, status_code=202)
+async def reserve_namespace(
+    request: Optional[NamespaceReserveRequest] = None,
+    headless: bool = Query(
+        default=False, description="Use headless mode for authentication"
+    ),
+    token: str = Depends(get_verify_token),
+):
+    """
+    Reserve a namespace in a background job.
+
+    Returns the job at once. The job reserves a namespace, optionally deploys
+    apps into it, waits for its resources and then prefetches its details
+    and password. Follow it with `GET /ephemeral/jobs/{job_id}/events`.
+    """
+    request = request or NamespaceReserveRequest(pool=None)
+    username = await get_username()
+
+    running = ephemeral_jobs.active(username)
+    if running is not None:
+        raise HTTPException(
+            status_code=409,
+            detail=f"A reserve job is already running: {running.id}",
+        )
+
+    options = ReserveOptions(headless=headless, **request.model_dump())
+    job = ephemeral_jobs.start_reserve(username, options)
+    return job.to_dict()
+
+
+@router.post("/namespace/release")
+async def release_namespace_endpoint(
+    request: Optional[NamespaceReleaseRequest] = None,
+    headless: bool = Query(
+        default=False, description="Use headless mode for authentication"
+    ),
+    token: str = Depends(get_verify_token),
+):
+    """
+    Release a namespace reservation.
+
+    Releases the given namespace, or the user's primary namespace.
+    """
+    try:
+        namespace_name = request.namespace if request else None
+        if not namespace_name:
+            username = await get_username()
+            namespace_name = await namespace_cache.get_name(username)
+        if not namespace_name:
+            raise HTTPException(
+                status_code=404,
+                detail="No visible namespace reservation found for user",
+            )
+
+        if not await release_namespace(namespace_name, headless):
+            raise HTTPException(
+                status_code=500, detail=f"Failed to release namespace {namespace_name}"
+            )
+        await port_forwards.stop_namespace(namespace_name)
+
+        return {
+            "success": True,
+            "message": f"Namespace {namespace_name} released",
+            "namespace": namespace_name,
+        }
+
+    except HTTPException:
+        raise
+    except SessionExpiredError as e:
+        raise session_unavailable(e)
+    except NamespaceListError as e:
+        raise listing_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error releasing namespace: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def get_job(job_id: str) -> Job:
+    """Get one of the user's jobs or raise 404."""
+    job = ephemeral_jobs.get(job_id, await get_username())
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+
+@router.get("/jobs", response_model=List[JobInfo])
+async def list_jobs(token: str = Depends(get_verify_token)):
+    """List the user's running and recently finished jobs, newest first."""
+    username = await get_username()
+    return [job.to_dict() for job in ephemeral_jobs.list_jobs(username)]
+
+
+@router.get("/jobs/{job_id}", response_model=JobInfo)
+async def get_job_status(job_id: str, token: str = Depends(get_verify_token)):
+    """Get the state of a job."""
+    return (await get_job(job_id)).to_dict()
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobInfo)
+async def cancel_job(job_id: str, token: str = Depends(get_verify_token)):
+    """
+    Cancel a running job.
+
+    The running bonfire command is killed. If the namespace was already
+    reserved, it is released unless the job was started with
+    `release_on_cancel` false. Follow the job until its state is `cancelled`.
+    """
+    job = await get_job(job_id)
+    if not ephemeral_jobs.cancel(job):
+        raise HTTPException(status_code=409, detail=f"Job already {job.state}")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    format: Optional[str] = Query(
+        default=None,
+        pattern="^(ndjson|sse)$",
+        description="'ndjson' or 'sse' (default: from the Accept header)",
+    ),
+    after: int = Query(default=0, ge=0, description="Skip events up to this seq"),
+    accept: Optional[str] = Header(default=None),
+    last_event_id: Optional[str] = Header(default=None),
+    token: str = Depends(get_verify_token),
+) -> StreamingResponse:
+    """
+    Stream a job's progress events until it finishes.
+
+    Events already recorded are sent first. Each event has `seq`, `time`,
+    `type` ("stage", "log", "namespace" or "done") and `stage`; the stream
+    ends after the "done" event. Server-sent events carry the seq as their
+    id, so a reconnecting EventSource resumes where it left off.
+    """
+    job = await get_job(job_id)
+    sse = wants_sse(format, accept)
+    if sse and last_event_id and last_event_id.isdigit():
+        after = max(after, int(last_event_id))
+
+    return event_stream(
+        job.follow(after, idle=EVENT_KEEPALIVE),
+        sse,
+        event_id=lambda event: event["seq"],
+        event_type=lambda event: event["type"],
+    )
+
+
+@router.get("/namespace/deploy/status", response_model=DeployStatus)
+async def get_deploy_status(
+    namespace: Optional[str] = Query(
+        default=None, description="Namespace (default: your primary namespace)"
+    ),
+    stream: bool = Query(
+        default=False, description="Stream the status on every change"
+    ),
+    format: Optional[str] = Query(
+        default=None,
+        pattern="^(ndjson|sse)$",
+        description="Stream format: 'ndjson' or 'sse' (default: from Accept)",
+    ),
+    accept: Optional[str] = Header(default=None),
+    token: str = Depends(get_verify_token),
+):
+    """
+    Get the readiness of the deployments, pods and ClowdApps in a namespace.
+
+    The first request for a namespace lists them and starts watches; later
+    requests are answered from the watched state without contacting the
+    cluster. With `stream`, the status is sent now and again after every
+    change until the client disconnects.
+    """
+    try:
+        if not namespace:
+            username = await get_username()
+            namespace = await namespace_cache.get_name(username)
+        if not namespace:
+            raise HTTPException(
+                status_code=404,
+                detail="No visible namespace reservation found for user",
+            )
+
+        # Fail fast instead of starting watches that cannot authenticate
+        ephemeral_session.require()
+        watcher = deploy_watchers.get(namespace)
+
+        if stream:
+            return event_stream(
+                watcher.follow(idle=EVENT_KEEPALIVE),
+                wants_sse(format, accept),
+                event_id=lambda status: status["version"],
+                event_type=lambda status: "status",
+            )
+
+        await watcher.wait_synced(DEPLOY_STATUS_SYNC_WAIT)
+        return watcher.status()
+
+    except HTTPException:
+        raise
+    except SessionExpiredError as e:
+        raise session_unavailable(e)
+    except NamespaceListError as e:
+        raise listing_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error getting deploy status: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def text_stream(lines: AsyncIterator[Optional[Dict[str, Any]]]) -> StreamingResponse:
+    """Stream log lines as plain text prefixed with their pod and container."""
+
+    async def body() -> AsyncIterator[bytes]:
+        async for line in lines:
+            if line is None:
+                continue
+            prefix = f"[{line['pod']}/{line['container']}]"
+            if "error" in line:
+                yield f"{prefix} error: {line['error']}\n".encode()
+            else:
+                yield f"{prefix} {line['line']}\n".encode()
+
+    return StreamingResponse(body(), media_type="text/plain; charset=utf-8")
+
+
+@router.get("/namespace/logs")
+async def get_namespace_logs(
+    namespace: Optional[str] = Query(
+        default=None, description="Namespace (default: your primary namespace)"
+    ),
+    selector: Optional[str] = Query(
+        default=None, description="Label selector of the pods (default: all pods)"
+    ),
+    container: Optional[str] = Query(
+        default=None, description="Only this container of each pod"
+    ),
+    follow: bool = Query(default=False, description="Keep streaming new lines"),
+    since_seconds: Optional[int] = Query(
+        default=None, ge=1, description="Only lines newer than this many seconds"
+    ),
+    tail_lines: Optional[int] = Query(
+        default=None, ge=0, le=10000, description="Last lines of each container"
+    ),
+    max_streams: int = Query(
+        default=MAX_STREAMS_PER_REQUEST,
+        ge=1,
+        le=MAX_STREAMS_PER_REQUEST,
+        description="Refuse selectors matching more containers than this",
+    ),
+    format: Optional[str] = Query(
+        default=None,
+        pattern="^(ndjson|sse|text)$",
+        description="'ndjson', 'sse' or 'text' (default: from Accept)",
+    ),
+    accept: Optional[str] = Header(default=None),
+    token: str = Depends(get_verify_token),
+):
+    """
+    Stream the merged logs of the pods matching a label selector.
+
+    Every container of every matching pod is read at once and the lines are
+    merged in timestamp order, each tagged with its pod and container.
+    Containers whose log cannot be read (e.g. not started yet) are reported
+    as lines with an `error` instead of a `line`.
+    """
+    try:
+        if not namespace:
+            username = await get_username()
+            namespace = await namespace_cache.get_name(username)
+        if not namespace:
+            raise HTTPException(
+                status_code=404,
+                detail="No visible namespace reservation found for user",
+            )
+
+        sources = await find_sources(namespace, selector, container, max_streams)
+        options = LogOptions(
+            follow=follow, since_seconds=since_seconds, tail_lines=tail_lines
+        )
+        lines = stream_logs(namespace, sources, options, idle=EVENT_KEEPALIVE)
+
+        if format == "text":
+            return text_stream(lines)
+        return event_stream(
+            lines,
+            wants_sse(format, accept),
+            event_id=lambda line: line.get("time") or "",
+            event_type=lambda line: "error" if "error" in line else "log",
+        )
+
+    except HTTPException:
+        raise
+    except SessionExpiredError as e:
+        raise session_unavailable(e)
+    except NamespaceListError as e:
+        raise listing_unavailable(e)
+    except PodLogError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except KubeAPIError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error streaming namespace logs: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/namespace/port-forwards", response_model=PortForwardInfo)
+async def create_port_forward(
+    request: PortForwardRequest, token: str = Depends(get_verify_token)
+):
+    """
+    Forward a local port to a service, pod or deployment in a namespace.
+
+    An identical running forward is returned instead of starting another.
+    The forward reconnects by itself when the target pod is replaced, is
+    torn down after `idle_timeout` seconds without connections, and is
+    stopped when the namespace is released.
+    """
+    try:
+        namespace = request.namespace
+        if not namespace:
+            username = await get_username()
+            namespace = await namespace_cache.get_name(username)
+        if not namespace:
+            raise HTTPException(
+                status_code=404,
+                detail="No visible namespace reservation found for user",
+            )
+
+        forward, reused = await port_forwards.start(
+            namespace,
+            request.target,
+            request.port,
+            request.local_port,
+            request.idle_timeout,
+        )
+        return {**forward.to_dict(), "reused": reused}
+
+    except HTTPException:
+        raise
+    except SessionExpiredError as e:
+        raise session_unavailable(e)
+    except NamespaceListError as e:
+        raise listing_unavailable(e)
+    except PortForwardError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error starting port-forward: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/namespace/port-forwards", response_model=List[PortForwardInfo])
+async def list_port_forwards(
+    namespace: Optional[str] = Query(
+        default=None, description="Only forwards into this namespace"
+    ),
+    token: str = Depends(get_verify_token),
+):
+    """List running port-forwards with their traffic counters."""
+    return [forward.to_dict() for forward in port_forwards.list_forwards(namespace)]
+
+
+@router.delete("/namespace/port-forwards/{forward_id}")
+async def delete_port_forward(forward_id: str, token: str = Depends(get_verify_token)):
+    """Stop a port-forward."""
+    if not await port_forwards.stop(forward_id):
+        raise HTTPException(
+            status_code=404, detail=f"Port-forward not found: {forward_id}"
+        )
+    return {"success": True, "message": f"Stopped port-forward {forward_id}"}
+
+
+def batch_response(
+    results: List[NamespaceResult], duration: Optional[str] = None
+) -> NamespaceBatchResponse:
+    """Build the response of a batch operation from its results."""
+    items = [
+        NamespaceBatchItem(
+            name=result.name,
+            success=result.ok,
+            error=result.error,
+            reservation=(
+                NamespaceReservationInfo(**result.reservation.to_dict())
+                if result.reservation
+                else None
+            ),
+            route=result.route,
+            password=result.password,
+        )
+        for result in results
+    ]
+    succeeded = sum(1 for item in items if item.success)
+    return NamespaceBatchResponse(
+        succeeded=succeeded,
+        failed=len(items) - succeeded,
+        duration=duration,
+        namespaces=items,
+    )
+
+
+@router.get("/namespaces", response_model=NamespaceBatchResponse)
+async def list_namespaces(
+    names: Optional[List[str]] = Query(
+        default=None,
+        alias="name",
+        description="Namespaces to describe (repeatable; default: your reservations)",
+    ),
+    requester: Optional[str] = Query(
+        default=None, description="Describe this user's reservations instead"
+    ),
+    include_password: bool = Query(
+        default=False, description="Include each namespace's password"
+    ),
+    include_route: bool = Query(
+        default=False, description="Include each namespace's route"
+    ),
+    concurrency: int = Query(
+        default=BATCH_CONCURRENCY,
+        ge=1,
+        le=MAX_BATCH_CONCURRENCY,
+        description="Maximum namespaces read at once",
+    ),
+    token: str = Depends(get_verify_token),
+):
+    """
+    Describe several ephemeral namespaces in one request.
+
+    All namespaces come from one namespace listing; passwords and routes are
+    read concurrently. A namespace that cannot be read gets an error in its
+    entry instead of failing the request.
+    """
+    try:
+        if not names and not requester:
+            requester = await get_username()
+
+        results = await inspect_namespaces(
+            names, requester, include_password, include_route, concurrency
+        )
+        return batch_response(results)
+
+    except HTTPException:
+        raise
+    except SessionExpiredError as e:
+        raise session_unavailable(e)
+    except NamespaceListError as e:
+        raise listing_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error listing namespaces: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/namespaces/extend", response_model=NamespaceBatchResponse)
+async def extend_namespaces(
+    request: Optional[NamespaceBatchExtendRequest] = None,
+    headless: bool = Query(
+        default=False, description="Use headless mode for authentication"
+    ),
+    token: str = Depends(get_verify_token),
+):
+    """
+    Extend several ephemeral namespaces in one request.
+
+    Extends the given namespaces, or all of the user's reservations, running
+    up to `concurrency` extensions at once. Each namespace's result and new
+    expiry is reported separately.
+    """
+    request = request or NamespaceBatchExtendRequest(namespaces=None)
+    try:
+        requester = None if request.namespaces else await get_username()
+
+        results = await extend_namespaces_service(
+            request.namespaces,
+            requester,
+            request.duration,
+            headless,
+            request.concurrency,
+        )
+        return batch_response(results, request.duration)
+
+    except HTTPException:
+        raise
+    except SessionExpiredError as e:
+        raise session_unavailable(e)
+    except NamespaceListError as e:
+        raise listing_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error extending namespaces: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/auto-extend", response_model=AutoExtendStatus)
+async def get_auto_extend_status(token: str = Depends(get_verify_token)):
+    """
+    Get the auto-extend policy and scheduler state for the user.
+
+    Lists the user's reservations tracked by the scheduler with their
+    expiry, retry state and most recent decision.
+    """
+    username = await get_username()
+    return auto_extend_scheduler.status(username)
+
+
+@router.put("/auto-extend/policy", response_model=AutoExtendStatus)
+async def set_auto_extend_policy(
+    policy: AutoExtendPolicyConfig, token: str = Depends(get_verify_token)
+):
+    """
+    Set the user's auto-extend policy.
+
+    When enabled, each of the user's reservations is extended by `duration`
+    once less than `window_minutes` remain, optionally only during working
+    hours and up to `max_lifetime_hours` in total. Applies from the next
+    scheduler check.
+    """
+    username = await get_username()
+    try:
+        auto_extend_scheduler.set_policy(
+            username, AutoExtendPolicy.from_dict(policy.model_dump())
+        )
+    except OSError as e:
+        logger.error(f"Error saving auto-extend policy: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to save policy: {e}")
+    return auto_extend_scheduler.status(username)
+
+
+@router.get("/auto-extend/decisions", response_model=List[AutoExtendDecisionInfo])
+async def get_auto_extend_decisions(
+    limit: int = Query(default=50, ge=1, le=200, description="Maximum decisions"),
+    token: str = Depends(get_verify_token),
+):
+    """
+    Get the auto-extend scheduler's recent decisions for the user.
+
+    Returns extensions, retries, failures and changes in skip reasons, most
+    recent first.
+    """
+    username = await get_username()
+    return auto_extend_scheduler.list_decisions(username, limit)
+
+
+@router.get("/session", response_model=SessionStatus)
+async def get_session_status(token: str = Depends(get_verify_token)):
+    """
+    Get the validity of the service's ephemeral cluster login.
+
+    Answered from the cached token expiry without contacting the cluster.
+    """
+    return ephemeral_session.status()
+
+
+@router.post("/session/refresh", response_model=SessionStatus)
+async def refresh_session(
+    headless: bool = Query(
+        default=True, description="Use headless mode for the browser login"
+    ),
+    token: str = Depends(get_verify_token),
+):
+    """
+    Start a background login to the ephemeral cluster.
+
+    Returns immediately; poll `GET /ephemeral/session` until `refreshing` is
+    false. The current login stays in use until the new one succeeds.
+    """
+    ephemeral_session.refresh(headless=headless, force=True)
+    return ephemeral_session.status()
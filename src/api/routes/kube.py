@@ -0,0 +1,205 @@
+"""Kubeconfig API routes.
+
+Manages the per-cluster ``~/.kube/config.<cluster>[-<namespace>]`` files used
+by ``kubeconfig.sh`` and other clients.
+"""
+
+import json
+import logging
+import time
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from api.dependencies.auth import verify_token
+from api.models.kube import (
+    KubeconfigEnsureResponse,
+    KubeconfigInfo,
+    KubeFanoutRequest,
+    KubeProxyInfo,
+)
+from api.utils.cluster_config import cluster_catalog
+from services.kube_api import KubeAPIError
+from services.kube_fanout import KubeQuery, fanout
+from services.kube_proxy import kube_proxies
+from services.kubeconfig import KubeconfigError, kubeconfig_registry
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/kube", tags=["kube"])
+
+
+@router.get("/configs", response_model=List[KubeconfigInfo])
+def list_configs(_token: str = Depends(verify_token)):
+    """
+    List the per-cluster kubeconfig files.
+
+    Files are parsed only when they change, so this never spawns kubectl.
+
+    Returns:
+    - One entry per config.<cluster>[-<namespace>] file with its server,
+      context, namespace and token expiry
+    """
+    try:
+        entries = kubeconfig_registry.scan(cluster_catalog.list_clusters())
+    except (FileNotFoundError, ValueError):
+        entries = kubeconfig_registry.scan()
+    return [entry.to_dict() for entry in entries]
+
+
+@router.post("/configs/{cluster_id}/ensure", response_model=KubeconfigEnsureResponse)
+async def ensure_config(
+    cluster_id: str,
+    namespace: Optional[str] = Query(
+        None, description="Namespace for an isolated per-namespace config"
+    ),
+    headless: bool = Query(
+        default=True, description="Use headless mode if a login is needed"
+    ),
+    _token: str = Depends(verify_token),
+):
+    """
+    Return a ready kubeconfig for a cluster.
+
+    Reuses the existing config while its token is valid. If the namespace
+    config is missing it is derived from the base cluster config; a login
+    through rhtoken only happens when the base config is missing or expired.
+
+    Parameters:
+    - cluster_id: Cluster identifier (e.g., 'e', 'p', 's')
+    - namespace: Optional namespace (config.<cluster>-<namespace>)
+    - headless: Run the browser login headless
+
+    Returns:
+    - The kubeconfig path and details, and whether a login was performed
+    """
+    if cluster_catalog.get_cluster(cluster_id) is None:
+        raise HTTPException(status_code=404, detail=f"Cluster '{cluster_id}' not found")
+
+    try:
+        entry, reauthenticated = await kubeconfig_registry.ensure(
+            cluster_id, namespace or None, headless=headless
+        )
+    except KubeconfigError as e:
+        logger.error(f"Failed to ensure kubeconfig for '{cluster_id}': {e}")
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error ensuring kubeconfig for '{cluster_id}': {e}")
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+    return {**entry.to_dict(), "reauthenticated": reauthenticated}
+
+
+@router.get("/proxies", response_model=List[KubeProxyInfo])
+def list_proxies(_token: str = Depends(verify_token)):
+    """
+    List the running local API proxies.
+
+    Returns:
+    - One entry per proxy with its local URL and kubeconfig path
+    """
+    return kube_proxies.list_proxies()
+
+
+@router.post("/proxies/{cluster_id}", response_model=KubeProxyInfo)
+async def start_proxy(
+    cluster_id: str,
+    port: int = Query(0, ge=0, le=65535, description="Local port (0 = any)"),
+    _token: str = Depends(verify_token),
+):
+    """
+    Start a local authenticating API proxy for a cluster.
+
+    The proxy listens on 127.0.0.1, injects the cluster's cached bearer token
+    and keeps pooled connections to the API server. Point tools at it with
+    the returned kubeconfig path. Returns the running proxy if one exists.
+
+    Parameters:
+    - cluster_id: Cluster identifier (e.g., 'e', 'p', 's')
+    - port: Local port to listen on (0 picks a free port)
+    """
+    if cluster_catalog.get_cluster(cluster_id) is None:
+        raise HTTPException(status_code=404, detail=f"Cluster '{cluster_id}' not found")
+
+    try:
+        proxy = await kube_proxies.start(cluster_id, port)
+    except KubeAPIError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except OSError as e:
+        raise HTTPException(
+            status_code=409, detail=f"Cannot listen on port {port}: {e}"
+        )
+
+    return proxy.to_dict()
+
+
+@router.delete("/proxies/{cluster_id}")
+async def stop_proxy(cluster_id: str, _token: str = Depends(verify_token)):
+    """
+    Stop a cluster's local API proxy and remove its kubeconfig.
+    """
+    if not await kube_proxies.stop(cluster_id):
+        raise HTTPException(
+            status_code=404, detail=f"No proxy running for cluster '{cluster_id}'"
+        )
+    return {"success": True, "message": f"Stopped proxy for cluster '{cluster_id}'"}
+
+
+@router.post("/fanout")
+async def fanout_query(
+    request: KubeFanoutRequest, _token: str = Depends(verify_token)
+) -> StreamingResponse:
+    """
+    Run the same read query on several clusters concurrently.
+
+    Each cluster is queried with its cached credentials, a per-cluster
+    timeout and a cap on concurrent clusters. Results are streamed as NDJSON
+    in completion order, so slow clusters never delay the first results.
+
+    Returns:
+    - One line per cluster: {"type": "result", "cluster_id", "status",
+      "items" | "code" + "error", "elapsed_ms"}
+    - A final {"type": "summary", ...} line with totals
+    """
+    catalog = cluster_catalog.list_clusters()
+    cluster_ids = request.clusters or sorted(catalog)
+    unknown = [c for c in cluster_ids if c not in catalog]
+    if unknown:
+        raise HTTPException(
+            status_code=404, detail=f"Unknown clusters: {', '.join(unknown)}"
+        )
+
+    query = KubeQuery(
+        resource=request.resource,
+        api_version=request.api_version,
+        namespace=request.namespace,
+        name=request.name,
+        label_selector=request.label_selector,
+        field_selector=request.field_selector,
+        limit=request.limit,
+    )
+
+    async def lines() -> AsyncIterator[bytes]:
+        start = time.perf_counter()
+        ok = items = 0
+        async for result in fanout(
+            query, cluster_ids, request.timeout, request.max_concurrency
+        ):
+            if result["status"] == "ok":
+                ok += 1
+                items += len(result["items"])
+            yield json.dumps({"type": "result", **result}).encode() + b"\n"
+
+        summary = {
+            "type": "summary",
+            "clusters": len(cluster_ids),
+            "ok": ok,
+            "errors": len(cluster_ids) - ok,
+            "items": items,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+        yield json.dumps(summary).encode() + b"\n"
+
+    logger.info(f"Fanout {query.path} to {len(cluster_ids)} clusters")
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
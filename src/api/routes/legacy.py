@@ -7,7 +7,8 @@ and existing scripts. New code should use the structured API routes instead.
 
 import logging
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 
 from api.dependencies.auth import verify_token
 from services.ephemeral import get_namespace_name, get_namespace_password
@@ -22,7 +23,10 @@ router = APIRouter(
 
 
 @router.get("/get_creds")
-def get_creds(context: str = "associate", headless: bool = False):
+async def get_creds(
+    context: str = "associate",
+    headless: bool = Query(default=False, deprecated=True),
+):
     """
     Get credentials based on context.
 
@@ -30,7 +34,7 @@ def get_creds(context: str = "associate", headless: bool = False):
 
     Args:
         context: Either "associate" or "jdoeEphemeral"
-        headless: Whether to use headless mode for ephemeral environments
+        headless: Ignored; ephemeral lookups never log in
 
     Returns:
         Comma-separated string: "username,password" or "Failed"
@@ -38,7 +42,9 @@ def get_creds(context: str = "associate", headless: bool = False):
     logger.debug(f"get_creds called with context={context}, headless={headless}")
 
     if context == "associate":
-        username, password_with_otp = password_store.get_associate_credentials()
+        username, password_with_otp = await run_in_threadpool(
+            password_store.get_associate_credentials
+        )
 
         if not username or not password_with_otp:
             logger.error("Failed to retrieve associate credentials")
@@ -49,18 +55,18 @@ def get_creds(context: str = "associate", headless: bool = False):
     elif context == "jdoeEphemeral":
         # Ephemeral login - backwards compatibility
         # Note: New code should use /ephemeral/namespace/details endpoint
-        username = password_store.get_username()
+        username = await run_in_threadpool(password_store.get_username)
         if not username:
             logger.error("Failed to retrieve username for ephemeral context")
             return "Failed"
 
         try:
-            namespace = get_namespace_name(username, headless)
+            namespace = await get_namespace_name(username)
             if not namespace:
                 logger.error("Failed to retrieve namespace for ephemeral context")
                 return "Failed"
 
-            password = get_namespace_password(namespace)
+            password = await get_namespace_password(namespace)
             if not password:
                 logger.error("Failed to retrieve password for ephemeral namespace")
                 return "Failed"
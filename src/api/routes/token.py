@@ -5,18 +5,20 @@ Provides endpoints for retrieving OpenShift login commands
 using the rhtoken script and managing cluster configurations.
 """
 
-import json
 import logging
 import os
 import subprocess
 from enum import Enum
 from typing import Dict, List, Optional, cast
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 
 from api.dependencies.auth import verify_token
-from api.utils.cluster_config import ClusterConfigManager
+from api.utils.cluster_config import BulkValidationError, cluster_catalog
+from services.cluster_health import cluster_health
+from services.process_supervisor import process_supervisor
 
 
 def transform_oauth_to_console_url(oauth_url: str) -> str:
@@ -73,6 +75,67 @@ class ClusterUpdateRequest(BaseModel):
     url: Optional[str] = Field(None, description="New cluster URL")
 
 
+class ClusterBulkRequest(BaseModel):
+    """Batch of cluster upserts and deletes applied in one transaction."""
+
+    upserts: List[ClusterResponse] = Field(
+        default_factory=list, description="Clusters to create or replace"
+    )
+    deletes: List[str] = Field(
+        default_factory=list, description="Cluster IDs to delete"
+    )
+
+
+class ClusterBulkItemResult(BaseModel):
+    """Result for a single item of a bulk request."""
+
+    cluster_id: str = Field(..., description="Cluster identifier")
+    operation: str = Field(..., description="upsert or delete")
+    status: str = Field(
+        ...,
+        description="created, updated, unchanged, deleted, error or skipped",
+    )
+    error: Optional[str] = Field(None, description="Validation error, if any")
+
+
+class ClusterBulkResponse(BaseModel):
+    """Bulk request response."""
+
+    applied: bool = Field(..., description="Whether the change set was written")
+    results: List[ClusterBulkItemResult] = Field(..., description="Per-item results")
+
+
+class EndpointHealth(BaseModel):
+    """Reachability of a single cluster endpoint."""
+
+    kind: str = Field(..., description="Endpoint kind (oauth or api)")
+    host: str = Field(..., description="Host name")
+    port: int = Field(..., description="TCP port")
+    status: str = Field(
+        ..., description="ok, timeout, refused, dns_error, tls_error or error"
+    )
+    tcp_ms: Optional[float] = Field(None, description="TCP connect time (ms)")
+    tls_ms: Optional[float] = Field(None, description="TLS handshake time (ms)")
+    error: Optional[str] = Field(None, description="Error detail")
+
+
+class ClusterHealth(BaseModel):
+    """Reachability of a cluster's endpoints."""
+
+    cluster_id: str = Field(..., description="Cluster identifier")
+    name: str = Field(..., description="Human-readable cluster name")
+    reachable: bool = Field(..., description="Whether all endpoints are reachable")
+    endpoints: List[EndpointHealth] = Field(..., description="Per-endpoint results")
+
+
+class ClusterHealthResponse(BaseModel):
+    """Cluster health probe response."""
+
+    checked_at: float = Field(..., description="Unix time of the probe run")
+    cached: bool = Field(..., description="Whether results came from cache")
+    clusters: List[ClusterHealth] = Field(..., description="Per-cluster results")
+
+
 @router.get("/oc-login")
 async def get_oc_login_command(
     env: Environment = Query(..., description="Environment: e|p|s|ap|cp|k"),
@@ -112,8 +175,9 @@ async def get_oc_login_command(
     logger.info(f"Executing command: {' '.join(cmd)}")
 
     try:
-        result = subprocess.run(
-            cmd, capture_output=True, text=True, timeout=60, check=True
+        # Runs in its own process group so Chrome/chromedriver die with it
+        result = await process_supervisor.run_async(
+            cmd, timeout=60, name=f"rhtoken {env.value}", check=True
         )
 
         # Extract the oc login command from output
@@ -169,16 +233,8 @@ async def get_oc_login_command(
 def _get_env_name(env: str) -> str:
     """Get human-readable environment name from rhtoken.json config."""
     try:
-        script_dir = os.path.dirname(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        )
-        config_path = os.path.join(script_dir, "rhtoken.json")
-
-        with open(config_path, "r") as f:
-            config = cast(Dict, json.load(f))
-            clusters = config.get("clusters", {})
-            cluster = clusters.get(env, {})
-            return cast(str, cluster.get("name", "Unknown"))
+        cluster = cluster_catalog.get_cluster(env) or {}
+        return cast(str, cluster.get("name", "Unknown"))
     except Exception as e:
         logger.error(f"Error loading environment name from config: {e}")
         return "Unknown"
@@ -188,16 +244,28 @@ def _get_env_name(env: str) -> str:
 
 
 @router.get("/clusters", response_model=List[ClusterResponse])
-async def list_clusters(_token: str = Depends(verify_token)) -> List[ClusterResponse]:
+async def list_clusters(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    _token: str = Depends(verify_token),
+):
     """
     List all configured OpenShift clusters.
 
+    The response carries an ETag derived from the catalog generation; send it
+    back in If-None-Match to get 304 Not Modified while the catalog is unchanged.
+
     Returns:
     - List of all cluster configurations with their IDs, names, descriptions, and URLs
     """
     try:
-        manager = ClusterConfigManager()
+        manager = cluster_catalog
         clusters = manager.list_clusters()
+        etag = manager.etag
+
+        if if_none_match == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
 
         return [
             ClusterResponse(
@@ -220,20 +288,27 @@ async def search_clusters(
     q: str = Query(
         ..., description="Search query (searches name, description, URL, and ID)"
     ),
+    limit: Optional[int] = Query(
+        None, ge=1, description="Maximum number of results to return"
+    ),
     _token: str = Depends(verify_token),
 ) -> List[ClusterResponse]:
     """
     Search clusters by name, description, URL, or ID.
 
+    Matches whole words, prefixes, substrings and near misses, ranked by
+    relevance (matches in the ID and name rank above description and URL).
+
     Parameters:
     - **q**: Search query string (case-insensitive)
+    - **limit**: Maximum number of results (optional)
 
     Returns:
-    - List of matching cluster configurations
+    - List of matching cluster configurations, best match first
     """
     try:
-        manager = ClusterConfigManager()
-        clusters = manager.search_clusters(q)
+        manager = cluster_catalog
+        clusters = manager.search_clusters(q, limit)
 
         return [
             ClusterResponse(
@@ -251,9 +326,46 @@ async def search_clusters(
         )
 
 
+@router.get("/clusters/health", response_model=ClusterHealthResponse)
+async def get_clusters_health(
+    refresh: bool = Query(False, description="Ignore cached probe results"),
+    _token: str = Depends(verify_token),
+) -> ClusterHealthResponse:
+    """
+    Check which clusters are reachable from the current network/VPN.
+
+    Probes every cluster's OAuth endpoint and its API server (derived from
+    the OAuth URL, port 6443) concurrently with a TCP connect and TLS
+    handshake. Results are cached for a short time.
+
+    Parameters:
+    - **refresh**: Ignore cached results and probe again
+
+    Returns:
+    - Per-cluster reachability with TCP and TLS latency per endpoint
+    """
+    try:
+        manager = cluster_catalog
+        clusters = manager.list_clusters()
+        results, cached = await cluster_health.check(
+            clusters, catalog_key=manager.etag, force=refresh
+        )
+
+        return ClusterHealthResponse(
+            checked_at=cluster_health.checked_at,
+            cached=cached,
+            clusters=[ClusterHealth(**probe.to_dict()) for probe in results],
+        )
+    except Exception as e:
+        logger.error(f"Error checking cluster health: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to check cluster health: {str(e)}"
+        )
+
+
 @router.get("/clusters/{cluster_id}", response_model=ClusterResponse)
 async def get_cluster(
-    cluster_id: str, _token: str = Depends(verify_token)
+    cluster_id: str, response: Response, _token: str = Depends(verify_token)
 ) -> ClusterResponse:
     """
     Get a specific cluster configuration by ID.
@@ -265,7 +377,7 @@ async def get_cluster(
     - Cluster configuration details
     """
     try:
-        manager = ClusterConfigManager()
+        manager = cluster_catalog
         cluster = manager.get_cluster(cluster_id)
 
         if cluster is None:
@@ -273,6 +385,7 @@ async def get_cluster(
                 status_code=404, detail=f"Cluster '{cluster_id}' not found"
             )
 
+        response.headers["ETag"] = manager.etag
         return ClusterResponse(
             cluster_id=cluster_id,
             name=cluster.get("name", ""),
@@ -301,7 +414,7 @@ async def add_cluster(
     - The newly created cluster configuration
     """
     try:
-        manager = ClusterConfigManager()
+        manager = cluster_catalog
         manager.add_cluster(
             cluster_id=cluster_id,
             name=cluster_config.name,
@@ -339,7 +452,7 @@ async def update_cluster(
     - The updated cluster configuration
     """
     try:
-        manager = ClusterConfigManager()
+        manager = cluster_catalog
         updated_cluster = manager.update_cluster(
             cluster_id=cluster_id,
             name=update_request.name,
@@ -376,7 +489,7 @@ async def delete_cluster(
     - The deleted cluster configuration
     """
     try:
-        manager = ClusterConfigManager()
+        manager = cluster_catalog
         deleted_cluster = manager.delete_cluster(cluster_id)
 
         return ClusterResponse(
@@ -394,6 +507,94 @@ async def delete_cluster(
         )
 
 
+# Bulk Import/Export Endpoints
+
+
+@router.get("/clusters:export", response_model=ClusterBulkRequest)
+async def export_clusters(
+    response: Response, _token: str = Depends(verify_token)
+) -> ClusterBulkRequest:
+    """
+    Export the whole cluster catalog.
+
+    The response body can be posted unchanged to /token/clusters:bulk on
+    another machine to import the catalog.
+
+    Returns:
+    - upserts: All cluster configurations
+    - deletes: Always empty
+    """
+    try:
+        manager = cluster_catalog
+        clusters = manager.list_clusters()
+        response.headers["ETag"] = manager.etag
+
+        return ClusterBulkRequest(
+            upserts=[
+                ClusterResponse(
+                    cluster_id=cluster_id,
+                    name=cluster_data.get("name", ""),
+                    description=cluster_data.get("description", ""),
+                    url=cluster_data.get("url", ""),
+                )
+                for cluster_id, cluster_data in clusters.items()
+            ]
+        )
+    except Exception as e:
+        logger.error(f"Error exporting clusters: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to export clusters: {str(e)}"
+        )
+
+
+@router.post("/clusters:bulk", response_model=ClusterBulkResponse)
+async def bulk_update_clusters(
+    bulk_request: ClusterBulkRequest,
+    response: Response,
+    _token: str = Depends(verify_token),
+):
+    """
+    Create, replace and delete many clusters at once.
+
+    The whole batch is validated before anything is applied. If any item is
+    invalid nothing is written and the response is 400 with per-item results.
+    Otherwise all changes are applied with a single atomic write.
+
+    Parameters:
+    - **upserts**: Clusters to create or replace (cluster_id, name, description, url)
+    - **deletes**: Cluster IDs to delete
+
+    Returns:
+    - applied: Whether the change set was written
+    - results: Per-item status (created, updated, unchanged, deleted)
+    """
+    try:
+        manager = cluster_catalog
+        results = manager.bulk_update(
+            upserts=[item.model_dump() for item in bulk_request.upserts],
+            deletes=bulk_request.deletes,
+        )
+        response.headers["ETag"] = manager.etag
+
+        return ClusterBulkResponse(
+            applied=True,
+            results=[ClusterBulkItemResult(**result) for result in results],
+        )
+    except BulkValidationError as e:
+        return JSONResponse(
+            status_code=400,
+            content=ClusterBulkResponse(
+                applied=False,
+                results=[ClusterBulkItemResult(**result) for result in e.results],
+            ).model_dump(),
+        )
+    except Exception as e:
+        logger.error(f"Error applying bulk cluster changes: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to apply bulk changes: {str(e)}"
+        )
+
+
 # Cluster Terminal and Web Console Endpoints
 
 
@@ -452,11 +653,12 @@ async def open_cluster_terminal(
         logger.debug(f"[open-terminal] Full terminal command: {terminal_command}")
 
         # Start the process and immediately return (don't wait for it)
-        process = subprocess.Popen(
+        process = process_supervisor.spawn(
             terminal_command,
+            name=f"open-terminal {cluster_id}",
+            detached=True,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
-            start_new_session=True,
         )
 
         logger.info(f"[open-terminal] Terminal process started with PID: {process.pid}")
@@ -496,7 +698,7 @@ async def open_cluster_web(
     """
     try:
         # Get cluster configuration
-        manager = ClusterConfigManager()
+        manager = cluster_catalog
         cluster = manager.get_cluster(cluster_id)
 
         if cluster is None:
@@ -509,11 +711,12 @@ async def open_cluster_web(
         console_url = transform_oauth_to_console_url(oauth_url)
 
         # Open URL in browser
-        subprocess.Popen(
+        process_supervisor.spawn(
             ["xdg-open", console_url],
+            name=f"open-web {cluster_id}",
+            detached=True,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
-            start_new_session=True,
         )
 
         logger.info(f"Opened web console for cluster {cluster_id}: {console_url}")
@@ -3,9 +3,10 @@
 import logging
 import subprocess
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 
 from api.models.vpn import (
     VPNDefaultInfo,
@@ -13,14 +14,14 @@ from api.models.vpn import (
     VPNSetDefaultRequest,
     VPNStatus,
 )
+from api.utils.streaming import event_stream, wants_sse
 from services.password_store import password_store
+from services.process_supervisor import process_supervisor
 from services.vpn import (
-    find_profile_by_id,
-    find_profile_by_uuid,
+    connect_vpn,
     get_default_vpn_uuid,
-    get_global_profile,
+    get_profile_registry,
     get_vpn_connection_status,
-    load_vpn_profiles,
     set_default_vpn_uuid,
 )
 
@@ -39,9 +40,7 @@ def list_vpn_profiles(
 ):  # Token verification will be added later
     """List all configured VPN profiles."""
     try:
-        config = load_vpn_profiles()
-        profiles = config.get("profiles", [])
-        return profiles
+        return [profile.to_dict() for profile in get_profile_registry()]
     except Exception as e:
         logger.error(f"Error loading VPN profiles: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -51,16 +50,13 @@ def list_vpn_profiles(
 def get_vpn_profile(profile_id: str, token: str = Depends(get_verify_token)):
     """Get details for a specific VPN profile."""
     try:
-        config = load_vpn_profiles()
-        profiles = config.get("profiles", [])
-
-        profile = find_profile_by_id(profiles, profile_id)
+        profile = get_profile_registry().get(profile_id)
         if not profile:
             raise HTTPException(
                 status_code=404, detail=f"Profile '{profile_id}' not found"
             )
 
-        return profile
+        return profile.to_dict()
     except HTTPException:
         raise
     except Exception as e:
@@ -83,22 +79,20 @@ def get_default_vpn(token: str = Depends(get_verify_token)):
         # If no UUID found, initialize to GLOBAL profile
         if not uuid:
             logger.info("No default VPN UUID found, initializing to GLOBAL profile")
-            config = load_vpn_profiles()
-            profiles = config.get("profiles", [])
-            global_profile = get_global_profile(profiles)
+            global_profile = get_profile_registry().global_profile
 
             if not global_profile:
                 raise HTTPException(
                     status_code=404, detail="GLOBAL profile not found in profiles.yaml"
                 )
 
-            if not global_profile.get("uuid"):
+            if not global_profile.uuid:
                 raise HTTPException(
                     status_code=500,
                     detail="GLOBAL profile does not have a UUID configured",
                 )
 
-            uuid = global_profile["uuid"]
+            uuid = global_profile.uuid
 
             # Save it to password store
             if not set_default_vpn_uuid(password_store, uuid):
@@ -109,21 +103,19 @@ def get_default_vpn(token: str = Depends(get_verify_token)):
 
             return VPNDefaultInfo(
                 uuid=uuid,
-                profile_id=global_profile["id"],
-                profile_name=global_profile["name"],
+                profile_id=global_profile.id,
+                profile_name=global_profile.name,
                 source="password_store (initialized)",
             )
 
         # UUID exists, try to find matching profile
-        config = load_vpn_profiles()
-        profiles = config.get("profiles", [])
-        profile = find_profile_by_uuid(profiles, uuid)
+        profile = get_profile_registry().get_by_uuid(uuid)
 
         if profile:
             return VPNDefaultInfo(
                 uuid=uuid,
-                profile_id=profile["id"],
-                profile_name=profile["name"],
+                profile_id=profile.id,
+                profile_name=profile.name,
                 source="password_store",
             )
         else:
@@ -151,33 +143,33 @@ def set_default_vpn(
     and the UUID is looked up from profiles.yaml. Updates the nm-uuid in password store.
     """
     try:
-        config = load_vpn_profiles()
-        profiles = config.get("profiles", [])
+        registry = get_profile_registry()
 
         target_uuid = None
+        profile_name: Optional[str] = None
 
         # Prefer profile_id if provided
         if request.profile_id:
-            profile = find_profile_by_id(profiles, request.profile_id)
+            profile = registry.get(request.profile_id)
             if not profile:
                 raise HTTPException(
                     status_code=404, detail=f"Profile '{request.profile_id}' not found"
                 )
 
-            if not profile.get("uuid"):
+            if not profile.uuid:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Profile '{request.profile_id}' does not have a UUID configured",
                 )
 
-            target_uuid = profile["uuid"]
-            profile_name = profile["name"]
+            target_uuid = profile.uuid
+            profile_name = profile.name
 
         elif request.uuid:
             target_uuid = request.uuid
             # Try to find profile by UUID for response info
-            profile = find_profile_by_uuid(profiles, request.uuid)
-            profile_name = profile["name"] if profile else None
+            profile = registry.get_by_uuid(request.uuid)
+            profile_name = profile.name if profile else None
 
         else:
             raise HTTPException(
@@ -207,71 +199,91 @@ def set_default_vpn(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/connect/default")
-def connect_vpn_default(token: str = Depends(get_verify_token)):
+async def run_connect(
+    uuid: str,
+    result: Dict[str, Any],
+    stream: bool,
+    format: Optional[str],
+    accept: Optional[str],
+):
     """
-    Connect to the default VPN using the vpn-connect script.
-
-    This calls vpn-connect without a UUID parameter, so the script will
-    fetch the default UUID from the password store.
+    Connect a VPN in-process and respond with the result or the progress.
+
+    Args:
+        uuid: NetworkManager connection UUID
+        result: Response body on success (without streaming)
+        stream: Stream the activation progress instead of waiting for it
+        format: Stream format ('ndjson' or 'sse')
+        accept: Accept header, used when format is not given
     """
-    try:
-        # Find the vpn-connect script (relative to this file)
-        current_file = Path(__file__).resolve()
-        project_root = current_file.parent.parent.parent  # src/api/routes -> src
-
-        script_paths = [
-            project_root / "vpn-connect",
-            Path.home() / "src" / "rh-otp-auto-connect" / "src" / "vpn-connect",
-            Path("/usr/local/bin/vpn-connect"),
-            Path("/usr/bin/vpn-connect"),
-        ]
+    events = connect_vpn(password_store, uuid)
+    if stream:
+        return event_stream(
+            events,
+            wants_sse(format, accept),
+            event_id=lambda event: event["seq"],
+            event_type=lambda event: event["stage"],
+        )
 
-        script_path = None
-        for path in script_paths:
-            if path.exists() and path.is_file():
-                script_path = path
-                break
+    done: Dict[str, Any] = {}
+    async for event in events:
+        done = event
+    if done.get("success"):
+        return result
+    if done.get("timeout"):
+        raise HTTPException(status_code=504, detail="Connection timeout")
+    raise HTTPException(
+        status_code=500, detail=f"Failed to connect: {done.get('error')}"
+    )
 
-        if not script_path:
-            raise HTTPException(status_code=404, detail="vpn-connect script not found")
 
-        # Execute the script without UUID parameter (uses default from password store)
-        result = subprocess.run(
-            [str(script_path)], capture_output=True, text=True, timeout=60
-        )
+@router.post("/connect/default")
+async def connect_vpn_default(
+    stream: bool = Query(default=False, description="Stream activation progress"),
+    format: Optional[str] = Query(
+        default=None,
+        pattern="^(ndjson|sse)$",
+        description="Stream format: 'ndjson' or 'sse' (default: from Accept)",
+    ),
+    accept: Optional[str] = Header(default=None),
+    token: str = Depends(get_verify_token),
+):
+    """
+    Connect to the default VPN.
 
-        if result.returncode == 0:
-            logger.info("Connected to default VPN")
-            return {
-                "success": True,
-                "message": "Connected to default VPN",
-                "method": "default",
-            }
-        else:
-            error_msg = result.stderr or result.stdout or "Connection failed"
-            logger.error(f"Default VPN connect failed: {error_msg}")
-            raise HTTPException(
-                status_code=500, detail=f"Failed to connect: {error_msg}"
-            )
+    The default UUID comes from the password store (initialized to the
+    GLOBAL profile, as for GET /vpn/default).
+    """
+    try:
+        default = await run_in_threadpool(get_default_vpn, token)
+        result = {
+            "success": True,
+            "message": "Connected to default VPN",
+            "method": "default",
+            "profile_id": default.profile_id,
+            "profile_name": default.profile_name,
+            "uuid": default.uuid,
+        }
+        return await run_connect(default.uuid, result, stream, format, accept)
 
-    except subprocess.TimeoutExpired:
-        logger.error("Default VPN connect timeout")
-        raise HTTPException(status_code=504, detail="Connection timeout")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error connecting to default VPN: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/connect/standard")
-def connect_vpn_standard(token: str = Depends(get_verify_token)):
+async def connect_vpn_standard(token: str = Depends(get_verify_token)):
     """
-    Connect to VPN using the standard vpn-connect script.
+    Connect to the default VPN.
 
     DEPRECATED: Use /vpn/connect/default instead.
     This endpoint is kept for backward compatibility.
     """
-    return connect_vpn_default(token)
+    return await connect_vpn_default(
+        stream=False, format=None, accept=None, token=token
+    )
 
 
 @router.post("/connect/shuttle")
@@ -301,8 +313,8 @@ def connect_vpn_shuttle(token: str = Depends(get_verify_token)):
             )
 
         # Execute the script
-        result = subprocess.run(
-            [str(script_path)], capture_output=True, text=True, timeout=60
+        result = process_supervisor.run(
+            [str(script_path)], timeout=60, name=script_path.name
         )
 
         if result.returncode == 0:
@@ -328,14 +340,27 @@ def connect_vpn_shuttle(token: str = Depends(get_verify_token)):
 
 
 @router.post("/connect/{profile_id}")
-def connect_vpn_profile(profile_id: str, token: str = Depends(get_verify_token)):
-    """Connect to a specific VPN profile using the vpn-connect script."""
-    try:
-        config = load_vpn_profiles()
-        profiles = config.get("profiles", [])
+async def connect_vpn_profile(
+    profile_id: str,
+    stream: bool = Query(default=False, description="Stream activation progress"),
+    format: Optional[str] = Query(
+        default=None,
+        pattern="^(ndjson|sse)$",
+        description="Stream format: 'ndjson' or 'sse' (default: from Accept)",
+    ),
+    accept: Optional[str] = Header(default=None),
+    token: str = Depends(get_verify_token),
+):
+    """
+    Connect to a specific VPN profile.
 
+    The associate password (PIN + OTP) is generated in-process and handed to
+    NetworkManager through a pipe. With `stream`, the activation progress is
+    sent as it happens and the final `done` event carries the outcome.
+    """
+    try:
         # Find profile by ID (case-insensitive)
-        target_profile = find_profile_by_id(profiles, profile_id)
+        target_profile = get_profile_registry().get(profile_id)
 
         if not target_profile:
             raise HTTPException(
@@ -343,8 +368,8 @@ def connect_vpn_profile(profile_id: str, token: str = Depends(get_verify_token))
             )
 
         # Get UUID from the profile
-        profile_uuid = target_profile.get("uuid")
-        profile_name = target_profile.get("name")
+        profile_uuid = target_profile.uuid
+        profile_name = target_profile.name
 
         if not profile_uuid:
             raise HTTPException(
@@ -352,57 +377,17 @@ def connect_vpn_profile(profile_id: str, token: str = Depends(get_verify_token))
                 detail=f"Profile '{profile_id}' does not have a UUID configured",
             )
 
-        # Find the vpn-connect script (relative to this file)
-        current_file = Path(__file__).resolve()
-        project_root = current_file.parent.parent.parent  # src/api/routes -> src
-
-        script_paths = [
-            project_root / "vpn-connect",
-            Path.home() / "src" / "rh-otp-auto-connect" / "src" / "vpn-connect",
-            Path("/usr/local/bin/vpn-connect"),
-            Path("/usr/bin/vpn-connect"),
-        ]
-
-        script_path = None
-        for path in script_paths:
-            if path.exists() and path.is_file():
-                script_path = path
-                break
-
-        if not script_path:
-            raise HTTPException(status_code=404, detail="vpn-connect script not found")
-
-        # Execute vpn-connect script with the UUID
-        result = subprocess.run(
-            [str(script_path), "--uuid", profile_uuid],
-            capture_output=True,
-            text=True,
-            timeout=60,
-        )
-
-        if result.returncode == 0:
-            logger.info(
-                f"Connected to VPN profile: {profile_name} (UUID: {profile_uuid})"
-            )
-            return {
-                "success": True,
-                "message": f"Connected to {profile_name}",
-                "profile_id": profile_id,
-                "profile_name": profile_name,
-                "uuid": profile_uuid,
-            }
-        else:
-            error_msg = result.stderr or result.stdout or "Connection failed"
-            logger.error(f"Failed to connect to VPN: {error_msg}")
-            raise HTTPException(
-                status_code=500, detail=f"Failed to connect: {error_msg}"
-            )
+        result = {
+            "success": True,
+            "message": f"Connected to {profile_name}",
+            "profile_id": profile_id,
+            "profile_name": profile_name,
+            "uuid": profile_uuid,
+        }
+        return await run_connect(profile_uuid, result, stream, format, accept)
 
     except HTTPException:
         raise
-    except subprocess.TimeoutExpired:
-        logger.error(f"VPN connect timeout for profile {profile_id}")
-        raise HTTPException(status_code=504, detail="Connection timeout")
     except Exception as e:
         logger.error(f"Error connecting to VPN: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -422,15 +407,16 @@ def disconnect_vpn(token: str = Depends(get_verify_token)):
                 "was_connected": False,
             }
 
-        # Disconnect using connection name
+        # Disconnect by UUID (names may be ambiguous)
         conn_name = status.get("profile_name")
-        if not conn_name:
+        conn_uuid = status.get("connection_uuid")
+        if not conn_uuid:
             raise HTTPException(
-                status_code=500, detail="Could not determine VPN connection name"
+                status_code=500, detail="Could not determine VPN connection UUID"
             )
 
         result = subprocess.run(
-            ["nmcli", "connection", "down", "id", str(conn_name)],
+            ["nmcli", "connection", "down", "uuid", str(conn_uuid)],
             capture_output=True,
             text=True,
         )
@@ -465,17 +451,11 @@ def get_vpn_status(token: str = Depends(get_verify_token)):
         # If connected, try to find matching profile
         profile_id = None
         if status.get("connected"):
-            config = load_vpn_profiles()
-            profiles = config.get("profiles", [])
-            conn_name = status.get("profile_name", "")
-
-            # Try to match by name or UUID
-            for profile in profiles:
-                if profile.get("name") == conn_name or profile.get(
-                    "uuid"
-                ) == status.get("connection_uuid"):
-                    profile_id = profile["id"]
-                    break
+            profile = get_profile_registry().match_connection(
+                status.get("profile_name"), status.get("connection_uuid")
+            )
+            if profile:
+                profile_id = profile.id
 
         return VPNStatus(
             connected=status.get("connected", False),
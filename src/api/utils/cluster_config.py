@@ -3,16 +3,38 @@ Cluster configuration management utilities.
 
 Provides CRUD operations for managing OpenShift cluster configurations
 in the rhtoken.json file.
+
+A single process-wide catalog (``cluster_catalog``) keeps the parsed file in
+memory, revalidates it against the file's mtime on access, and writes changes
+atomically (temp file, fsync, rename) under an exclusive file lock.
 """
 
+import copy
+import fcntl
 import json
 import logging
 import os
-from typing import Any, Dict, List, Optional, cast
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
+
+from api.utils.cluster_search import ClusterSearchIndex
 
 logger = logging.getLogger(__name__)
 
 
+CLUSTER_FIELDS = ("name", "description", "url")
+
+
+class BulkValidationError(ValueError):
+    """Raised when a bulk change set fails validation; nothing is applied."""
+
+    def __init__(self, message: str, results: List[Dict[str, Any]]):
+        super().__init__(message)
+        self.results = results
+
+
 class ClusterConfigManager:
     """Manages cluster configurations in rhtoken.json."""
 
@@ -30,25 +52,129 @@ class ClusterConfigManager:
             config_path = os.path.join(script_dir, "rhtoken.json")
 
         self.config_path = config_path
+        self.lock_path = config_path + ".lock"
+
+        # In-memory copy of the parsed file and the stat it was read from
+        self._lock = threading.RLock()
+        self._config: Optional[Dict[str, Any]] = None
+        self._stat_key: Optional[Tuple[int, int, int]] = None
+
+        # Bumped whenever the in-memory config changes (local write or reload)
+        self.generation = 0
+
+        # Search index and the generation it was built from; rebuilt under
+        # its own lock so catalog reads and writes do not wait for it
+        self._search_lock = threading.Lock()
+        self._search_index = ClusterSearchIndex()
+        self._search_generation = -1
+
+    @property
+    def etag(self) -> str:
+        """ETag for the current catalog contents."""
+        with self._lock:
+            self._load_config()
+            mtime_ns = self._stat_key[1] if self._stat_key else 0
+            return f'"{self.generation}-{mtime_ns}"'
+
+    def _file_stat_key(self) -> Tuple[int, int, int]:
+        st = os.stat(self.config_path)
+        return st.st_ino, st.st_mtime_ns, st.st_size
 
     def _load_config(self) -> Dict[str, Any]:
-        """Load the entire rhtoken.json configuration."""
-        try:
-            with open(self.config_path, "r") as f:
-                return cast(Dict[str, Any], json.load(f))
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Configuration file not found: {self.config_path}")
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON in configuration file: {e}")
+        """
+        Load the entire rhtoken.json configuration.
+
+        Returns the cached copy unless the file changed on disk. The returned
+        dict is shared and must not be mutated by callers.
+        """
+        with self._lock:
+            try:
+                stat_key = self._file_stat_key()
+            except FileNotFoundError:
+                raise FileNotFoundError(
+                    f"Configuration file not found: {self.config_path}"
+                )
+
+            if self._config is not None and stat_key == self._stat_key:
+                return self._config
+
+            try:
+                with open(self.config_path, "r") as f:
+                    config = cast(Dict[str, Any], json.load(f))
+            except FileNotFoundError:
+                raise FileNotFoundError(
+                    f"Configuration file not found: {self.config_path}"
+                )
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON in configuration file: {e}")
+
+            self._config = config
+            self._stat_key = stat_key
+            self.generation += 1
+            logger.debug(f"Loaded cluster configuration (generation {self.generation})")
+            return config
 
     def _save_config(self, config: Dict[str, Any]) -> None:
-        """Save configuration to rhtoken.json."""
+        """
+        Save configuration to rhtoken.json atomically.
+
+        Must be called while holding the file lock (see _transaction).
+        """
+        directory = os.path.dirname(self.config_path) or "."
+        tmp_path = None
         try:
-            with open(self.config_path, "w") as f:
+            fd, tmp_path = tempfile.mkstemp(
+                prefix=".rhtoken.", suffix=".tmp", dir=directory
+            )
+            with os.fdopen(fd, "w") as f:
                 json.dump(config, f, indent=2)
                 f.write("\n")  # Add trailing newline
+                f.flush()
+                os.fsync(f.fileno())
+
+            # Keep the permissions of the file being replaced
+            try:
+                os.chmod(tmp_path, os.stat(self.config_path).st_mode & 0o777)
+            except FileNotFoundError:
+                pass
+
+            os.replace(tmp_path, self.config_path)
+            tmp_path = None
+
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
         except Exception as e:
             raise IOError(f"Failed to save configuration: {e}")
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+        self._config = config
+        self._stat_key = self._file_stat_key()
+        self.generation += 1
+
+    @contextmanager
+    def _transaction(self) -> Iterator[Dict[str, Any]]:
+        """
+        Read-modify-write the configuration under an exclusive lock.
+
+        Yields a private copy of the freshly revalidated configuration; it is
+        written back atomically if the block completes without raising and
+        actually changed it.
+        """
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                current = self._load_config()
+                config = copy.deepcopy(current)
+                yield config
+                if config != current:
+                    self._save_config(config)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
 
     def list_clusters(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -73,35 +199,42 @@ class ClusterConfigManager:
         clusters = self.list_clusters()
         return clusters.get(cluster_id)
 
-    def search_clusters(self, query: str) -> Dict[str, Dict[str, Any]]:
+    def search_clusters(
+        self, query: str, limit: Optional[int] = None
+    ) -> Dict[str, Dict[str, Any]]:
         """
-        Search clusters by name, description, or URL.
+        Search clusters by ID, name, description, or URL.
+
+        Uses the search index, which is rebuilt whenever the catalog changes.
+        Matches exact tokens, prefixes, substrings and near misses.
 
         Args:
             query: Search string (case-insensitive)
+            limit: Maximum number of results (optional)
 
         Returns:
-            Dictionary of matching cluster ID -> cluster configuration
+            Dictionary of matching cluster ID -> cluster configuration,
+            ordered by descending relevance
         """
-        clusters = self.list_clusters()
-        query_lower = query.lower()
-        results = {}
-
-        for cluster_id, cluster_data in clusters.items():
-            # Search in cluster ID, name, description, and URL
-            searchable_text = " ".join(
-                [
-                    cluster_id,
-                    cluster_data.get("name", ""),
-                    cluster_data.get("description", ""),
-                    cluster_data.get("url", ""),
-                ]
-            ).lower()
-
-            if query_lower in searchable_text:
-                results[cluster_id] = cluster_data
-
-        return results
+        with self._lock:
+            clusters = self.list_clusters()
+            generation = self.generation
+
+        with self._search_lock:
+            if self._search_generation < generation:
+                # The loaded config is replaced, never mutated, on change
+                self._search_index = ClusterSearchIndex(clusters)
+                self._search_generation = generation
+            index = self._search_index
+
+        results = index.search(query, limit)
+
+        # A concurrent search may have indexed a newer catalog meanwhile
+        return {
+            cluster_id: clusters[cluster_id]
+            for cluster_id, _ in results
+            if cluster_id in clusters
+        }
 
     def add_cluster(
         self, cluster_id: str, name: str, url: str, description: str = ""
@@ -121,17 +254,14 @@ class ClusterConfigManager:
         Raises:
             ValueError: If cluster_id already exists
         """
-        config = self._load_config()
-        clusters = config.get("clusters", {})
+        with self._transaction() as config:
+            clusters = config.setdefault("clusters", {})
 
-        if cluster_id in clusters:
-            raise ValueError(f"Cluster '{cluster_id}' already exists")
+            if cluster_id in clusters:
+                raise ValueError(f"Cluster '{cluster_id}' already exists")
 
-        new_cluster = {"name": name, "description": description, "url": url}
-
-        clusters[cluster_id] = new_cluster
-        config["clusters"] = clusters
-        self._save_config(config)
+            new_cluster = {"name": name, "description": description, "url": url}
+            clusters[cluster_id] = new_cluster
 
         logger.info(f"Added new cluster: {cluster_id} - {name}")
         return new_cluster
@@ -158,24 +288,21 @@ class ClusterConfigManager:
         Raises:
             ValueError: If cluster_id does not exist
         """
-        config = self._load_config()
-        clusters = config.get("clusters", {})
-
-        if cluster_id not in clusters:
-            raise ValueError(f"Cluster '{cluster_id}' not found")
+        with self._transaction() as config:
+            clusters = config.setdefault("clusters", {})
 
-        cluster = clusters[cluster_id]
+            if cluster_id not in clusters:
+                raise ValueError(f"Cluster '{cluster_id}' not found")
 
-        # Update only provided fields
-        if name is not None:
-            cluster["name"] = name
-        if url is not None:
-            cluster["url"] = url
-        if description is not None:
-            cluster["description"] = description
+            cluster = clusters[cluster_id]
 
-        config["clusters"] = clusters
-        self._save_config(config)
+            # Update only provided fields
+            if name is not None:
+                cluster["name"] = name
+            if url is not None:
+                cluster["url"] = url
+            if description is not None:
+                cluster["description"] = description
 
         logger.info(f"Updated cluster: {cluster_id}")
         return cast(Dict[str, Any], cluster)
@@ -193,15 +320,106 @@ class ClusterConfigManager:
         Raises:
             ValueError: If cluster_id does not exist
         """
-        config = self._load_config()
-        clusters = config.get("clusters", {})
+        with self._transaction() as config:
+            clusters = config.setdefault("clusters", {})
 
-        if cluster_id not in clusters:
-            raise ValueError(f"Cluster '{cluster_id}' not found")
+            if cluster_id not in clusters:
+                raise ValueError(f"Cluster '{cluster_id}' not found")
 
-        deleted_cluster = clusters.pop(cluster_id)
-        config["clusters"] = clusters
-        self._save_config(config)
+            deleted_cluster = clusters.pop(cluster_id)
 
         logger.info(f"Deleted cluster: {cluster_id}")
         return cast(Dict[str, Any], deleted_cluster)
+
+    def bulk_update(
+        self,
+        upserts: Optional[List[Dict[str, Any]]] = None,
+        deletes: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply a batch of upserts and deletes in one transaction.
+
+        The whole batch is validated first; if any item is invalid nothing is
+        applied. Otherwise all changes are written with a single atomic write.
+
+        Args:
+            upserts: Cluster dicts with cluster_id, name, url and optional
+                description; existing clusters are replaced
+            deletes: Cluster IDs to delete
+
+        Returns:
+            Per-item results with cluster_id, operation and status
+            (created, updated, unchanged or deleted)
+
+        Raises:
+            BulkValidationError: If any item is invalid; carries per-item
+                results with an error for each failing item
+        """
+        upserts = upserts or []
+        deletes = deletes or []
+
+        with self._transaction() as config:
+            clusters = config.setdefault("clusters", {})
+            results: List[Dict[str, Any]] = []
+            seen: Dict[str, str] = {}
+            failed = False
+
+            for item in upserts:
+                cluster_id = item.get("cluster_id", "")
+                result = {"cluster_id": cluster_id, "operation": "upsert"}
+                missing = [f for f in ("name", "url") if not item.get(f)]
+                if not cluster_id:
+                    result["error"] = "cluster_id is required"
+                elif cluster_id in seen:
+                    result["error"] = f"Duplicate cluster_id in {seen[cluster_id]}s"
+                elif missing:
+                    result["error"] = f"Missing required fields: {', '.join(missing)}"
+                else:
+                    new_cluster = {
+                        "name": item["name"],
+                        "description": item.get("description") or "",
+                        "url": item["url"],
+                    }
+                    existing = clusters.get(cluster_id)
+                    if existing is None:
+                        result["status"] = "created"
+                    elif all(existing.get(f) == new_cluster[f] for f in CLUSTER_FIELDS):
+                        result["status"] = "unchanged"
+                    else:
+                        result["status"] = "updated"
+                    clusters[cluster_id] = new_cluster
+                if cluster_id:
+                    seen.setdefault(cluster_id, "upsert")
+                failed = failed or "error" in result
+                results.append(result)
+
+            for cluster_id in deletes:
+                result = {"cluster_id": cluster_id, "operation": "delete"}
+                if cluster_id in seen:
+                    result["error"] = f"Duplicate cluster_id in {seen[cluster_id]}s"
+                elif cluster_id not in clusters:
+                    result["error"] = f"Cluster '{cluster_id}' not found"
+                else:
+                    clusters.pop(cluster_id)
+                    result["status"] = "deleted"
+                seen.setdefault(cluster_id, "delete")
+                failed = failed or "error" in result
+                results.append(result)
+
+            if failed:
+                for result in results:
+                    if "error" in result:
+                        result["status"] = "error"
+                    else:
+                        result["status"] = "skipped"
+                raise BulkValidationError(
+                    "Bulk change set failed validation; no changes applied", results
+                )
+
+        changed = sum(1 for r in results if r["status"] != "unchanged")
+        logger.info(f"Applied bulk change set: {changed} of {len(results)} changed")
+        return results
+
+
+# Global instance shared by all routes
+cluster_catalog = ClusterConfigManager()
@@ -0,0 +1,407 @@
+"""
+Search index for the cluster catalog.
+
+Builds token and trigram postings over cluster ID, name, description and
+URL so interactive searches (GNOME menu, CLI) do not rescan every cluster.
+Supports exact, prefix, substring and fuzzy token matches with relevance
+ranking.
+"""
+
+import heapq
+import math
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from itertools import chain, product
+from typing import AbstractSet, Any, Dict, List, Optional, Set, Tuple
+
+# Relative weight of a match in each field
+FIELD_WEIGHTS = {"id": 4.0, "name": 3.0, "description": 2.0, "url": 1.0}
+
+# Multiplier for each kind of token match
+EXACT_MATCH = 3.0
+PREFIX_MATCH = 2.0
+SUBSTRING_MATCH = 1.5
+FUZZY_MATCH = 1.0
+
+# Minimum share of query trigrams a token must contain to count as fuzzy match
+FUZZY_THRESHOLD = 0.6
+
+# Upper bound on per-token level combinations scored with set operations
+MAX_LEVEL_COMBINATIONS = 512
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Sorts after every token character, bounding prefix ranges in the vocabulary
+_PREFIX_END = "{"
+
+_EMPTY: AbstractSet[Any] = frozenset()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def trigrams(token: str) -> Set[str]:
+    """Return the set of character trigrams of a token."""
+    return {token[i : i + 3] for i in range(len(token) - 2)}
+
+
+def bigrams(token: str) -> Set[str]:
+    """
+    Return the character bigrams of a token after its first character.
+
+    The last character is included on its own, so every character after the
+    first starts one of the returned grams.
+    """
+    return {token[i : i + 2] for i in range(1, len(token))}
+
+
+class ClusterSearchIndex:
+    """Inverted index over cluster configurations."""
+
+    def __init__(self, clusters: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Initialize the index.
+
+        Args:
+            clusters: Optional cluster ID -> configuration mapping to index
+        """
+        self._ids: List[str] = []
+        # token -> {field weight: docs where that is the token's best field}
+        self._postings: Dict[str, Dict[float, Set[int]]] = {}
+        # trigram -> tokens containing it
+        self._trigrams: Dict[str, Set[str]] = {}
+        # bigram -> tokens containing it after their start, for queries too
+        # short for trigrams
+        self._bigrams: Dict[str, Set[str]] = {}
+        # field weight -> (sorted tokens with docs at that weight, their docs)
+        self._columns: Dict[float, Tuple[List[str], List[AbstractSet[int]]]] = {}
+
+        if clusters is not None:
+            self.build(clusters)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def build(self, clusters: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Rebuild all postings from the given clusters.
+
+        Args:
+            clusters: Cluster ID -> configuration mapping
+        """
+        best: Dict[str, Dict[int, float]] = defaultdict(dict)
+
+        # Number documents in ID order so ties can be broken by doc number
+        ids = sorted(clusters)
+        for doc, cluster_id in enumerate(ids):
+            cluster = clusters[cluster_id]
+            fields = {
+                "id": cluster_id,
+                "name": cluster.get("name", ""),
+                "description": cluster.get("description", ""),
+                "url": cluster.get("url", ""),
+            }
+            for field_name, text in fields.items():
+                weight = FIELD_WEIGHTS[field_name]
+                for token in tokenize(text):
+                    docs = best[token]
+                    if docs.get(doc, 0.0) < weight:
+                        docs[doc] = weight
+
+        postings: Dict[str, Dict[float, Set[int]]] = {}
+        trigram_index: Dict[str, Set[str]] = defaultdict(set)
+        bigram_index: Dict[str, Set[str]] = defaultdict(set)
+        for token, docs in best.items():
+            by_weight: Dict[float, Set[int]] = defaultdict(set)
+            for doc, weight in docs.items():
+                by_weight[weight].add(doc)
+            postings[token] = dict(by_weight)
+            for gram in trigrams(token):
+                trigram_index[gram].add(token)
+            for gram in bigrams(token):
+                bigram_index[gram].add(token)
+
+        vocabulary = sorted(postings)
+        columns: Dict[float, Tuple[List[str], List[AbstractSet[int]]]] = {}
+        for weight in set(FIELD_WEIGHTS.values()):
+            tokens = [token for token in vocabulary if weight in postings[token]]
+            columns[weight] = (tokens, [postings[token][weight] for token in tokens])
+
+        self._ids = ids
+        self._postings = postings
+        self._trigrams = dict(trigram_index)
+        self._bigrams = dict(bigram_index)
+        self._columns = columns
+
+    def _substring_tokens(self, query_token: str) -> List[str]:
+        """Find vocabulary tokens containing a query token after their start."""
+        if len(query_token) >= 3:
+            # Such tokens contain every query trigram
+            gram_sets = sorted(
+                (self._trigrams.get(gram, _EMPTY) for gram in trigrams(query_token)),
+                key=len,
+            )
+            candidates: AbstractSet[str] = frozenset(gram_sets[0]).intersection(
+                *gram_sets[1:]
+            )
+            return [
+                token
+                for token in candidates
+                if query_token in token and not token.startswith(query_token)
+            ]
+
+        # Too short for trigrams: a single character starts one of the bigrams
+        if len(query_token) == 2:
+            candidates = self._bigrams.get(query_token, _EMPTY)
+        else:
+            candidates = frozenset().union(
+                *(
+                    tokens
+                    for gram, tokens in self._bigrams.items()
+                    if gram[0] == query_token
+                )
+            )
+        return [token for token in candidates if not token.startswith(query_token)]
+
+    def _fuzzy_tokens(self, query_token: str) -> Dict[str, float]:
+        """
+        Find vocabulary tokens sharing most trigrams of a query token.
+
+        Returns:
+            Matching token -> match multiplier
+        """
+        query_grams = trigrams(query_token)
+        gram_sets: List[AbstractSet[str]] = sorted(
+            (self._trigrams.get(gram, _EMPTY) for gram in query_grams), key=len
+        )
+
+        # A token sharing at least `required` trigrams must contain one of the
+        # rarest (needed - required + 1), so only count those candidates
+        needed = len(query_grams)
+        required = math.ceil(FUZZY_THRESHOLD * needed)
+        candidates = set().union(*gram_sets[: needed - required + 1])
+        counts = Counter(chain.from_iterable(grams & candidates for grams in gram_sets))
+        matches = {}
+        for token, shared in counts.items():
+            if shared >= required:
+                # Penalise large length differences
+                ratio = min(len(token), len(query_token)) / max(
+                    len(token), len(query_token)
+                )
+                matches[token] = FUZZY_MATCH * (shared / needed) * ratio
+
+        return matches
+
+    def _prefix_groups(self, query_token: str) -> Dict[float, List[AbstractSet[int]]]:
+        """
+        Group postings of tokens equal to or starting with a query token by score.
+
+        Returns:
+            Score -> posting sets mapping (sets may overlap)
+        """
+        grouped: Dict[float, List[AbstractSet[int]]] = defaultdict(list)
+
+        exact = self._postings.get(query_token)
+        if exact is not None:
+            for weight, docs in exact.items():
+                grouped[weight * EXACT_MATCH].append(docs)
+
+        # Prefix matches are a contiguous slice of each weight's sorted tokens,
+        # so their postings can be unioned per weight without a Python loop
+        upper = query_token + _PREFIX_END
+        for weight, (tokens, column) in self._columns.items():
+            start = bisect_left(tokens, query_token)
+            end = bisect_left(tokens, upper, start)
+            if start < end and tokens[start] == query_token:
+                start += 1
+            if start < end:
+                grouped[weight * PREFIX_MATCH].extend(column[start:end])
+
+        return grouped
+
+    def _substring_groups(
+        self, query_token: str, grouped: Dict[float, List[AbstractSet[int]]]
+    ) -> Dict[float, List[AbstractSet[int]]]:
+        """
+        Extend prefix groups with substring matches of a query token.
+
+        Fuzzy matches are only considered when no token contains it.
+
+        Returns:
+            New score -> posting sets mapping; ``grouped`` is left unchanged
+        """
+        extended: Dict[float, List[AbstractSet[int]]] = defaultdict(list)
+        for score, sets in grouped.items():
+            extended[score].extend(sets)
+
+        substrings = self._substring_tokens(query_token)
+        for token in substrings:
+            for weight, docs in self._postings[token].items():
+                extended[weight * SUBSTRING_MATCH].append(docs)
+
+        if not grouped and not substrings and len(query_token) >= 3:
+            for token, multiplier in self._fuzzy_tokens(query_token).items():
+                for weight, docs in self._postings[token].items():
+                    extended[weight * multiplier].append(docs)
+
+        return extended
+
+    @staticmethod
+    def _score_levels(
+        grouped: Dict[float, List[AbstractSet[int]]], limit: Optional[int] = None
+    ) -> List[Tuple[float, AbstractSet[int]]]:
+        """
+        Turn grouped postings into levels of documents by their best score.
+
+        Args:
+            grouped: Score -> posting sets mapping for one query token
+            limit: Stop once this many documents are covered; only valid when
+                the levels are not intersected with another token's
+
+        Returns:
+            (score, docs) pairs ordered by descending score; each document
+            appears only at its highest level
+        """
+        # Posting sets are shared with the index, so never mutate them here
+        levels: List[Tuple[float, AbstractSet[int]]] = []
+        covered: AbstractSet[int] = _EMPTY
+        scores = sorted(grouped, reverse=True)
+        for position, score in enumerate(scores, 1):
+            if limit is not None and len(covered) >= limit:
+                break
+            sets = grouped[score]
+            level: AbstractSet[int] = (
+                sets[0] if len(sets) == 1 else frozenset().union(*sets)
+            )
+            if covered:
+                level = level - covered
+            if level:
+                levels.append((score, level))
+                if position < len(scores):
+                    covered = level | covered if covered else level
+        return levels
+
+    def _combined_levels(
+        self, token_levels: List[List[Tuple[float, AbstractSet[int]]]]
+    ) -> List[Tuple[float, AbstractSet[int]]]:
+        """
+        Combine per-token levels into (total score, docs) groups.
+
+        Intersects one level per query token at a time, so the work is in set
+        operations rather than per-document loops.
+        """
+        if len(token_levels) == 1:
+            return token_levels[0]
+
+        combinations = 1
+        for levels in token_levels:
+            combinations *= len(levels)
+
+        grouped: Dict[float, List[AbstractSet[int]]] = defaultdict(list)
+        if combinations <= MAX_LEVEL_COMBINATIONS:
+            for combo in product(*token_levels):
+                sets = sorted((docs for _, docs in combo), key=len)
+                docs = sets[0]
+                for other in sets[1:]:
+                    docs = docs & other
+                if docs:
+                    grouped[sum(score for score, _ in combo)].append(docs)
+        else:
+            # Too many distinct levels (e.g. fuzzy matches): score per document
+            scores: Dict[int, float] = {}
+            for position, levels in enumerate(token_levels):
+                token_scores = {doc: score for score, docs in levels for doc in docs}
+                if position == 0:
+                    scores = token_scores
+                else:
+                    scores = {
+                        doc: score + token_scores[doc]
+                        for doc, score in scores.items()
+                        if doc in token_scores
+                    }
+            by_score: Dict[float, Set[int]] = defaultdict(set)
+            for doc, score in scores.items():
+                by_score[score].add(doc)
+            for score, docs in by_score.items():
+                grouped[score].append(docs)
+
+        return [
+            (score, sets[0] if len(sets) == 1 else frozenset().union(*sets))
+            for score, sets in sorted(grouped.items(), reverse=True)
+        ]
+
+    def _rank(
+        self,
+        docs: AbstractSet[int],
+        score: float,
+        limit: Optional[int],
+        results: List[Tuple[str, float]],
+        ranked_docs: Set[int],
+    ) -> bool:
+        """
+        Append one score level to the results in cluster ID order.
+
+        Returns:
+            True once the results hold ``limit`` entries
+        """
+        if limit is None:
+            ranked = sorted(docs)
+        else:
+            ranked = heapq.nsmallest(limit - len(results), docs)
+        # Documents are numbered in cluster ID order
+        results.extend((self._ids[doc], score) for doc in ranked)
+        ranked_docs.update(ranked)
+        return limit is not None and len(results) >= limit
+
+    def search(
+        self, query: str, limit: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Search the index.
+
+        Every query token must match (exactly, by prefix, as a substring or
+        fuzzily) in at least one field of a cluster for it to be returned.
+        Clusters matching every token exactly or by prefix come first.
+
+        Args:
+            query: Search string (case-insensitive)
+            limit: Maximum number of results
+
+        Returns:
+            List of (cluster ID, score) ordered by match tier, then by
+            descending score, ties broken by cluster ID
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        # Clusters matching every token exactly or by prefix rank first;
+        # substring and fuzzy matches only fill the places left over, so the
+        # costlier substring scan is skipped when the limit is already met
+        single = limit if len(query_tokens) == 1 else None
+        prefix_groups = [self._prefix_groups(token) for token in query_tokens]
+        results: List[Tuple[str, float]] = []
+        ranked_docs: Set[int] = set()
+        if all(prefix_groups):
+            token_levels = [self._score_levels(g, single) for g in prefix_groups]
+            for score, docs in self._combined_levels(token_levels):
+                if self._rank(docs, score, limit, results, ranked_docs):
+                    return results
+
+        token_levels = [
+            self._score_levels(self._substring_groups(token, grouped), single)
+            for token, grouped in zip(query_tokens, prefix_groups)
+        ]
+        if not all(token_levels):
+            return results
+
+        for score, docs in self._combined_levels(token_levels):
+            if ranked_docs:
+                docs = docs - ranked_docs
+            if self._rank(docs, score, limit, results, ranked_docs):
+                break
+
+        return results
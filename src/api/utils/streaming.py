@@ -0,0 +1,47 @@
+"""Streaming responses for progress and event endpoints."""
+
+import json
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from fastapi.responses import StreamingResponse
+
+
+def wants_sse(format: Optional[str], accept: Optional[str]) -> bool:
+    """Whether to stream server-sent events rather than NDJSON."""
+    if format is not None:
+        return format == "sse"
+    return "text/event-stream" in (accept or "")
+
+
+def event_stream(
+    events: AsyncIterator[Optional[Dict[str, Any]]],
+    sse: bool,
+    event_id: Callable[[Dict[str, Any]], Any],
+    event_type: Callable[[Dict[str, Any]], str],
+) -> StreamingResponse:
+    """
+    Stream events as NDJSON or server-sent events.
+
+    `events` yields None when idle, which becomes an SSE keep-alive comment.
+    """
+
+    async def body() -> AsyncIterator[bytes]:
+        async for event in events:
+            if event is None:
+                if sse:
+                    yield b": keep-alive\n\n"
+                continue
+            data = json.dumps(event)
+            if sse:
+                yield f"id: {event_id(event)}\nevent: {event_type(event)}\n".encode()
+                yield f"data: {data}\n\n".encode()
+            else:
+                yield data.encode() + b"\n"
+
+    if sse:
+        return StreamingResponse(
+            body(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache"},
+        )
+    return StreamingResponse(body(), media_type="application/x-ndjson")
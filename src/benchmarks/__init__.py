@@ -0,0 +1 @@
+"""Micro-benchmarks for service internals."""
@@ -0,0 +1,98 @@
+"""
+Benchmark namespace listing through the bonfire CLI and the bonfire worker.
+
+Runs `bonfire namespace list` against the ephemeral cluster, so it needs
+bonfire installed and a valid service kubeconfig (any ephemeral endpoint
+call creates one). Without them it prints a skip notice and exits 0.
+
+Usage (from src/):
+    python -m benchmarks.bonfire_list [--repeat 10] [--kubeconfig PATH]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from services.bonfire import BonfireWorker, BonfireWorkerError, parse_namespace_list
+from services.ephemeral import EPHEMERAL_CLUSTER_ID, bonfire_path, run_command
+from services.kubeconfig import service_kubeconfigs
+
+
+async def timed(func: Callable[[], Awaitable[int]], repeat: int) -> List[float]:
+    """Return wall time of each call in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+class BonfireUnavailable(Exception):
+    """Raised when bonfire or the ephemeral cluster login is unavailable."""
+
+
+def report(label: str, times: List[float], namespaces: int) -> None:
+    warm = times[1:] or times
+    print(
+        f"{label:<8} {namespaces:>11} {times[0]:>11.0f} "
+        f"{statistics.median(warm):>12.0f} {min(warm):>10.0f}"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    for path in (args.bonfire, args.kubeconfig):
+        if not os.path.exists(path):
+            raise BonfireUnavailable(f"{path} does not exist")
+
+    counts: Dict[str, int] = {}
+
+    async def cli() -> int:
+        success, stdout, stderr = await run_command(
+            [args.bonfire, "namespace", "list"], kubeconfig=args.kubeconfig
+        )
+        if not success:
+            raise BonfireUnavailable(f"bonfire namespace list failed: {stderr}")
+        counts["cli"] = len(parse_namespace_list(stdout).reservations)
+        return counts["cli"]
+
+    worker = BonfireWorker()
+
+    async def in_worker() -> int:
+        data = await worker.request("list", args.bonfire, args.kubeconfig, 60.0)
+        counts["worker"] = len(data)
+        return counts["worker"]
+
+    cli_times = await timed(cli, args.repeat)
+    try:
+        worker_times = await timed(in_worker, args.repeat)
+    finally:
+        await worker.close()
+
+    print(f"{'Path':<8} {'Namespaces':>11} {'First (ms)':>11}", end="")
+    print(f" {'Median (ms)':>12} {'Min (ms)':>10}")
+    print("=" * 56)
+    report("cli", cli_times, counts["cli"])
+    report("worker", worker_times, counts["worker"])
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--bonfire", default=bonfire_path())
+    parser.add_argument(
+        "--kubeconfig", default=service_kubeconfigs.config_path(EPHEMERAL_CLUSTER_ID)
+    )
+    args = parser.parse_args()
+
+    try:
+        await run(args)
+    except (BonfireUnavailable, BonfireWorkerError) as e:
+        print(f"skipped: bonfire/cluster login unavailable ({e})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
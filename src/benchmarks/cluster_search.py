@@ -0,0 +1,100 @@
+"""
+Benchmark cluster search against a synthetic 10k-cluster catalog.
+
+Usage (from src/):
+    python -m benchmarks.cluster_search [--clusters 10000] [--repeat 200]
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Dict, List
+
+from api.utils.cluster_search import ClusterSearchIndex
+
+REGIONS = ["ue1", "ue2", "uw2", "ew1", "ec1", "as1", "ap2", "sa1"]
+KINDS = ["crcp", "crcs", "appsrep", "appsres", "stone-prod", "stone-stg", "crc-eph"]
+TEAMS = ["Insights", "Console", "Platform", "Storage", "Networking", "Billing"]
+STAGES = ["Production", "Stage", "Integration", "Ephemeral", "Performance"]
+
+QUERIES = [
+    "prod",
+    "stage insights",
+    "crcp05ue1",
+    "appsrep",
+    "stone prod",
+    "ephemral",
+    "01",
+    "p1.openshiftapps",
+    "xyz-not-there",
+]
+
+
+def synthetic_catalog(count: int, seed: int = 42) -> Dict[str, Dict[str, Any]]:
+    """Generate a catalog that resembles rhtoken.json at scale."""
+    rng = random.Random(seed)
+    clusters = {}
+    for i in range(count):
+        kind = rng.choice(KINDS)
+        host = f"{kind}{i:02d}{rng.choice(REGIONS)}"
+        shard = "".join(
+            rng.choice("abcdefghijklmnopqrstuvwxyz0123456789") for _ in range(4)
+        )
+        stage = rng.choice(STAGES)
+        team = rng.choice(TEAMS)
+        clusters[f"c{i}"] = {
+            "name": f"{team} {stage} {i}",
+            "description": f"{stage} {host.upper()} for {team}",
+            "url": f"https://oauth-openshift.apps.{host}.{shard}.p1.openshiftapps.com/oauth/token/request",
+        }
+    return clusters
+
+
+def linear_search(clusters: Dict[str, Dict[str, Any]], query: str) -> List[str]:
+    """The previous implementation: substring test over concatenated fields."""
+    query_lower = query.lower()
+    return [
+        cluster_id
+        for cluster_id, data in clusters.items()
+        if query_lower
+        in " ".join(
+            [cluster_id, data["name"], data["description"], data["url"]]
+        ).lower()
+    ]
+
+
+def timed(func, repeat: int) -> float:
+    """Return mean wall time per call in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clusters", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    clusters = synthetic_catalog(args.clusters)
+
+    start = time.perf_counter()
+    index = ClusterSearchIndex(clusters)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"Indexed {len(index)} clusters in {build_ms:.1f} ms\n")
+
+    print(f"{'Query':<20} {'Hits':>6} {'Indexed (ms)':>14} {'Linear (ms)':>13}")
+    print("=" * 56)
+    for query in QUERIES:
+        hits = len(index.search(query))
+        indexed = timed(lambda: index.search(query, args.limit), args.repeat)
+        linear = timed(
+            lambda: linear_search(clusters, query), max(args.repeat // 20, 1)
+        )
+        print(f"{query:<20} {hits:>6} {indexed:>14.3f} {linear:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
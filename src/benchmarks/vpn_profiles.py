@@ -0,0 +1,152 @@
+"""
+Benchmark VPN profile lookups against a synthetic 5k-profile profiles.yaml.
+
+Compares the profile registry with scanning the raw YAML profile list (as
+the VPN routes did) for lookups by ID and UUID and for matching an active
+connection, and reports the cost of loading the file into a registry.
+
+Usage (from src/):
+    python -m benchmarks.vpn_profiles [--profiles 5000] [--repeat 2000]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from services.vpn_profiles import ProfileStore
+
+DEFAULT_SETTINGS = {
+    "auth": "SHA256",
+    "ca": "{{project_dir}}/vpn-profiles/certs/ca-bundle.crt",
+    "cipher": "AES-256-CBC",
+    "connection_type": "password",
+    "port": 443,
+    "proto_tcp": True,
+    "tunnel_mtu": 1360,
+    "dns_search": "~.;redhat.com;",
+    "route_table": 75,
+}
+
+
+def synthetic_config(count: int, seed: int = 42) -> Dict[str, Any]:
+    """Generate profiles.yaml content that resembles the real file at scale."""
+    rng = random.Random(seed)
+    profiles = []
+    for i in range(count):
+        site = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(3))
+        profile: Dict[str, Any] = {
+            "id": f"{site}{i}",
+            "name": f"Site {site} ({site}{i})",
+            "remote": f"ovpn-{site.lower()}{i}.redhat.com",
+            "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+        }
+        if rng.random() < 0.2:
+            profile["remote"] += ":443:udp"
+            profile["proto_tcp"] = False
+        profiles.append(profile)
+    return {"default_settings": DEFAULT_SETTINGS, "profiles": profiles}
+
+
+def find_by_id(profiles: List[Dict[str, Any]], profile_id: str) -> Optional[dict]:
+    """The previous ID lookup: upper-case every ID on every call."""
+    for profile in profiles:
+        if profile["id"].upper() == profile_id.upper():
+            return profile
+    return None
+
+
+def find_by_uuid(profiles: List[Dict[str, Any]], uuid: str) -> Optional[dict]:
+    """The previous UUID lookup."""
+    for profile in profiles:
+        if profile.get("uuid") == uuid:
+            return profile
+    return None
+
+
+def match_connection(
+    profiles: List[Dict[str, Any]], name: str, uuid: str
+) -> Optional[dict]:
+    """The previous /vpn/status matching loop."""
+    for profile in profiles:
+        if profile.get("name") == name or profile.get("uuid") == uuid:
+            return profile
+    return None
+
+
+def timed(func, repeat: int) -> float:
+    """Return mean wall time per call in microseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profiles", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    config = synthetic_config(args.profiles)
+    raw = config["profiles"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "profiles.yaml"
+        path.write_text(yaml.safe_dump(config))
+        store = ProfileStore(path)
+
+        start = time.perf_counter()
+        registry = store.load(use_cache=False)[1]
+        load_ms = (time.perf_counter() - start) * 1000
+        cached = timed(store.registry, args.repeat)
+
+        tracemalloc.start()
+        store.load(use_cache=False)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"Loaded {len(registry)} profiles in {load_ms:.1f} ms")
+    print(f"(peak {peak / 1e6:.1f} MB while loading, {cached:.1f} us when unchanged)\n")
+
+    # Lookups near the end of the file, where scans are slowest
+    target = raw[-1]
+    lookups = [
+        (
+            "by id",
+            lambda: registry.get(target["id"].lower()),
+            lambda: find_by_id(raw, target["id"].lower()),
+        ),
+        (
+            "by uuid",
+            lambda: registry.get_by_uuid(target["uuid"]),
+            lambda: find_by_uuid(raw, target["uuid"]),
+        ),
+        (
+            "match connection",
+            lambda: registry.match_connection(target["name"], target["uuid"]),
+            lambda: match_connection(raw, target["name"], target["uuid"]),
+        ),
+        (
+            "miss by id",
+            lambda: registry.get("NOT-THERE"),
+            lambda: find_by_id(raw, "NOT-THERE"),
+        ),
+    ]
+
+    print(f"{'Lookup':<20} {'Registry (us)':>14} {'Scan (us)':>12}")
+    print("=" * 48)
+    for name, indexed, scan in lookups:
+        indexed_us = timed(indexed, args.repeat)
+        scan_us = timed(scan, max(args.repeat // 20, 1))
+        print(f"{name:<20} {indexed_us:>14.2f} {scan_us:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
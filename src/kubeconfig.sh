@@ -1,6 +1,9 @@
 #!/usr/bin/bash 
 
-cat > "$HOME/.kube/config" <<EOF
+# Only create an empty default config; never clobber an existing one
+if [[ ! -s "$HOME/.kube/config" ]]; then
+    mkdir -p "$HOME/.kube"
+    cat > "$HOME/.kube/config" <<EOF
 apiVersion: v1
 kind: Config
 preferences: {}
@@ -9,6 +12,26 @@ users: []
 contexts: []
 current-context: ""
 EOF
+fi
+
+# Ask the RHOTP service for a ready kubeconfig path. The service indexes the
+# config files and their token expiry, and only re-authenticates when expired.
+# Prints the path on success; fails if the service is not available.
+_kube_ensure_via_service() {
+    local cluster="$1"
+    local namespace="$2"
+    local token_file="$HOME/.cache/rhotp/auth_token"
+
+    [[ -s "$token_file" ]] || return 1
+    command -v curl &> /dev/null || return 1
+
+    local response
+    response=$(curl -sf -X POST --max-time 180 \
+        -H "Authorization: Bearer $(cat "$token_file")" \
+        "http://localhost:8009/kube/configs/${cluster}/ensure?namespace=${namespace}") || return 1
+
+    echo "$response" | python3 -c "import sys, json; print(json.load(sys.stdin)['path'])" 2>/dev/null
+}
 
 kube() {
     local cluster="$1"
@@ -43,6 +66,15 @@ kube() {
     PS1="$(echo "$PS1" | sed -E 's/\(kube:[^)]+\) ?//g')"
     PS1="(kube:${config_name}) $PS1"
 
+    # Prefer the service, which validates configs without spawning kubectl
+    local ensured_path
+    if ensured_path=$(_kube_ensure_via_service "$cluster" "$namespace") && [[ -n "$ensured_path" ]]; then
+        export KUBECONFIG="$ensured_path"
+        echo "KUBECONFIG now set to: $KUBECONFIG"
+        echo "Namespace: ${namespace:-default}"
+        return 0
+    fi
+
     # Pre-fill config if it doesn't exist or is invalid
     if [[ ! -s "$path" ]] || ! grep -q "apiVersion: v1" "$path"; then
         echo "Creating new kubeconfig at: $path"
@@ -14,7 +14,17 @@ from fastapi import FastAPI
 from api.dependencies.auth import get_or_create_auth_token
 
 # Import all routers
-from api.routes import ephemeral, legacy, token, vpn
+from api.routes import debug, ephemeral, kube, legacy, token, vpn
+from services.auto_extend import auto_extend_scheduler
+from services.bonfire import bonfire_worker
+from services.deploy_status import deploy_watchers
+from services.ephemeral import ephemeral_api, ephemeral_session
+from services.ephemeral_jobs import ephemeral_jobs
+from services.kube_api import kube_api
+from services.kube_proxy import kube_proxies
+from services.port_forward import port_forwards
+from services.process_supervisor import process_supervisor
+from services.vpn import network_manager
 
 # Configure logging
 logging.basicConfig(
@@ -35,6 +45,8 @@ app = FastAPI(
 app.include_router(vpn.router)
 app.include_router(ephemeral.router)
 app.include_router(token.router)
+app.include_router(kube.router)
+app.include_router(debug.router)
 app.include_router(legacy.router)  # Legacy endpoints for backward compatibility
 
 
@@ -43,6 +55,10 @@ app.include_router(legacy.router)  # Legacy endpoints for backward compatibility
 async def startup_event():
     """Initialize authentication token and other startup tasks."""
     token = get_or_create_auth_token()
+    process_supervisor.start()
+    ephemeral_session.start()
+    auto_extend_scheduler.start()
+    network_manager.start()
     logger.info("=" * 60)
     logger.info("RH-OTP Auto-Connect Service started")
     logger.info("Version: 2.0.0")
@@ -55,6 +71,17 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup tasks on shutdown."""
     logger.info("RH-OTP Auto-Connect Service shutting down")
+    await auto_extend_scheduler.stop()
+    await network_manager.stop()
+    await ephemeral_jobs.stop()
+    await deploy_watchers.stop_all()
+    await port_forwards.stop_all()
+    await ephemeral_session.stop()
+    await kube_proxies.stop_all()
+    await kube_api.aclose()
+    await ephemeral_api.aclose()
+    await bonfire_worker.close()
+    await process_supervisor.stop()
 
 
 @app.get("/", tags=["health"])
@@ -0,0 +1,450 @@
+"""Automatic extension of ephemeral namespace reservations.
+
+A background scheduler checks the shared bonfire namespace listing on an
+interval and extends each reservation of a user with an enabled policy when
+it is about to expire. Policies can limit extensions to working hours and
+cap the total lifetime of a reservation. Extensions are delayed by a random
+jitter, failed ones are retried with backoff across checks, and every
+decision is kept in a bounded log.
+
+Policies and the first time each namespace was seen are persisted in
+``~/.cache/rhotp/auto_extend.json``. This module has no FastAPI dependencies.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import tempfile
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from services.bonfire import NamespaceReservation
+from services.ephemeral import extend_namespace, namespace_cache, namespace_list_cache
+from services.kube_session import SessionExpiredError
+
+logger = logging.getLogger(__name__)
+
+STATE_PATH = Path.home() / ".cache" / "rhotp" / "auto_extend.json"
+
+# Seconds between checks (each check is jittered by up to 10%)
+CHECK_INTERVAL = 300.0
+
+# Decisions kept in the log
+DECISION_LOG_SIZE = 200
+
+# Extensions shorter than this are not worth making under a lifetime cap
+MIN_EXTENSION = 900.0
+
+_DURATION = re.compile(r"(\d+)([dhms])")
+_UNIT_SECONDS = {"d": 86400, "h": 3600, "m": 60, "s": 1}
+_DIGITS = re.compile(r"\d+[dhms]?")
+
+
+def duration_seconds(duration: str) -> int:
+    """Seconds in a bonfire duration such as '72h' or '1h30m'."""
+    return sum(int(v) * _UNIT_SECONDS[u] for v, u in _DURATION.findall(duration))
+
+
+def format_duration(seconds: float) -> str:
+    """Bonfire duration string, rounded down to whole minutes."""
+    hours, minutes = divmod(int(seconds) // 60, 60)
+    if hours and minutes:
+        return f"{hours}h{minutes}m"
+    return f"{hours}h" if hours else f"{minutes}m"
+
+
+@dataclass
+class AutoExtendPolicy:
+    """A user's auto-extend settings."""
+
+    enabled: bool = False
+    # Extend when less than this remains before expiry
+    window_minutes: int = 120
+    # Duration of each extension
+    duration: str = "72h"
+    # Cap on a reservation's lifetime since it was first seen (None = no cap)
+    max_lifetime_hours: Optional[int] = None
+    working_hours_only: bool = False
+    working_hours_start: int = 9
+    working_hours_end: int = 18
+    # Monday = 0
+    working_days: List[int] = field(default_factory=lambda: [0, 1, 2, 3, 4])
+    # Maximum random delay before each extension
+    jitter_seconds: int = 60
+    max_retries: int = 3
+    retry_delay_seconds: int = 300
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AutoExtendPolicy":
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+    def in_working_hours(self, ts: float) -> bool:
+        moment = datetime.fromtimestamp(ts)
+        return (
+            moment.weekday() in self.working_days
+            and self.working_hours_start <= moment.hour < self.working_hours_end
+        )
+
+    def next_working_start(self, ts: float) -> Optional[float]:
+        """Start of the first working period that begins after ts."""
+        moment = datetime.fromtimestamp(ts)
+        for offset in range(8):
+            day = moment.date() + timedelta(days=offset)
+            start = datetime(day.year, day.month, day.day, self.working_hours_start)
+            if start > moment and start.weekday() in self.working_days:
+                return start.timestamp()
+        return None
+
+
+@dataclass
+class AutoExtendDecision:
+    """One decision made by the scheduler."""
+
+    at: float
+    username: str
+    namespace: str
+    # "extend", "extended", "skip", "retry" or "failed"
+    action: str
+    reason: str
+    expires_at: Optional[float] = None
+    duration: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class _Tracked:
+    """Scheduler state of one reservation."""
+
+    username: str
+    namespace: str
+    expires_at: Optional[float] = None
+    attempts: int = 0
+    next_attempt_at: float = 0.0
+    last_decision: Optional[AutoExtendDecision] = None
+
+
+def plan_extension(
+    policy: AutoExtendPolicy,
+    now: float,
+    expires_at: float,
+    first_seen: float,
+) -> Tuple[Optional[float], str]:
+    """
+    Decide whether a reservation should be extended now.
+
+    With working_hours_only, extensions only happen in working hours, and a
+    reservation that would expire before the next working period (plus the
+    window) is extended before the current one ends.
+
+    Args:
+        policy: The user's policy
+        now: Current time
+        expires_at: Reservation expiry
+        first_seen: When the reservation was first seen
+
+    Returns:
+        (seconds to extend by or None to skip, reason)
+    """
+    window = policy.window_minutes * 60
+    remaining = expires_at - now
+
+    if policy.working_hours_only:
+        if not policy.in_working_hours(now):
+            return None, "Outside working hours"
+        next_start = policy.next_working_start(now)
+        deadline = (next_start if next_start is not None else now) + window
+        if expires_at >= deadline:
+            return None, f"Expires in {format_duration(remaining)}, after the window"
+    elif remaining > window:
+        return None, f"Expires in {format_duration(remaining)}, after the window"
+
+    extension = float(duration_seconds(policy.duration))
+    reason = f"Expires in {format_duration(max(remaining, 0))}"
+    if policy.max_lifetime_hours is not None:
+        allowed = first_seen + policy.max_lifetime_hours * 3600 - expires_at
+        if allowed < MIN_EXTENSION:
+            return None, "Maximum lifetime reached"
+        if allowed < extension:
+            extension = allowed
+            reason += ", capped by maximum lifetime"
+    return extension, reason
+
+
+class AutoExtendScheduler:
+    """Background scheduler that extends expiring namespace reservations."""
+
+    def __init__(
+        self,
+        state_path: Optional[Path] = None,
+        interval: float = CHECK_INTERVAL,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            state_path: File holding policies and first-seen times
+            interval: Seconds between checks
+        """
+        self.state_path = state_path or STATE_PATH
+        self.interval = interval
+        self.policies: Dict[str, AutoExtendPolicy] = {}
+        self.first_seen: Dict[str, float] = {}
+        self.decisions: Deque[AutoExtendDecision] = deque(maxlen=DECISION_LOG_SIZE)
+        self.last_check: Optional[float] = None
+        self._tracked: Dict[str, _Tracked] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Cannot read auto-extend state {self.state_path}: {e}")
+            return
+
+        self.policies = {
+            user: AutoExtendPolicy.from_dict(policy)
+            for user, policy in state.get("policies", {}).items()
+        }
+        self.first_seen = dict(state.get("first_seen", {}))
+
+    def _save(self) -> None:
+        state = {
+            "policies": {user: asdict(p) for user, p in self.policies.items()},
+            "first_seen": self.first_seen,
+        }
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.state_path.parent, prefix=".auto_extend.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp, self.state_path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def get_policy(self, username: str) -> AutoExtendPolicy:
+        """A user's policy (disabled defaults if none is set)."""
+        return self.policies.get(username) or AutoExtendPolicy()
+
+    def set_policy(self, username: str, policy: AutoExtendPolicy) -> None:
+        """Store a user's policy; it applies from the next check."""
+        self.policies[username] = policy
+        self._save()
+        logger.info(
+            f"Auto-extend {'enabled' if policy.enabled else 'disabled'} for {username}"
+        )
+
+    def _record(
+        self, tracked: _Tracked, action: str, reason: str, **extra: Any
+    ) -> None:
+        decision = AutoExtendDecision(
+            at=time.time(),
+            username=tracked.username,
+            namespace=tracked.namespace,
+            action=action,
+            reason=reason,
+            expires_at=tracked.expires_at,
+            **extra,
+        )
+        last = tracked.last_decision
+        tracked.last_decision = decision
+        # Repeated skips for the same reason are not logged again
+        if last is not None and action == "skip" and last.action == "skip":
+            if _DIGITS.sub("", last.reason) == _DIGITS.sub("", reason):
+                return
+        self.decisions.append(decision)
+        if action != "skip":
+            logger.info(f"Auto-extend {tracked.namespace}: {action} ({reason})")
+
+    async def _extend(
+        self,
+        tracked: _Tracked,
+        policy: AutoExtendPolicy,
+        extension: float,
+        reason: str,
+    ) -> None:
+        duration = format_duration(extension)
+        self._record(tracked, "extend", reason, duration=duration)
+        await asyncio.sleep(random.uniform(0, policy.jitter_seconds))
+
+        if await extend_namespace(tracked.namespace, duration, headless=True):
+            tracked.attempts = 0
+            # Held off until the listing shows the new expiry (which clears it)
+            tracked.next_attempt_at = time.time() + policy.window_minutes * 30
+            self._record(tracked, "extended", f"Extended by {duration}")
+            namespace_cache.invalidate(tracked.username)
+            return
+
+        tracked.attempts += 1
+        if tracked.attempts > policy.max_retries:
+            # Not retried until the expiry changes (e.g. a manual extension)
+            tracked.next_attempt_at = float("inf")
+            self._record(
+                tracked, "failed", f"Gave up after {tracked.attempts} attempts"
+            )
+            return
+
+        delay = policy.retry_delay_seconds * 2 ** (tracked.attempts - 1)
+        tracked.next_attempt_at = time.time() + delay
+        self._record(
+            tracked,
+            "retry",
+            f"Attempt {tracked.attempts} failed, retrying in {format_duration(delay)}",
+        )
+
+    async def _check_reservation(
+        self,
+        username: str,
+        policy: AutoExtendPolicy,
+        reservation: NamespaceReservation,
+        listed_at: float,
+    ) -> None:
+        now = time.time()
+        tracked = self._tracked.setdefault(
+            reservation.name, _Tracked(username, reservation.name)
+        )
+
+        remaining = reservation.expires_in_seconds
+        expires_at = listed_at + remaining if remaining is not None else None
+        if expires_at is not None and tracked.expires_at is not None:
+            # Expiry moved forward: extended here or by hand
+            if expires_at > tracked.expires_at + 60:
+                tracked.attempts = 0
+                tracked.next_attempt_at = 0.0
+        tracked.expires_at = expires_at
+
+        if not reservation.reserved:
+            self._record(tracked, "skip", "Not reserved")
+            return
+        if expires_at is None:
+            self._record(tracked, "skip", f"Unknown expiry '{reservation.expires_in}'")
+            return
+        if now < tracked.next_attempt_at:
+            return
+
+        first_seen = self.first_seen.get(reservation.name, now)
+        extension, reason = plan_extension(policy, now, expires_at, first_seen)
+        if extension is None:
+            self._record(tracked, "skip", reason)
+            return
+        await self._extend(tracked, policy, extension, reason)
+
+    async def run_once(self) -> int:
+        """
+        Check every reservation of users with an enabled policy.
+
+        Returns:
+            Number of reservations checked
+        """
+        enabled = {u: p for u, p in self.policies.items() if p.enabled}
+        self.last_check = time.time()
+        if not enabled:
+            return 0
+
+        try:
+            index = await namespace_list_cache.get()
+        except SessionExpiredError as e:
+            logger.warning(f"Auto-extend check skipped: {e}")
+            return 0
+        if index is None:
+            logger.warning("Auto-extend check skipped: namespace list unavailable")
+            return 0
+
+        listed = {r.name for r in index.reservations}
+        now = time.time()
+        changed = False
+        for name in listed.difference(self.first_seen):
+            self.first_seen[name] = now
+            changed = True
+        for name in set(self.first_seen).difference(listed):
+            # Released or expired; a new reservation may reuse the name
+            del self.first_seen[name]
+            self._tracked.pop(name, None)
+            changed = True
+        if changed:
+            self._save()
+
+        checked = 0
+        for username, policy in enabled.items():
+            for reservation in index.for_requester(username):
+                try:
+                    await self._check_reservation(
+                        username, policy, reservation, index.fetched_at
+                    )
+                except Exception as e:
+                    logger.error(f"Auto-extend check of {reservation.name} failed: {e}")
+                checked += 1
+        return checked
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Auto-extend check failed: {e}")
+            await asyncio.sleep(self.interval * random.uniform(0.9, 1.1))
+
+    def start(self) -> None:
+        """Start the periodic background check."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the background check."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def status(self, username: str) -> Dict[str, Any]:
+        """Describe the scheduler and a user's tracked reservations."""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval": self.interval,
+            "last_check": self.last_check,
+            "policy": asdict(self.get_policy(username)),
+            "reservations": [
+                {
+                    "namespace": t.namespace,
+                    "expires_at": t.expires_at,
+                    "first_seen": self.first_seen.get(t.namespace),
+                    "attempts": t.attempts,
+                    "next_attempt_at": (
+                        t.next_attempt_at
+                        if 0 < t.next_attempt_at < float("inf")
+                        else None
+                    ),
+                    "last_decision": (
+                        t.last_decision.to_dict() if t.last_decision else None
+                    ),
+                }
+                for t in sorted(self._tracked.values(), key=lambda t: t.namespace)
+                if t.username == username
+            ],
+        }
+
+    def list_decisions(
+        self, username: Optional[str] = None, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Most recent decisions first, optionally for one user."""
+        decisions = [
+            d for d in reversed(self.decisions) if username in (None, d.username)
+        ]
+        return [d.to_dict() for d in decisions[:limit]]
+
+
+# Global instance
+auto_extend_scheduler = AutoExtendScheduler()
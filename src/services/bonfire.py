@@ -0,0 +1,492 @@
+"""Parsing of bonfire namespace listings.
+
+Turns the output of ``bonfire namespace list`` into typed reservation
+records indexed by requester. The JSON output (``--output json``) is used
+when bonfire supports it; otherwise the table is parsed by the positions of
+its header columns, so extra columns, multi-word headers and re-ordered
+columns do not shift the values.
+
+BonfireWorker keeps bonfire imported in a persistent worker process
+(services/bonfire_worker.py) so listing and extending namespaces does not
+start a new interpreter and import bonfire's dependency tree every time.
+
+This module has no FastAPI dependencies.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.process_supervisor import process_supervisor
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = Path(__file__).with_name("bonfire_worker.py")
+
+# Seconds to wait for the worker to import bonfire
+WORKER_START_TIMEOUT = 30.0
+
+# Longest response line read from the worker (large listings are one line)
+WORKER_LINE_LIMIT = 16 * 1024 * 1024
+
+# Header/key spellings of each reservation attribute across bonfire versions
+COLUMN_ALIASES = {
+    "name": "name",
+    "namespace": "name",
+    "reserved": "reserved",
+    "env_status": "status",
+    "status": "status",
+    "state": "status",
+    "apps_ready": "apps_ready",
+    "ready": "apps_ready",
+    "clowdapps": "apps_ready",
+    "requester": "requester",
+    "pool_type": "pool",
+    "pool": "pool",
+    "expires_in": "expires_in",
+    "expires": "expires_in",
+}
+
+_SEPARATOR_LINE = re.compile(r"^[\s\-=+|]*-[\s\-=+|]*$")
+_COLUMN_GAP = re.compile(r"\s{2,}")
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)\s*(d|h|m|s)[a-z]*", re.IGNORECASE)
+_DAYS_CLOCK = re.compile(
+    r"^(?:(\d+)\s*days?,?\s*)?(\d+):(\d{1,2}):(\d{1,2}(?:\.\d+)?)$", re.IGNORECASE
+)
+_UNIT_SECONDS = {"d": 86400, "h": 3600, "m": 60, "s": 1}
+
+
+def parse_expires_in(text: Optional[str]) -> Optional[float]:
+    """
+    Parse a bonfire "expires in" value into seconds.
+
+    Accepts "1h 20m" style durations, "[N day(s), ]H:MM:SS" timedeltas and
+    ISO 8601 expiry timestamps (relative to now).
+
+    Returns:
+        Seconds until expiry, or None if the value is not recognised
+    """
+    if not text:
+        return None
+    text = text.strip()
+
+    clock = _DAYS_CLOCK.match(text)
+    if clock:
+        days, hours, minutes, seconds = clock.groups()
+        return (
+            int(days or 0) * 86400
+            + int(hours) * 3600
+            + int(minutes) * 60
+            + float(seconds)
+        )
+
+    parts = _DURATION_PART.findall(text)
+    if parts and not _DURATION_PART.sub("", text).strip(" ,"):
+        return sum(float(value) * _UNIT_SECONDS[unit.lower()] for value, unit in parts)
+
+    try:
+        expires = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if expires.tzinfo is None:
+        expires = expires.astimezone()
+    return expires.timestamp() - time.time()
+
+
+def _column_key(header: str) -> str:
+    key = re.sub(r"[\s\-]+", "_", header.strip().lower())
+    return COLUMN_ALIASES.get(key, key)
+
+
+def _as_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("true", "yes", "1")
+
+
+def _as_text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text if text and text.lower() not in ("none", "null") else None
+
+
+@dataclass
+class NamespaceReservation:
+    """One namespace in a bonfire listing."""
+
+    name: str
+    reserved: bool = False
+    status: Optional[str] = None
+    apps_ready: Optional[str] = None
+    requester: Optional[str] = None
+    pool: Optional[str] = None
+    expires_in: Optional[str] = None
+    # Raw values in listing order
+    fields: List[str] = field(default_factory=list)
+
+    @property
+    def expires_in_seconds(self) -> Optional[float]:
+        """Seconds until expiry when the listing was taken (None if unknown)."""
+        return parse_expires_in(self.expires_in)
+
+    @classmethod
+    def from_values(
+        cls, values: Dict[str, Any], fields: Optional[List[str]] = None
+    ) -> "NamespaceReservation":
+        """
+        Build a reservation from attribute values keyed by column name.
+
+        Args:
+            values: Values keyed by header or JSON key (any known spelling)
+            fields: Raw values in listing order
+
+        Raises:
+            ValueError: If there is no namespace name
+        """
+        known = {_column_key(key): value for key, value in values.items()}
+        name = _as_text(known.get("name"))
+        if not name:
+            raise ValueError("Reservation has no namespace name")
+
+        return cls(
+            name=name,
+            reserved=_as_bool(known.get("reserved", False)),
+            status=_as_text(known.get("status")),
+            apps_ready=_as_text(known.get("apps_ready")),
+            requester=_as_text(known.get("requester")),
+            pool=_as_text(known.get("pool")),
+            expires_in=_as_text(known.get("expires_in")),
+            fields=fields if fields is not None else [str(v) for v in values.values()],
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "reserved": self.reserved,
+            "status": self.status,
+            "apps_ready": self.apps_ready,
+            "requester": self.requester,
+            "pool": self.pool,
+            "expires_in": self.expires_in,
+        }
+
+
+@dataclass
+class ReservationIndex:
+    """A parsed namespace listing, indexed by requester and name."""
+
+    reservations: List[NamespaceReservation]
+    # "worker", "json" or "table"
+    source: str
+    fetched_at: float = field(default_factory=time.time)
+    by_requester: Dict[str, List[NamespaceReservation]] = field(
+        init=False, default_factory=dict
+    )
+    by_name: Dict[str, NamespaceReservation] = field(init=False, default_factory=dict)
+
+    def __post_init__(self) -> None:
+        for reservation in self.reservations:
+            self.by_name[reservation.name] = reservation
+            if reservation.requester:
+                key = reservation.requester.lower()
+                self.by_requester.setdefault(key, []).append(reservation)
+
+    def for_requester(self, username: str) -> List[NamespaceReservation]:
+        """Reservations held by a user, in listing order."""
+        return list(self.by_requester.get(username.strip().lower(), []))
+
+    def get(self, name: str) -> Optional[NamespaceReservation]:
+        """The namespace with the given name, if listed."""
+        return self.by_name.get(name)
+
+
+def parse_json(text: str) -> List[NamespaceReservation]:
+    """
+    Parse ``bonfire namespace list --output json``.
+
+    Raises:
+        ValueError: If the text is not a JSON namespace listing
+    """
+    return reservations_from_data(json.loads(text))
+
+
+def reservations_from_data(data: Any) -> List[NamespaceReservation]:
+    """
+    Build reservations from a decoded JSON listing.
+
+    Accepts an object keyed by namespace name or a list of objects.
+
+    Raises:
+        ValueError: If the data is not a namespace listing
+    """
+    if isinstance(data, dict):
+        items: List[Tuple[Optional[str], Any]] = list(data.items())
+    elif isinstance(data, list):
+        items = [(None, item) for item in data]
+    else:
+        raise ValueError("Unexpected JSON namespace listing")
+
+    reservations = []
+    for name, values in items:
+        if not isinstance(values, dict):
+            raise ValueError("Unexpected JSON namespace listing")
+        if name is not None:
+            values = {"name": name, **values}
+        reservations.append(NamespaceReservation.from_values(values))
+    return reservations
+
+
+def _column_starts(header: str, separator: Optional[str]) -> List[int]:
+    if separator is not None:
+        # Dash runs under each header give the exact column spans
+        return [m.start() for m in re.finditer(r"[-=]+", separator)]
+    if _COLUMN_GAP.search(header.strip()):
+        return [m.start() for m in re.finditer(r"\S+(?: \S+)*", header)]
+    return [m.start() for m in re.finditer(r"\S+", header)]
+
+
+def parse_table(text: str) -> List[NamespaceReservation]:
+    """
+    Parse the table printed by ``bonfire namespace list``.
+
+    Columns are located by the header (and the dashed rule under it, when
+    present). Rows are split on whitespace when that yields exactly one
+    value per column, and sliced at the header positions otherwise (e.g.
+    for values containing spaces such as "1h 20m").
+
+    Returns:
+        Reservations in listing order (empty if there is no table)
+    """
+    lines = [line.rstrip() for line in text.splitlines() if line.strip()]
+
+    header_index = None
+    for i, line in enumerate(lines):
+        if re.match(r"^\s*(NAME|NAMESPACE)\b", line, re.IGNORECASE):
+            header_index = i
+            break
+    if header_index is None:
+        return []
+
+    header = lines[header_index]
+    body = lines[header_index + 1 :]
+    separator = None
+    if body and _SEPARATOR_LINE.match(body[0]):
+        separator = body.pop(0)
+
+    starts = _column_starts(header, separator)
+    ends = starts[1:] + [None]
+    headers = [header[start:end].strip() for start, end in zip(starts, ends)]
+
+    reservations = []
+    for row in body:
+        if _SEPARATOR_LINE.match(row):
+            continue
+        tokens = row.split()
+        if len(tokens) != len(headers):
+            tokens = [row[start:end].strip() for start, end in zip(starts, ends)]
+        try:
+            reservations.append(
+                NamespaceReservation.from_values(dict(zip(headers, tokens)), tokens)
+            )
+        except ValueError:
+            continue
+    return reservations
+
+
+def parse_namespace_list(text: str) -> ReservationIndex:
+    """
+    Parse bonfire namespace listing output, JSON or table.
+
+    Args:
+        text: stdout of ``bonfire namespace list [--output json]``
+
+    Returns:
+        ReservationIndex of every listed namespace
+    """
+    stripped = text.strip()
+    if stripped[:1] in ("{", "["):
+        try:
+            return ReservationIndex(parse_json(stripped), source="json")
+        except ValueError:
+            pass
+    return ReservationIndex(parse_table(text), source="table")
+
+
+class BonfireWorkerError(Exception):
+    """Raised when the bonfire worker is unavailable or a request fails."""
+
+
+def bonfire_interpreter(bonfire: str) -> List[str]:
+    """
+    Interpreter command that can import bonfire.
+
+    Uses the shebang of the bonfire CLI script (e.g. its pipx virtualenv),
+    falling back to the service's own interpreter.
+
+    Args:
+        bonfire: Path of the bonfire CLI
+    """
+    try:
+        with open(bonfire, "rb") as f:
+            first_line = f.readline(4096).decode(errors="replace")
+    except OSError:
+        return [sys.executable]
+
+    if not first_line.startswith("#!"):
+        return [sys.executable]
+    command = first_line[2:].split()
+    if command and os.path.basename(command[0]) == "env":
+        command = [arg for arg in command[1:] if not arg.startswith("-")][:1]
+    if not command:
+        return [sys.executable]
+    if not os.path.isabs(command[0]):
+        resolved = shutil.which(command[0])
+        if resolved is None:
+            return [sys.executable]
+        command[0] = resolved
+    return command
+
+
+class BonfireWorker:
+    """
+    Client of a persistent bonfire worker process.
+
+    The worker is started on first use with the given kubeconfig and reused
+    for later requests; requests are sent one at a time. If bonfire cannot
+    be imported the worker is marked unavailable and callers fall back to
+    the CLI.
+    """
+
+    def __init__(self, start_timeout: float = WORKER_START_TIMEOUT):
+        """
+        Initialize the worker client.
+
+        Args:
+            start_timeout: Seconds to wait for the worker to import bonfire
+        """
+        self.start_timeout = start_timeout
+        self.unavailable: Optional[str] = None
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._key: Optional[Tuple[str, ...]] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._ids = itertools.count(1)
+
+    @property
+    def running(self) -> bool:
+        return self._proc is not None and self._proc.returncode is None
+
+    async def _readline(self, timeout: float) -> Dict[str, Any]:
+        assert self._proc is not None and self._proc.stdout is not None
+        line = await asyncio.wait_for(self._proc.stdout.readline(), timeout)
+        if not line:
+            raise BonfireWorkerError("bonfire worker exited")
+        message: Dict[str, Any] = json.loads(line)
+        return message
+
+    async def _start(self, bonfire: str, kubeconfig: str) -> None:
+        command = bonfire_interpreter(bonfire) + [str(WORKER_SCRIPT)]
+        env = {**os.environ, "KUBECONFIG": kubeconfig}
+        try:
+            self._proc = await process_supervisor.spawn_async(
+                command, name="bonfire-worker", env=env, limit=WORKER_LINE_LIMIT
+            )
+        except OSError as e:
+            self.unavailable = f"Cannot start {command[0]}: {e}"
+            raise BonfireWorkerError(self.unavailable)
+        self._key = (bonfire, kubeconfig)
+
+        try:
+            ready = await self._readline(self.start_timeout)
+        except (asyncio.TimeoutError, BonfireWorkerError, ValueError) as e:
+            await self.close()
+            raise BonfireWorkerError(f"bonfire worker did not start: {e}")
+
+        if not ready.get("ready"):
+            await self.close()
+            self.unavailable = ready.get("error") or "bonfire is not importable"
+            logger.info(f"Using the bonfire CLI: {self.unavailable}")
+            raise BonfireWorkerError(self.unavailable)
+
+        logger.info(f"Started bonfire worker (PID {self._proc.pid})")
+
+    async def request(
+        self, op: str, bonfire: str, kubeconfig: str, timeout: float, **args: Any
+    ) -> Any:
+        """
+        Run an operation in the worker, starting it if needed.
+
+        Args:
+            op: Operation ("list", "extend" or "extend_many")
+            bonfire: Path of the bonfire CLI (selects the interpreter)
+            kubeconfig: Kubeconfig the worker runs with
+            timeout: Seconds to wait for the response
+            **args: Operation arguments
+
+        Returns:
+            The operation's result
+
+        Raises:
+            BonfireWorkerError: If the worker is unavailable, timed out or
+                the operation failed
+        """
+        if self.unavailable is not None:
+            raise BonfireWorkerError(self.unavailable)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if not self.running or self._key != (bonfire, kubeconfig):
+                await self.close()
+                await self._start(bonfire, kubeconfig)
+            assert self._proc is not None and self._proc.stdin is not None
+
+            request_id = next(self._ids)
+            line = json.dumps({"id": request_id, "op": op, **args}) + "\n"
+            try:
+                self._proc.stdin.write(line.encode())
+                await self._proc.stdin.drain()
+                response = await self._readline(timeout)
+            except BaseException as e:
+                # The worker's state is unknown (e.g. bonfire still running)
+                await self.close()
+                if isinstance(e, asyncio.TimeoutError):
+                    raise BonfireWorkerError(f"bonfire {op} timed out after {timeout}s")
+                if isinstance(e, (OSError, ValueError)):
+                    raise BonfireWorkerError(f"bonfire worker failed: {e}")
+                raise
+
+            if response.get("id") != request_id:
+                await self.close()
+                raise BonfireWorkerError("bonfire worker answered out of order")
+
+        if not response.get("ok"):
+            raise BonfireWorkerError(response.get("error") or f"bonfire {op} failed")
+        return response.get("result")
+
+    async def close(self) -> None:
+        """Stop the worker process."""
+        proc, self._proc = self._proc, None
+        self._key = None
+        if proc is None:
+            return
+        if proc.stdin is not None:
+            proc.stdin.close()
+        await asyncio.to_thread(process_supervisor.kill_tree, proc.pid, 1.0)
+        await proc.wait()
+
+
+# Global instance
+bonfire_worker = BonfireWorker()
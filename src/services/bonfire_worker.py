@@ -0,0 +1,134 @@
+"""Persistent bonfire worker process.
+
+Started by services.bonfire.BonfireWorker under the interpreter bonfire is
+installed in, so bonfire and its dependencies are imported once instead of
+on every CLI call. Requests and responses are JSON lines on stdin/stdout:
+
+    -> {"id": 1, "op": "list"}
+    <- {"id": 1, "ok": true, "result": {"<namespace>": {...}, ...}}
+
+    -> {"id": 2, "op": "extend", "namespace": "<ns>", "duration": "72h"}
+    <- {"id": 2, "ok": true, "result": true}
+
+    -> {"id": 3, "op": "extend_many", "namespaces": ["<ns>", ...],
+        "duration": "72h", "concurrency": 4}
+    <- {"id": 3, "ok": true, "result": {"<ns>": null, "<ns2>": "<error>"}}
+
+extend_many extends the namespaces on up to `concurrency` threads and
+reports an error message (or null) per namespace.
+
+The first line written is {"ready": true} once bonfire is imported, or
+{"ready": false, "error": ...} before exiting if it cannot be.
+
+Only the standard library is used here: the worker runs outside the
+service's environment.
+"""
+
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+# Namespace attributes returned for a listing, as named by bonfire
+RESERVATION_ATTRIBUTES = (
+    "reserved",
+    "status",
+    "clowdapps",
+    "requester",
+    "pool_type",
+    "expires_in",
+)
+
+
+def _jsonable(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _reservation(namespace: Any) -> Dict[str, Any]:
+    values = {}
+    for attribute in RESERVATION_ATTRIBUTES:
+        try:
+            value = getattr(namespace, attribute)
+        except Exception:
+            continue
+        if not callable(value):
+            values[attribute] = _jsonable(value)
+    return values
+
+
+def _extend_many(
+    extend: Callable[[str, str], Any],
+    namespaces: List[str],
+    duration: str,
+    concurrency: int,
+) -> Dict[str, Optional[str]]:
+    def run(namespace: str) -> Optional[str]:
+        try:
+            extend(namespace, duration)
+            return None
+        except (Exception, SystemExit) as e:
+            return str(e) or type(e).__name__
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        return dict(zip(namespaces, pool.map(run, namespaces)))
+
+
+def _write(out: TextIO, message: Dict[str, Any]) -> None:
+    out.write(json.dumps(message) + "\n")
+    out.flush()
+
+
+def main() -> int:
+    # Keep the real stdout for responses; anything bonfire prints goes to stderr
+    out = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    # The script's directory (services/) has its own bonfire.py
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:] = [p for p in sys.path if os.path.abspath(p or ".") != here]
+
+    try:
+        from bonfire import namespaces
+    except Exception as e:
+        _write(out, {"ready": False, "error": f"Cannot import bonfire: {e}"})
+        return 1
+    _write(out, {"ready": True})
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            op = request.get("op")
+            if op == "list":
+                result: Any = {
+                    ns.name: _reservation(ns) for ns in namespaces.get_namespaces()
+                }
+            elif op == "extend":
+                namespaces.extend_namespace(request["namespace"], request["duration"])
+                result = True
+            elif op == "extend_many":
+                result = _extend_many(
+                    namespaces.extend_namespace,
+                    request["namespaces"],
+                    request["duration"],
+                    request.get("concurrency", 1),
+                )
+            else:
+                raise ValueError(f"Unknown operation: {op}")
+            _write(out, {"id": request_id, "ok": True, "result": result})
+        except (Exception, SystemExit) as e:
+            # bonfire reports some failures with sys.exit()
+            error = str(e) or type(e).__name__
+            _write(out, {"id": request_id, "ok": False, "error": error})
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""Reachability and latency probes for OpenShift clusters.
+
+Probes each cluster's OAuth endpoint and the API server derived from it
+concurrently, timing the TCP connect and TLS handshake separately, so the
+user can tell which clusters are reachable from the current VPN before
+starting a browser login.
+"""
+
+import asyncio
+import logging
+import socket
+import ssl
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+OAUTH_HOST_PREFIX = "oauth-openshift.apps."
+API_PORT = 6443
+
+
+@dataclass
+class EndpointProbe:
+    """Result of probing a single endpoint."""
+
+    kind: str
+    host: str
+    port: int
+    status: str = "unknown"
+    tcp_ms: Optional[float] = None
+    tls_ms: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def reachable(self) -> bool:
+        return self.status == "ok"
+
+
+@dataclass
+class ClusterProbe:
+    """Probe results for all endpoints of a cluster."""
+
+    cluster_id: str
+    name: str
+    endpoints: List[EndpointProbe] = field(default_factory=list)
+
+    @property
+    def reachable(self) -> bool:
+        return bool(self.endpoints) and all(e.reachable for e in self.endpoints)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cluster_id": self.cluster_id,
+            "name": self.name,
+            "reachable": self.reachable,
+            "endpoints": [asdict(e) for e in self.endpoints],
+        }
+
+
+def derive_endpoints(oauth_url: str) -> List[Tuple[str, str, int]]:
+    """
+    Derive the endpoints to probe from a cluster's OAuth token request URL.
+
+    From: https://oauth-openshift.apps.crc-eph.r9lp.p1.openshiftapps.com/oauth/token/request
+    To:   [("oauth", "oauth-openshift.apps.crc-eph...", 443),
+           ("api", "api.crc-eph.r9lp.p1.openshiftapps.com", 6443)]
+
+    Returns:
+        List of (kind, host, port) tuples
+    """
+    parsed = urlparse(oauth_url)
+    if not parsed.hostname:
+        return []
+
+    endpoints = [("oauth", parsed.hostname, parsed.port or 443)]
+    if parsed.hostname.startswith(OAUTH_HOST_PREFIX):
+        api_host = "api." + parsed.hostname[len(OAUTH_HOST_PREFIX) :]
+        endpoints.append(("api", api_host, API_PORT))
+    return endpoints
+
+
+def _handshake_context() -> ssl.SSLContext:
+    # Only the handshake latency matters here; certificates are verified by
+    # the real clients (oc, browser), and internal CAs are often not trusted
+    # by the service's Python
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+async def probe_endpoint(
+    kind: str,
+    host: str,
+    port: int,
+    timeout: float = 2.0,
+    use_tls: bool = True,
+) -> EndpointProbe:
+    """
+    Probe one endpoint with a TCP connect followed by a TLS handshake.
+
+    Args:
+        kind: Endpoint label ("oauth" or "api")
+        host: Host name
+        port: TCP port
+        timeout: Timeout in seconds for each phase
+        use_tls: Whether to perform the TLS handshake after connecting
+
+    Returns:
+        EndpointProbe with status ok, timeout, refused, dns_error,
+        tls_error or error
+    """
+    result = EndpointProbe(kind=kind, host=host, port=port)
+    writer = None
+    try:
+        start = time.perf_counter()
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        result.tcp_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        if use_tls:
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(
+                    writer.start_tls(_handshake_context(), server_hostname=host),
+                    timeout,
+                )
+            except (ssl.SSLError, ConnectionError) as e:
+                result.status = "tls_error"
+                result.error = str(e) or "TLS handshake failed"
+                return result
+            result.tls_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        result.status = "ok"
+    except asyncio.TimeoutError:
+        result.status = "timeout"
+        result.error = f"No response within {timeout}s"
+    except socket.gaierror as e:
+        result.status = "dns_error"
+        result.error = str(e)
+    except ConnectionRefusedError as e:
+        result.status = "refused"
+        result.error = str(e)
+    except OSError as e:
+        result.status = "error"
+        result.error = str(e)
+    finally:
+        if writer is not None:
+            writer.close()
+            try:
+                await asyncio.wait_for(writer.wait_closed(), 1.0)
+            except Exception:
+                pass
+
+    return result
+
+
+class ClusterHealthChecker:
+    """Probes all clusters concurrently and caches the results for a short TTL."""
+
+    def __init__(
+        self, ttl: float = 30.0, timeout: float = 2.0, max_concurrency: int = 32
+    ):
+        """
+        Initialize the health checker.
+
+        Args:
+            ttl: Seconds a completed probe run is served from cache
+            timeout: Per-phase timeout in seconds for each endpoint
+            max_concurrency: Maximum number of endpoints probed at once
+        """
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._results: Optional[List[ClusterProbe]] = None
+        self._checked_at: float = 0.0
+        self._catalog_key: Any = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def checked_at(self) -> float:
+        """Unix time of the last completed probe run."""
+        return self._checked_at
+
+    def _is_fresh(self, catalog_key: Any) -> bool:
+        return (
+            self._results is not None
+            and catalog_key == self._catalog_key
+            and time.time() - self._checked_at < self.ttl
+        )
+
+    async def check(
+        self,
+        clusters: Dict[str, Dict[str, Any]],
+        catalog_key: Any = None,
+        force: bool = False,
+    ) -> Tuple[List[ClusterProbe], bool]:
+        """
+        Probe every cluster, or return cached results.
+
+        Concurrent callers share a single probe run.
+
+        Args:
+            clusters: Cluster ID -> configuration mapping
+            catalog_key: Identifies the catalog version (e.g. its ETag);
+                cached results for a different catalog are not reused
+            force: Ignore the cache
+
+        Returns:
+            Tuple of (per-cluster results, whether they came from cache)
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        if not force and self._is_fresh(catalog_key):
+            return self._results or [], True
+
+        async with self._lock:
+            # Another caller may have refreshed while we waited
+            if not force and self._is_fresh(catalog_key):
+                return self._results or [], True
+
+            results = await self._probe_all(clusters)
+            self._results = results
+            self._checked_at = time.time()
+            self._catalog_key = catalog_key
+            return results, False
+
+    async def _probe_all(
+        self, clusters: Dict[str, Dict[str, Any]]
+    ) -> List[ClusterProbe]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded(kind: str, host: str, port: int) -> EndpointProbe:
+            async with semaphore:
+                return await probe_endpoint(kind, host, port, self.timeout)
+
+        results = []
+        tasks = []
+        for cluster_id, cluster in clusters.items():
+            probe = ClusterProbe(cluster_id=cluster_id, name=cluster.get("name", ""))
+            results.append(probe)
+            for kind, host, port in derive_endpoints(cluster.get("url", "")):
+                tasks.append((probe, bounded(kind, host, port)))
+
+        start = time.perf_counter()
+        endpoint_results = await asyncio.gather(*(coro for _, coro in tasks))
+        for (probe, _), endpoint in zip(tasks, endpoint_results):
+            probe.endpoints.append(endpoint)
+
+        logger.info(
+            f"Probed {len(tasks)} endpoints of {len(clusters)} clusters in "
+            f"{(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+        return results
+
+
+# Global instance
+cluster_health = ClusterHealthChecker()
@@ -0,0 +1,471 @@
+"""Watch-based deployment status of ephemeral namespaces.
+
+A NamespaceWatcher lists the deployments, pods and ClowdApps of a namespace
+once and then follows a Kubernetes watch per kind, applying each change to
+an in-memory status model. Requests are answered from the model without
+contacting the cluster, and followers are woken on every change, so one
+open watch per kind replaces repeated polling. A watcher nobody asked about
+for WATCH_IDLE seconds stops at the end of its current watch.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+from services.ephemeral import (
+    EPHEMERAL_CLUSTER_ID,
+    ephemeral_api,
+    ephemeral_session,
+)
+from services.kube_api import KubeAPIError
+from services.kube_session import SessionExpiredError
+
+logger = logging.getLogger(__name__)
+
+# Server-side duration of one watch request (seconds)
+WATCH_TIMEOUT = 300
+
+# Stop watching a namespace nobody asked about for this long (seconds)
+WATCH_IDLE = 1800.0
+
+# Wait before reconnecting after a failed list or watch (seconds)
+RETRY_DELAY = 5.0
+MAX_RETRY_DELAY = 60.0
+
+# Changes arriving within this window are sent to followers together
+COALESCE_DELAY = 0.25
+
+
+@dataclass(frozen=True)
+class WatchedKind:
+    """A resource kind watched in the namespace."""
+
+    name: str
+    # API path prefix, e.g. /apis/apps/v1
+    prefix: str
+    plural: str
+    # Whether the kind is a CRD that may not be installed
+    optional: bool = False
+
+    def path(self, namespace: str) -> str:
+        return f"{self.prefix}/namespaces/{namespace}/{self.plural}"
+
+
+WATCHED_KINDS = (
+    WatchedKind("deployments", "/apis/apps/v1", "deployments"),
+    WatchedKind("pods", "/api/v1", "pods"),
+    WatchedKind(
+        "clowdapps", "/apis/cloud.redhat.com/v1alpha1", "clowdapps", optional=True
+    ),
+)
+
+
+def _condition(obj: Dict[str, Any], type: str) -> Optional[Dict[str, Any]]:
+    for condition in (obj.get("status") or {}).get("conditions") or []:
+        if condition.get("type") == type:
+            return dict(condition)
+    return None
+
+
+def summarize_deployment(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Readiness of a Deployment, as `kubectl rollout status` judges it."""
+    metadata = obj.get("metadata") or {}
+    spec = obj.get("spec") or {}
+    status = obj.get("status") or {}
+    replicas = spec.get("replicas", 1)
+    updated = status.get("updatedReplicas", 0)
+    available = status.get("availableReplicas", 0)
+    observed = status.get("observedGeneration", 0) >= metadata.get("generation", 0)
+    ready = observed and updated == replicas and available == replicas
+
+    message = None
+    progressing = _condition(obj, "Progressing")
+    failure = _condition(obj, "ReplicaFailure")
+    if failure and failure.get("status") == "True":
+        message = failure.get("message")
+    elif progressing and progressing.get("reason") == "ProgressDeadlineExceeded":
+        message = progressing.get("message")
+
+    return {
+        "name": metadata.get("name"),
+        "ready": ready,
+        "replicas": replicas,
+        "ready_replicas": status.get("readyReplicas", 0),
+        "updated_replicas": updated,
+        "available_replicas": available,
+        "message": message,
+    }
+
+
+def summarize_pod(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Phase, readiness and restart count of a Pod."""
+    metadata = obj.get("metadata") or {}
+    status = obj.get("status") or {}
+    containers = status.get("containerStatuses") or []
+    ready_condition = _condition(obj, "Ready")
+
+    # The first waiting/terminated reason explains a pod that is not ready
+    reason = None
+    for container in containers:
+        state = container.get("state") or {}
+        detail = state.get("waiting") or state.get("terminated")
+        if detail and detail.get("reason") not in (None, "Completed"):
+            reason = detail.get("reason")
+            break
+
+    return {
+        "name": metadata.get("name"),
+        "phase": status.get("phase"),
+        "ready": bool(ready_condition and ready_condition.get("status") == "True"),
+        "restarts": sum(c.get("restartCount", 0) for c in containers),
+        "reason": reason or status.get("reason"),
+        "app": (metadata.get("labels") or {}).get("app"),
+    }
+
+
+def summarize_clowdapp(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Readiness of a ClowdApp from its DeploymentsReady condition."""
+    metadata = obj.get("metadata") or {}
+    status = obj.get("status") or {}
+    deployments = status.get("deployments") or {}
+    condition = _condition(obj, "DeploymentsReady")
+    ready = bool(condition and condition.get("status") == "True")
+    return {
+        "name": metadata.get("name"),
+        "ready": ready,
+        "managed_deployments": deployments.get("managedDeployments", 0),
+        "ready_deployments": deployments.get("readyDeployments", 0),
+        "message": None if ready or condition is None else condition.get("message"),
+    }
+
+
+SUMMARIZERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "deployments": summarize_deployment,
+    "pods": summarize_pod,
+    "clowdapps": summarize_clowdapp,
+}
+
+
+class WatchExpiredError(Exception):
+    """Raised when a watch's resourceVersion is too old (410 Gone)."""
+
+
+class NamespaceWatcher:
+    """Incrementally updated deployment status of one namespace."""
+
+    def __init__(self, namespace: str, on_stop: Optional[Callable[[], None]] = None):
+        """
+        Initialize the watcher.
+
+        Args:
+            namespace: Namespace to watch
+            on_stop: Called when the watcher stops by itself
+        """
+        self.namespace = namespace
+        self.on_stop = on_stop
+        self.version = 0
+        self.updated_at: Optional[float] = None
+        self.last_used = time.time()
+        self.followers = 0
+        # kind -> object name -> summary
+        self._objects: Dict[str, Dict[str, Dict[str, Any]]] = {
+            kind.name: {} for kind in WATCHED_KINDS
+        }
+        self._synced: Dict[str, bool] = {kind.name: False for kind in WATCHED_KINDS}
+        self._errors: Dict[str, Optional[str]] = {}
+        self._unavailable: Dict[str, bool] = {}
+        # kind -> resourceVersion to watch from ("" = list first)
+        self._versions: Dict[str, str] = {}
+        self._changed = asyncio.Event()
+        self._synced_event = asyncio.Event()
+        self._task: "Optional[asyncio.Task[None]]" = None
+
+    @property
+    def synced(self) -> bool:
+        return all(self._synced.values())
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _touch(self) -> None:
+        self.version += 1
+        self.updated_at = time.time()
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _idle(self) -> bool:
+        return self.followers == 0 and time.time() - self.last_used > WATCH_IDLE
+
+    def _apply(self, kind: str, event_type: str, obj: Dict[str, Any]) -> bool:
+        """Apply a watch event; returns whether the status changed."""
+        name = (obj.get("metadata") or {}).get("name")
+        if not name:
+            return False
+        objects = self._objects[kind]
+        if event_type == "DELETED":
+            return objects.pop(name, None) is not None
+        summary = SUMMARIZERS[kind](obj)
+        if objects.get(name) == summary:
+            return False
+        objects[name] = summary
+        return True
+
+    async def _list(self, kind: WatchedKind) -> str:
+        """Replace the kind's objects with a fresh list; returns its version."""
+        ephemeral_session.require()
+        body = await ephemeral_api.get_json(
+            EPHEMERAL_CLUSTER_ID, kind.path(self.namespace)
+        )
+        objects = {}
+        for item in body.get("items") or []:
+            name = (item.get("metadata") or {}).get("name")
+            if name:
+                objects[name] = SUMMARIZERS[kind.name](item)
+        if objects != self._objects[kind.name] or not self._synced[kind.name]:
+            self._objects[kind.name] = objects
+            self._synced[kind.name] = True
+            if self.synced:
+                self._synced_event.set()
+            self._touch()
+        return str((body.get("metadata") or {}).get("resourceVersion") or "")
+
+    async def _watch(self, kind: WatchedKind) -> None:
+        """Follow one watch request from the kind's last seen version."""
+        ephemeral_session.require()
+        params = {
+            "watch": "1",
+            "resourceVersion": self._versions[kind.name],
+            "allowWatchBookmarks": "true",
+            "timeoutSeconds": str(WATCH_TIMEOUT),
+        }
+        timeout = httpx.Timeout(30.0, read=WATCH_TIMEOUT + 30.0)
+        async with ephemeral_api.stream(
+            EPHEMERAL_CLUSTER_ID,
+            "GET",
+            kind.path(self.namespace),
+            params=params,
+            timeout=timeout,
+        ) as response:
+            if response.status_code == 410:
+                raise WatchExpiredError()
+            if response.status_code >= 400:
+                await response.aread()
+                raise KubeAPIError(
+                    f"Watch of {kind.name} failed: {response.text[:200]}",
+                    status_code=response.status_code,
+                )
+            if self._errors.pop(kind.name, None):
+                self._touch()
+
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                event_type = event.get("type")
+                obj = event.get("object") or {}
+                if event_type == "ERROR":
+                    if obj.get("code") == 410:
+                        raise WatchExpiredError()
+                    raise KubeAPIError(
+                        f"Watch of {kind.name} failed: {obj.get('message')}",
+                        status_code=obj.get("code") or 502,
+                    )
+                version = (obj.get("metadata") or {}).get("resourceVersion")
+                if version:
+                    # Kept across reconnects so a dropped stream resumes here
+                    self._versions[kind.name] = version
+                if event_type != "BOOKMARK" and self._apply(kind.name, event_type, obj):
+                    self._touch()
+
+    async def _run(self, kind: WatchedKind) -> None:
+        delay = RETRY_DELAY
+        while True:
+            try:
+                if not self._versions.get(kind.name):
+                    self._versions[kind.name] = await self._list(kind)
+                await self._watch(kind)
+                delay = RETRY_DELAY
+                if self._idle():
+                    return
+                continue
+            except WatchExpiredError:
+                # Too far behind: list again, then watch from the new version
+                self._versions[kind.name] = ""
+                continue
+            except KubeAPIError as e:
+                if e.status_code == 404 and kind.optional:
+                    logger.info(f"{kind.name} are not available: {e}")
+                    self._unavailable[kind.name] = True
+                    self._synced[kind.name] = True
+                    if self.synced:
+                        self._synced_event.set()
+                    self._touch()
+                    return
+                if e.status_code == 401:
+                    ephemeral_api.forget(EPHEMERAL_CLUSTER_ID)
+                    ephemeral_session.mark_invalid()
+                self._errors[kind.name] = str(e)
+            except SessionExpiredError as e:
+                self._errors[kind.name] = str(e)
+            except (httpx.HTTPError, ValueError) as e:
+                # Dropped stream or a broken line; resume from the last version
+                self._errors[kind.name] = f"Watch of {kind.name} interrupted: {e}"
+
+            logger.warning(f"Watching {kind.name} in {self.namespace}: {delay}s retry")
+            self._touch()
+            if self._idle():
+                return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+
+    def start(self) -> None:
+        """Start listing and watching every kind."""
+        if self.running:
+            return
+
+        async def run_all() -> None:
+            try:
+                await asyncio.gather(*(self._run(kind) for kind in WATCHED_KINDS))
+            finally:
+                logger.info(f"Stopped watching namespace {self.namespace}")
+                if self.on_stop is not None:
+                    self.on_stop()
+
+        logger.info(f"Watching namespace {self.namespace}")
+        self._task = asyncio.create_task(run_all())
+
+    async def stop(self) -> None:
+        """Stop the watches."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def wait_synced(self, timeout: float) -> bool:
+        """Wait until every kind was listed once; returns whether it was."""
+        self.last_used = time.time()
+        try:
+            await asyncio.wait_for(self._synced_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.synced
+
+    def status(self) -> Dict[str, Any]:
+        """The current status model."""
+        self.last_used = time.time()
+        deployments = sorted(self._objects["deployments"].values(), key=_by_name)
+        pods = sorted(self._objects["pods"].values(), key=_by_name)
+        clowdapps = sorted(self._objects["clowdapps"].values(), key=_by_name)
+        # Pods of finished jobs do not count against readiness
+        active_pods = [p for p in pods if p["phase"] not in ("Succeeded", "Failed")]
+        ready = (
+            self.synced
+            and bool(deployments or clowdapps)
+            and all(d["ready"] for d in deployments)
+            and all(a["ready"] for a in clowdapps)
+        )
+        return {
+            "namespace": self.namespace,
+            "ready": ready,
+            "synced": self.synced,
+            "version": self.version,
+            "updated_at": self.updated_at,
+            "deployments_ready": sum(1 for d in deployments if d["ready"]),
+            "deployments_total": len(deployments),
+            "pods_ready": sum(1 for p in active_pods if p["ready"]),
+            "pods_total": len(active_pods),
+            "clowdapps_available": not self._unavailable.get("clowdapps", False),
+            "errors": [error for error in self._errors.values() if error],
+            "deployments": deployments,
+            "pods": pods,
+            "clowdapps": clowdapps,
+        }
+
+    async def follow(
+        self, idle: Optional[float] = None
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield the status now and after every change, until the watcher stops.
+
+        Changes within COALESCE_DELAY of each other are yielded once.
+
+        Args:
+            idle: Yield None after this many seconds without changes
+
+        Yields:
+            Status dicts, or None when idle
+        """
+        self.followers += 1
+        try:
+            version = -1
+            while True:
+                if self.version != version:
+                    version = self.version
+                    yield self.status()
+                if not self.running:
+                    return
+                changed = self._changed
+                try:
+                    await asyncio.wait_for(changed.wait(), idle)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                await asyncio.sleep(COALESCE_DELAY)
+        finally:
+            self.followers -= 1
+            self.last_used = time.time()
+
+
+def _by_name(summary: Dict[str, Any]) -> str:
+    return str(summary.get("name") or "")
+
+
+class DeployStatusWatchers:
+    """Registry of namespace watchers, started on first use."""
+
+    def __init__(self) -> None:
+        """Initialize the registry."""
+        self._watchers: Dict[str, NamespaceWatcher] = {}
+
+    def get(self, namespace: str) -> NamespaceWatcher:
+        """Get the namespace's watcher, starting it if needed."""
+        watcher = self._watchers.get(namespace)
+        if watcher is None or not watcher.running:
+
+            def forget() -> None:
+                if self._watchers.get(namespace) is watcher:
+                    del self._watchers[namespace]
+
+            watcher = NamespaceWatcher(namespace, on_stop=forget)
+            self._watchers[namespace] = watcher
+            watcher.start()
+        watcher.last_used = time.time()
+        return watcher
+
+    def list_watchers(self) -> List[Dict[str, Any]]:
+        """Describe the running watchers."""
+        return [
+            {
+                "namespace": watcher.namespace,
+                "synced": watcher.synced,
+                "version": watcher.version,
+                "followers": watcher.followers,
+                "last_used": watcher.last_used,
+            }
+            for watcher in self._watchers.values()
+        ]
+
+    async def stop_all(self) -> None:
+        """Stop every watcher."""
+        watchers = list(self._watchers.values())
+        self._watchers.clear()
+        await asyncio.gather(*(watcher.stop() for watcher in watchers))
+
+
+# Global instance
+deploy_watchers = DeployStatusWatchers()
@@ -2,64 +2,223 @@
 
 This module handles interactions with external Kubernetes instances
 where ephemeral pipelines are run (bonfire/OpenShift environments).
+
+All operations are async and run their helpers with
+``asyncio.create_subprocess_exec`` (through the process supervisor), so
+independent lookups can run concurrently without blocking the event loop.
+Every helper gets an explicit kubeconfig owned by the service and, where it
+applies, an explicit namespace; the user's current context is never changed.
+Secrets and routes are read directly from the cluster API over a pooled
+client instead of forking kubectl.
+
+Reads never log in: they check the cached session validity
+(``ephemeral_session``) and fail fast with SessionExpiredError while a
+background login renews it. Only extending a namespace may log in inline.
 """
 
+import asyncio
 import base64
-import json
 import logging
+import os
+import shutil
 import subprocess
-from typing import List, Optional, Tuple
-
-from fastapi import HTTPException
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from services.bonfire import (
+    BonfireWorkerError,
+    NamespaceReservation,
+    ReservationIndex,
+    bonfire_worker,
+    parse_namespace_list,
+    reservations_from_data,
+)
+from services.kube_api import KubeAPIClient, KubeAPIError
+from services.kube_session import ClusterSession, SessionExpiredError
+from services.kubeconfig import KubeconfigError, service_kubeconfigs
+from services.process_supervisor import process_supervisor
 
 logger = logging.getLogger(__name__)
 
+# Cluster ID of the ephemeral cluster in rhtoken.json
+EPHEMERAL_CLUSTER_ID = "e"
+
+# Default timeout in seconds for a single helper command
+COMMAND_TIMEOUT = 60.0
+
+# Seconds a namespace snapshot is served from cache
+SNAPSHOT_TTL = 60.0
+
+# Whether the installed bonfire supports `namespace list --output json`
+# (None until it has been tried)
+_bonfire_json: Optional[bool] = None
+
+
+def bonfire_path() -> str:
+    """Path of the bonfire CLI (pipx/pip --user install, else PATH)."""
+    local = os.path.expanduser("~/.local/bin/bonfire")
+    if os.path.exists(local):
+        return local
+    return shutil.which("bonfire") or local
 
-def run_command(cmd: str) -> Tuple[bool, str, str]:
+
+async def run_command(
+    args: Sequence[str],
+    timeout: float = COMMAND_TIMEOUT,
+    kubeconfig: Optional[str] = None,
+    on_stderr_line: Optional[Callable[[str], None]] = None,
+) -> Tuple[bool, str, str]:
     """
-    Execute a shell command and return results.
+    Execute a command (no shell) and return results.
 
     Args:
-        cmd: Command to execute
+        args: Program and arguments
+        timeout: Seconds before the command's process tree is killed
+        kubeconfig: Exported as KUBECONFIG for tools without a flag (bonfire)
+        on_stderr_line: Called with each stderr line as it is written
 
     Returns:
         Tuple of (success, stdout, stderr)
     """
+    env = dict(os.environ, KUBECONFIG=kubeconfig) if kubeconfig else None
     try:
-        proc = subprocess.Popen(
-            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True, text=True
+        result = await process_supervisor.run_async(
+            list(args), timeout=timeout, env=env, on_stderr_line=on_stderr_line
         )
-        stdout, stderr = proc.communicate()
-        success = proc.returncode == 0
+        success = result.returncode == 0
 
-        logger.debug(f"Command: {cmd}")
+        logger.debug(f"Command: {' '.join(args)}")
         logger.debug(f"Success: {success}")
-        logger.debug(f"Stdout: {stdout.strip()}")
-        if stderr:
-            logger.debug(f"Stderr: {stderr.strip()}")
+        logger.debug(f"Stdout: {result.stdout.strip()}")
+        if result.stderr:
+            logger.debug(f"Stderr: {result.stderr.strip()}")
 
-        return success, stdout.strip(), stderr.strip()
+        return success, result.stdout.strip(), result.stderr.strip()
 
+    except subprocess.TimeoutExpired:
+        logger.error(f"Command timed out after {timeout}s: {' '.join(args)}")
+        return False, "", f"Timed out after {timeout}s"
     except Exception as e:
         logger.error(f"Error executing command: {e}")
         return False, "", str(e)
 
 
-def set_namespace(namespace: str) -> bool:
+async def ephemeral_kubeconfig(headless: bool = True) -> Optional[str]:
     """
-    Set the current namespace/project for kubectl/oc.
+    Get the service's kubeconfig for the ephemeral cluster, logging in if needed.
+
+    The file is only re-authenticated (through rhtoken) when it is missing
+    or its token has expired. Only used for changes requested by the user;
+    reads use ``ephemeral_session.require()`` and never log in.
 
     Args:
-        namespace: Namespace to switch to
+        headless: Whether to use headless mode if a login is needed
 
     Returns:
-        True if successful, False otherwise
+        Path to the kubeconfig, or None if authentication failed
+    """
+    try:
+        entry, _ = await service_kubeconfigs.ensure(
+            EPHEMERAL_CLUSTER_ID, headless=headless
+        )
+        return entry.path
+    except KubeconfigError as e:
+        logger.error(f"Failed to authenticate to the ephemeral cluster: {e}")
+        return None
+
+
+# Pooled API client authenticated with the service's ephemeral kubeconfig
+ephemeral_api = KubeAPIClient(service_kubeconfigs)
+
+# Login validity of the service's ephemeral kubeconfig
+ephemeral_session = ClusterSession(
+    service_kubeconfigs, EPHEMERAL_CLUSTER_ID, ephemeral_api
+)
+
+
+async def read_api_object(path: str, params: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    GET an object from the ephemeral cluster API, raising on failure.
+
+    Args:
+        path: API path, e.g. /api/v1/namespaces/<ns>/secrets/<name>
+        params: Query parameters
+
+    Returns:
+        The decoded object
+
+    Raises:
+        SessionExpiredError: If the ephemeral cluster session is not valid
+        KubeAPIError: If the object could not be read (404 if it does not exist)
+    """
+    ephemeral_session.require()
+
+    try:
+        return await ephemeral_api.get_cached(EPHEMERAL_CLUSTER_ID, path, params)
+    except KubeAPIError as e:
+        if e.status_code == 401:
+            # The token was revoked before its expiry; renew it in the background
+            ephemeral_api.forget(EPHEMERAL_CLUSTER_ID)
+            ephemeral_session.mark_invalid()
+        raise
+
+
+async def get_api_object(
+    path: str, params: Optional[Dict[str, str]] = None
+) -> Optional[Dict]:
     """
-    success, _, _ = run_command(f"/usr/local/bin/oc project {namespace}")
-    return success
+    GET an object from the ephemeral cluster API.
+
+    Args:
+        path: API path, e.g. /api/v1/namespaces/<ns>/secrets/<name>
+        params: Query parameters
 
+    Returns:
+        The decoded object, or None if it could not be read
 
-def get_namespace_password(namespace: str) -> Optional[str]:
+    Raises:
+        SessionExpiredError: If the ephemeral cluster session is not valid
+    """
+    try:
+        return await read_api_object(path, params)
+    except KubeAPIError as e:
+        logger.error(f"Failed to get {path}: {e}")
+        return None
+
+
+def password_secret_path(namespace: str) -> str:
+    """API path of the namespace's Keycloak secret."""
+    return f"/api/v1/namespaces/{namespace}/secrets/env-{namespace}-keycloak"
+
+
+def decode_password(secret: Dict) -> Optional[str]:
+    """Decode the default password from a Keycloak secret."""
+    encoded_password = secret.get("data", {}).get("defaultPassword")
+    if not encoded_password:
+        return None
+    return base64.b64decode(encoded_password).decode("utf-8")
+
+
+def routes_path(namespace: str) -> str:
+    """API path of the namespace's routes."""
+    return f"/apis/route.openshift.io/v1/namespaces/{namespace}/routes"
+
+
+def route_host(route_list: Dict) -> Optional[str]:
+    """Host of the last route by name, as listed by `kubectl get route`."""
+    routes = sorted(
+        route_list.get("items", []),
+        key=lambda route: route.get("metadata", {}).get("name", ""),
+    )
+    if routes:
+        host: Optional[str] = routes[-1].get("spec", {}).get("host")
+        return host
+    return None
+
+
+async def get_namespace_password(namespace: str) -> Optional[str]:
     """
     Retrieve password for the given ephemeral namespace.
 
@@ -72,112 +231,155 @@ def get_namespace_password(namespace: str) -> Optional[str]:
         Password string or None if not found
     """
     try:
-        # Set the namespace context
-        if not set_namespace(namespace):
-            logger.error(f"Failed to set namespace to {namespace}")
-            return None
-
         # Get the Keycloak secret
-        success, stdout, stderr = run_command(
-            f'/usr/local/bin/kubectl get secret "env-{namespace}-keycloak" -o json'
-        )
-
-        if not success:
-            logger.error(f"Failed to get secret: {stderr}")
+        secret_data = await get_api_object(password_secret_path(namespace))
+        if secret_data is None:
             return None
 
-        # Parse the secret JSON
-        secret_data = json.loads(stdout)
-        encoded_password = secret_data.get("data", {}).get("defaultPassword")
-
-        if not encoded_password:
+        password = decode_password(secret_data)
+        if password is None:
             logger.error("defaultPassword not found in secret")
-            return None
-
-        # Decode the base64-encoded password
-        password = base64.b64decode(encoded_password).decode("utf-8")
         return password
 
+    except SessionExpiredError:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving namespace password: {e}")
         return None
 
 
-def get_namespace_list(username: str, headless: bool = True) -> Optional[List[str]]:
-    """
-    Get list of namespaces for a user from bonfire.
+def _check_unauthorized(message: str) -> None:
+    """Renew the session if bonfire/oc reported a rejected token."""
+    lowered = message.lower()
+    if "unauthorized" in lowered or "must be logged in" in lowered:
+        ephemeral_session.mark_invalid()
 
-    Args:
-        username: Username to search for
-        headless: Whether to use headless mode
 
-    Returns:
-        List of namespace info or None if error
+async def get_namespace_list() -> Optional[ReservationIndex]:
     """
-    try:
-        # Check if we're on the correct server
-        success, server, _ = run_command(
-            "/usr/local/bin/oc project | awk -F'\"' '{print $4}'"
-        )
+    Get every namespace in the ephemeral cluster from bonfire.
 
-        if (
-            success
-            and server != "https://api.c-rh-c-eph.8p0c.p1.openshiftapps.com:6443"
-        ):
-            # Need to login to ephemeral environment
-            headless_flag = "--headless" if headless else ""
-            subprocess.call(f"/usr/local/bin/rhtoken e {headless_flag}", shell=True)
+    Uses the persistent bonfire worker when bonfire is importable, otherwise
+    the CLI's JSON output when supported and its table if not.
 
-        # Get namespace list from bonfire
-        success, stdout, _ = run_command(
-            f"~/.local/bin/bonfire namespace list | grep {username}"
-        )
+    Returns:
+        ReservationIndex of all namespaces, or None if error
+
+    Raises:
+        SessionExpiredError: If the ephemeral cluster session is not valid
+    """
+    global _bonfire_json
 
-        if not success or not stdout:
+    try:
+        kubeconfig = ephemeral_session.require()
+
+        try:
+            data = await bonfire_worker.request(
+                "list", bonfire_path(), kubeconfig, COMMAND_TIMEOUT
+            )
+            return ReservationIndex(reservations_from_data(data), source="worker")
+        except BonfireWorkerError as e:
+            _check_unauthorized(str(e))
+            if bonfire_worker.unavailable is None:
+                logger.warning(f"bonfire worker failed, using the CLI: {e}")
+
+        args = [bonfire_path(), "namespace", "list"]
+        if _bonfire_json is not False:
+            success, stdout, stderr = await run_command(
+                args + ["--output", "json"], kubeconfig=kubeconfig
+            )
+            if success:
+                _bonfire_json = True
+                return parse_namespace_list(stdout)
+            if "no such option" not in stderr.lower():
+                _check_unauthorized(stderr)
+                logger.error(f"Failed to list namespaces: {stderr}")
+                return None
+            _bonfire_json = False
+
+        success, stdout, stderr = await run_command(args, kubeconfig=kubeconfig)
+        if not success:
+            _check_unauthorized(stderr)
+            logger.error(f"Failed to list namespaces: {stderr}")
             return None
 
-        return stdout.split()
+        return parse_namespace_list(stdout)
 
+    except SessionExpiredError:
+        raise
     except Exception as e:
         logger.error(f"Error getting namespace list: {e}")
         return None
 
 
-def get_namespace_name(username: str, headless: bool = True) -> Optional[str]:
-    """
-    Get the name of the user's namespace.
+class NamespaceListError(Exception):
+    """Raised when the bonfire namespace listing could not be fetched."""
 
-    Args:
-        username: Username
-        headless: Whether to use headless mode
 
-    Returns:
-        Namespace name or None
+class NamespaceListCache:
     """
-    namespace_list = get_namespace_list(username, headless)
-    if namespace_list and len(namespace_list) > 0:
-        return namespace_list[0]
-    return None
-
+    Shared cache of the parsed bonfire namespace listing.
 
-def get_namespace_expires(username: str, headless: bool = True) -> Optional[str]:
+    The listing covers every user, so it is fetched and parsed once per
+    `ttl` and shared by all users' snapshots; concurrent callers share one
+    bonfire run.
     """
-    Get the expiration date of the namespace.
 
-    Args:
-        username: Username
-        headless: Whether to use headless mode
+    def __init__(self, ttl: float = SNAPSHOT_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a listing is served before it is fetched again
+        """
+        self.ttl = ttl
+        self._index: Optional[ReservationIndex] = None
+        self._task: "Optional[asyncio.Task[Optional[ReservationIndex]]]" = None
+        self._task_started_at = 0.0
+
+    async def get(self, since: float = 0.0) -> Optional[ReservationIndex]:
+        """
+        Get the namespace listing, fetching it if stale.
+
+        Args:
+            since: Ignore listings (and fetches) started before this time
+
+        Returns:
+            ReservationIndex, or None if bonfire failed
+        """
+        index = self._index
+        if (
+            index is not None
+            and index.fetched_at >= since
+            and time.time() - index.fetched_at < self.ttl
+        ):
+            return index
 
-    Returns:
-        Expiration timestamp or None
-    """
-    namespace_list = get_namespace_list(username, headless)
-    if namespace_list and len(namespace_list) > 6:
-        return namespace_list[6]
-    return None
+        if self._task is None or self._task.done() or self._task_started_at < since:
+            started_at = time.time()
+
+            async def run() -> Optional[ReservationIndex]:
+                index = await get_namespace_list()
+                if index is not None:
+                    index.fetched_at = started_at
+                    self._index = index
+                return index
+
+            self._task = asyncio.create_task(run())
+            self._task_started_at = started_at
+
+        return await asyncio.shield(self._task)
+
+    def invalidate(self) -> None:
+        """Drop the cached listing."""
+        self._index = None
 
 
-def get_namespace_route(namespace: str) -> Optional[str]:
+# Global instance
+namespace_list_cache = NamespaceListCache()
+
+
+async def get_namespace_route(namespace: str) -> Optional[str]:
     """
     Get the route/URL for the namespace.
 
@@ -188,40 +390,57 @@ def get_namespace_route(namespace: str) -> Optional[str]:
         Route URL or None
     """
     try:
-        # Set the namespace context
-        if not set_namespace(namespace):
-            logger.error(f"Failed to set namespace to {namespace}")
+        route_list = await get_api_object(routes_path(namespace))
+        if not route_list:
             return None
+        return route_host(route_list)
 
-        # Get the route from the namespace
-        success, route, _ = run_command(
-            "/usr/local/bin/kubectl get route 2>/dev/null | tail -n 1 | awk '{print $2}'"
-        )
-
-        if success and route:
-            return route
-
-        return None
-
+    except SessionExpiredError:
+        raise
     except Exception as e:
         logger.error(f"Error getting namespace route: {e}")
         return None
 
 
-def extend_namespace(namespace: str, duration: str = "72h") -> bool:
+async def extend_namespace(
+    namespace: str, duration: str = "72h", headless: bool = True
+) -> bool:
     """
     Extend the duration of an ephemeral namespace.
 
     Args:
         namespace: Namespace to extend
         duration: Duration to extend (e.g., '72h', '48h')
+        headless: Whether to use headless mode if a login is needed
 
     Returns:
         True if successful, False otherwise
     """
     try:
-        success, _, stderr = run_command(
-            f"bonfire namespace extend {namespace} -d {duration}"
+        kubeconfig = await ephemeral_kubeconfig(headless)
+        if kubeconfig is None:
+            return False
+
+        try:
+            await bonfire_worker.request(
+                "extend",
+                bonfire_path(),
+                kubeconfig,
+                COMMAND_TIMEOUT,
+                namespace=namespace,
+                duration=duration,
+            )
+            logger.info(f"Extended namespace {namespace} by {duration}")
+            return True
+        except BonfireWorkerError as e:
+            if bonfire_worker.unavailable is None:
+                # Not retried with the CLI: the extension may have applied
+                logger.error(f"Failed to extend namespace: {e}")
+                return False
+
+        success, _, stderr = await run_command(
+            [bonfire_path(), "namespace", "extend", namespace, "-d", duration],
+            kubeconfig=kubeconfig,
         )
 
         if not success:
@@ -234,3 +453,486 @@ def extend_namespace(namespace: str, duration: str = "72h") -> bool:
     except Exception as e:
         logger.error(f"Error extending namespace: {e}")
         return False
+
+
+async def release_namespace(namespace: str, headless: bool = True) -> bool:
+    """
+    Release an ephemeral namespace reservation.
+
+    Args:
+        namespace: Namespace to release
+        headless: Whether to use headless mode if a login is needed
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        kubeconfig = await ephemeral_kubeconfig(headless)
+        if kubeconfig is None:
+            return False
+
+        success, _, stderr = await run_command(
+            [bonfire_path(), "namespace", "release", namespace, "--force"],
+            kubeconfig=kubeconfig,
+        )
+        if not success:
+            logger.error(f"Failed to release namespace: {stderr}")
+            return False
+
+        # Every snapshot holding the namespace is now stale
+        namespace_cache.invalidate()
+        logger.info(f"Released namespace {namespace}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error releasing namespace: {e}")
+        return False
+
+
+@dataclass
+class NamespaceSnapshot:
+    """Everything known about a user's namespace reservations at one time."""
+
+    username: str
+    # In listing order; the first is the user's primary namespace
+    reservations: List[NamespaceReservation] = field(default_factory=list)
+    # Route of the primary namespace
+    route: Optional[str] = None
+    fetched_at: float = field(default_factory=time.time)
+
+    @property
+    def primary(self) -> Optional[NamespaceReservation]:
+        return self.reservations[0] if self.reservations else None
+
+    @property
+    def exists(self) -> bool:
+        return self.primary is not None
+
+    @property
+    def name(self) -> Optional[str]:
+        return self.primary.name if self.primary else None
+
+    @property
+    def expires(self) -> Optional[str]:
+        return self.primary.expires_in if self.primary else None
+
+    @property
+    def state(self) -> Optional[str]:
+        return self.primary.status if self.primary else None
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.primary.fields) if self.primary else []
+
+
+@dataclass
+class _Refresh:
+    """An in-flight snapshot refresh shared by concurrent callers."""
+
+    started_at: float
+    task: "asyncio.Task[NamespaceSnapshot]"
+    # Resolved with the namespace name as soon as the listing is parsed
+    name: "asyncio.Future[Optional[str]]"
+
+
+async def fetch_namespace_snapshot(
+    username: str,
+    name_found: "Optional[asyncio.Future[Optional[str]]]" = None,
+    since: float = 0.0,
+) -> NamespaceSnapshot:
+    """
+    Look up a user's namespace reservations and the primary one's route.
+
+    Args:
+        username: Username
+        name_found: Optional future resolved with the namespace name before
+            the route is looked up
+        since: Ignore namespace listings fetched before this time
+
+    Returns:
+        NamespaceSnapshot (name is None if the user has no reservation)
+
+    Raises:
+        NamespaceListError: If bonfire failed to list the namespaces
+        SessionExpiredError: If the ephemeral cluster session is not valid
+    """
+    index = await namespace_list_cache.get(since)
+    if index is None:
+        # A failed listing must not look like "no reservation"
+        raise NamespaceListError("Failed to list ephemeral namespaces")
+
+    reservations = index.for_requester(username)
+    snapshot = NamespaceSnapshot(username=username, reservations=reservations)
+
+    if name_found is not None and not name_found.done():
+        name_found.set_result(snapshot.name)
+
+    if snapshot.name:
+        snapshot.route = await get_namespace_route(snapshot.name)
+
+    return snapshot
+
+
+class NamespaceSnapshotCache:
+    """
+    Per-user cache of namespace snapshots.
+
+    Snapshots are served for `ttl` seconds. Concurrent requests for the same
+    user share a single refresh instead of each running bonfire, and a
+    refresh keeps running if the request that started it gives up.
+    """
+
+    def __init__(self, ttl: float = SNAPSHOT_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a snapshot is served before it is refreshed
+        """
+        self.ttl = ttl
+        self._snapshots: Dict[str, NamespaceSnapshot] = {}
+        self._refreshes: Dict[str, _Refresh] = {}
+
+    def _fresh(self, username: str, since: float = 0.0) -> Optional[NamespaceSnapshot]:
+        snapshot = self._snapshots.get(username)
+        if snapshot is None or snapshot.fetched_at < since:
+            return None
+        if time.time() - snapshot.fetched_at >= self.ttl:
+            return None
+        return snapshot
+
+    def _refresh(self, username: str, since: float) -> _Refresh:
+        refresh = self._refreshes.get(username)
+        if refresh is not None and refresh.started_at >= since:
+            return refresh
+
+        loop = asyncio.get_running_loop()
+        name: "asyncio.Future[Optional[str]]" = loop.create_future()
+        started_at = time.time()
+
+        async def run() -> NamespaceSnapshot:
+            try:
+                snapshot = await fetch_namespace_snapshot(username, name, since)
+                self._snapshots[username] = snapshot
+                logger.debug(f"Refreshed namespace snapshot for {username}")
+                return snapshot
+            finally:
+                if self._refreshes.get(username) is refresh:
+                    del self._refreshes[username]
+
+        refresh = _Refresh(started_at, asyncio.create_task(run()), name)
+        self._refreshes[username] = refresh
+        return refresh
+
+    async def get(self, username: str, force: bool = False) -> NamespaceSnapshot:
+        """
+        Get a user's namespace snapshot, refreshing it if stale.
+
+        Args:
+            username: Username
+            force: Ignore snapshots (and refreshes) started before this call
+
+        Returns:
+            NamespaceSnapshot
+
+        Raises:
+            NamespaceListError: If bonfire failed to list the namespaces
+            SessionExpiredError: If the ephemeral cluster session is not valid
+        """
+        since = time.time() if force else 0.0
+        snapshot = self._fresh(username, since)
+        if snapshot is not None:
+            return snapshot
+
+        refresh = self._refresh(username, since)
+        # Shield the shared refresh from this caller's cancellation/deadline
+        return await asyncio.shield(refresh.task)
+
+    async def get_name(self, username: str) -> Optional[str]:
+        """
+        Get the user's namespace name as soon as it is known.
+
+        Returns before the rest of the snapshot (e.g. the route) is fetched,
+        so dependent lookups can start early.
+
+        Raises:
+            NamespaceListError: If bonfire failed to list the namespaces
+            SessionExpiredError: If the ephemeral cluster session is not valid
+        """
+        snapshot = self._fresh(username)
+        if snapshot is not None:
+            return snapshot.name
+
+        refresh = self._refresh(username, 0.0)
+        # Neither is cancelled with this caller; the name is never resolved
+        # if the refresh fails
+        waits: "List[asyncio.Future[Any]]" = [refresh.name, refresh.task]
+        await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+        if not refresh.name.done():
+            refresh.task.result()
+        return refresh.name.result()
+
+    def invalidate(self, username: Optional[str] = None) -> int:
+        """
+        Drop cached snapshots and the shared namespace listing.
+
+        Args:
+            username: User to drop; all users if None
+
+        Returns:
+            Number of snapshots dropped
+        """
+        namespace_list_cache.invalidate()
+        if username is None:
+            count = len(self._snapshots)
+            self._snapshots.clear()
+            return count
+        return 1 if self._snapshots.pop(username, None) else 0
+
+
+# Global instance
+namespace_cache = NamespaceSnapshotCache()
+
+
+async def get_namespace_name(username: str) -> Optional[str]:
+    """
+    Get the name of the user's namespace.
+
+    Args:
+        username: Username
+
+    Returns:
+        Namespace name or None
+    """
+    return await namespace_cache.get_name(username)
+
+
+async def get_namespace_expires(username: str) -> Optional[str]:
+    """
+    Get the expiration date of the namespace.
+
+    Args:
+        username: Username
+
+    Returns:
+        Expiration timestamp or None
+    """
+    return (await namespace_cache.get(username)).expires
+
+
+# Namespaces worked on at once by batch operations (default and maximum)
+BATCH_CONCURRENCY = 4
+MAX_BATCH_CONCURRENCY = 16
+
+
+@dataclass
+class NamespaceResult:
+    """Outcome of a batch operation for one namespace."""
+
+    name: str
+    reservation: Optional[NamespaceReservation] = None
+    route: Optional[str] = None
+    password: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def select_namespaces(
+    index: ReservationIndex,
+    names: Optional[Sequence[str]] = None,
+    requester: Optional[str] = None,
+) -> List[NamespaceResult]:
+    """
+    Pick the namespaces of a batch operation from a listing.
+
+    Args:
+        index: Namespace listing
+        names: Namespaces to include, in order (duplicates are dropped)
+        requester: Include this user's reservations when no names are given
+
+    Returns:
+        One result per namespace; unlisted names already carry an error
+    """
+    if not names:
+        reservations = index.for_requester(requester) if requester else []
+        return [NamespaceResult(r.name, reservation=r) for r in reservations]
+
+    results = []
+    for name in dict.fromkeys(names):
+        reservation = index.get(name)
+        error = None if reservation else "Namespace not found in bonfire listing"
+        results.append(NamespaceResult(name, reservation=reservation, error=error))
+    return results
+
+
+async def run_limited(
+    funcs: Sequence[Callable[[], Awaitable[None]]], concurrency: int
+) -> None:
+    """Await the coroutine functions with at most `concurrency` running."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(func: Callable[[], Awaitable[None]]) -> None:
+        async with semaphore:
+            await func()
+
+    await asyncio.gather(*(run(func) for func in funcs))
+
+
+async def inspect_namespaces(
+    names: Optional[Sequence[str]] = None,
+    requester: Optional[str] = None,
+    include_password: bool = False,
+    include_route: bool = False,
+    concurrency: int = BATCH_CONCURRENCY,
+) -> List[NamespaceResult]:
+    """
+    Describe several namespaces from one listing snapshot.
+
+    Passwords and routes are read concurrently, at most `concurrency`
+    namespaces at a time; a failed read is reported on its namespace.
+
+    Args:
+        names: Namespaces to describe
+        requester: Describe this user's reservations when no names are given
+        include_password: Read each namespace's password
+        include_route: Read each namespace's route
+        concurrency: Maximum namespaces read at once
+
+    Returns:
+        One result per namespace
+
+    Raises:
+        NamespaceListError: If bonfire failed to list the namespaces
+        SessionExpiredError: If the ephemeral cluster session is not valid
+    """
+    index = await namespace_list_cache.get()
+    if index is None:
+        raise NamespaceListError("Failed to list ephemeral namespaces")
+    results = select_namespaces(index, names, requester)
+
+    async def lookup(result: NamespaceResult) -> None:
+        errors = []
+        if include_route:
+            try:
+                result.route = route_host(
+                    await read_api_object(routes_path(result.name))
+                )
+            except KubeAPIError as e:
+                if e.status_code != 404:
+                    errors.append(f"route: {e}")
+        if include_password:
+            try:
+                secret = await read_api_object(password_secret_path(result.name))
+                result.password = decode_password(secret)
+            except KubeAPIError as e:
+                if e.status_code != 404:
+                    errors.append(f"password: {e}")
+        if errors:
+            result.error = "; ".join(errors)
+
+    if include_route or include_password:
+        await run_limited(
+            [partial(lookup, r) for r in results if r.ok],
+            min(concurrency, MAX_BATCH_CONCURRENCY),
+        )
+    return results
+
+
+async def _extend_with_cli(
+    namespaces: List[str], duration: str, kubeconfig: str, concurrency: int
+) -> Dict[str, Optional[str]]:
+    errors: Dict[str, Optional[str]] = {}
+
+    async def extend(namespace: str) -> None:
+        success, _, stderr = await run_command(
+            [bonfire_path(), "namespace", "extend", namespace, "-d", duration],
+            kubeconfig=kubeconfig,
+        )
+        errors[namespace] = None if success else (stderr.strip() or "bonfire failed")
+
+    await run_limited([partial(extend, ns) for ns in namespaces], concurrency)
+    return errors
+
+
+async def extend_namespaces(
+    names: Optional[Sequence[str]] = None,
+    requester: Optional[str] = None,
+    duration: str = "72h",
+    headless: bool = True,
+    concurrency: int = BATCH_CONCURRENCY,
+) -> List[NamespaceResult]:
+    """
+    Extend several namespaces, at most `concurrency` at a time.
+
+    All extensions go to one bonfire worker request (or concurrent CLI runs
+    without the worker); afterwards the listing is fetched once to report
+    each namespace's new expiry.
+
+    Args:
+        names: Namespaces to extend
+        requester: Extend this user's reservations when no names are given
+        duration: Duration to extend each by (e.g., '72h')
+        headless: Whether to use headless mode if a login is needed
+        concurrency: Maximum extensions run at once
+
+    Returns:
+        One result per namespace
+
+    Raises:
+        NamespaceListError: If bonfire failed to list the namespaces
+        SessionExpiredError: If the ephemeral cluster session is not valid
+    """
+    index = await namespace_list_cache.get()
+    if index is None:
+        raise NamespaceListError("Failed to list ephemeral namespaces")
+    results = select_namespaces(index, names, requester)
+    for result in results:
+        if result.reservation is not None and not result.reservation.reserved:
+            result.error = "Namespace is not reserved"
+    pending = [r.name for r in results if r.ok]
+    if not pending:
+        return results
+
+    concurrency = max(1, min(concurrency, MAX_BATCH_CONCURRENCY))
+    kubeconfig = await ephemeral_kubeconfig(headless)
+    if kubeconfig is None:
+        for result in results:
+            if result.ok:
+                result.error = "Failed to authenticate to the ephemeral cluster"
+        return results
+
+    errors: Dict[str, Optional[str]]
+    rounds = -(-len(pending) // concurrency)
+    try:
+        errors = await bonfire_worker.request(
+            "extend_many",
+            bonfire_path(),
+            kubeconfig,
+            COMMAND_TIMEOUT * rounds,
+            namespaces=pending,
+            duration=duration,
+            concurrency=concurrency,
+        )
+    except BonfireWorkerError as e:
+        if bonfire_worker.unavailable is None:
+            # Not retried with the CLI: some extensions may have applied
+            logger.error(f"Failed to extend namespaces: {e}")
+            errors = {name: str(e) for name in pending}
+        else:
+            errors = await _extend_with_cli(pending, duration, kubeconfig, concurrency)
+
+    # Expiries changed for every user holding one of the namespaces
+    namespace_cache.invalidate()
+    updated = await namespace_list_cache.get(since=time.time())
+    for result in results:
+        if result.name in errors:
+            result.error = errors[result.name]
+        if updated is not None and updated.get(result.name) is not None:
+            result.reservation = updated.get(result.name)
+
+    extended = sum(1 for name in pending if errors.get(name) is None)
+    logger.info(f"Extended {extended}/{len(pending)} namespaces by {duration}")
+    return results
@@ -0,0 +1,395 @@
+"""Background jobs for long-running ephemeral namespace operations.
+
+Reserving a namespace (and optionally deploying apps into it and waiting
+for its resources) takes minutes, so it runs as a job: the request returns
+a job ID at once, the stages run in a background task, and clients follow
+the job's progress events or cancel it. Each bonfire stage runs the CLI
+(not the bonfire worker, whose requests are serialized) and its log lines
+are reported as they are written.
+"""
+
+import asyncio
+import logging
+import re
+import secrets
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from services.ephemeral import (
+    bonfire_path,
+    ephemeral_kubeconfig,
+    get_namespace_password,
+    namespace_cache,
+    release_namespace,
+    run_command,
+)
+
+logger = logging.getLogger(__name__)
+
+# Events kept per job; older log lines are dropped first
+MAX_EVENTS = 2000
+
+# Finished jobs are kept this long (seconds) and at most this many
+JOB_RETENTION = 3600.0
+MAX_FINISHED_JOBS = 50
+
+# Extra seconds a bonfire stage may run past its own --timeout
+STAGE_GRACE = 60.0
+
+NAMESPACE_NAME = re.compile(r"^[a-z0-9]([-a-z0-9]*[a-z0-9])?$")
+
+
+class JobStageError(Exception):
+    """Raised when a stage of a job fails."""
+
+
+@dataclass
+class ReserveOptions:
+    """What a reserve job does."""
+
+    duration: str = "24h"
+    pool: Optional[str] = None
+    # Apps to deploy into the namespace once reserved
+    apps: List[str] = field(default_factory=list)
+    # Wait for the namespace's resources to be ready (deploying waits itself)
+    wait: bool = True
+    # bonfire --timeout of each stage, in seconds
+    timeout: int = 600
+    # Release the namespace if the job is cancelled after reserving it
+    release_on_cancel: bool = True
+    headless: bool = True
+
+
+class Job:
+    """A background namespace operation and its progress events."""
+
+    def __init__(self, kind: str, username: str, options: ReserveOptions):
+        """
+        Initialize the job.
+
+        Args:
+            kind: Operation, e.g. "reserve"
+            username: User the job runs for
+            options: Operation options
+        """
+        self.id = secrets.token_hex(8)
+        self.kind = kind
+        self.username = username
+        self.options = options
+        self.state = "running"
+        self.stage: Optional[str] = None
+        self.namespace: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: "Optional[asyncio.Task[None]]" = None
+        self._events: List[Dict[str, Any]] = []
+        self._dropped = 0
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.state != "running"
+
+    @property
+    def last_seq(self) -> int:
+        return self._dropped + len(self._events)
+
+    def emit(self, type: str, **data: Any) -> None:
+        """Record a progress event and wake up followers."""
+        event = {
+            "seq": self.last_seq + 1,
+            "time": time.time(),
+            "type": type,
+            "stage": self.stage,
+            **data,
+        }
+        self._events.append(event)
+        if len(self._events) > MAX_EVENTS:
+            # Keep stage changes; drop the oldest log line
+            for i, old in enumerate(self._events):
+                if old["type"] == "log":
+                    del self._events[i]
+                    break
+            else:
+                del self._events[0]
+            self._dropped += 1
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def start_stage(self, stage: str, message: str) -> None:
+        self.stage = stage
+        logger.info(f"Job {self.id} ({self.username}): {message}")
+        self.emit("stage", message=message)
+
+    def finish(self, state: str, error: Optional[str] = None) -> None:
+        self.state = state
+        self.error = error
+        self.finished_at = time.time()
+        self.emit("done", state=state, namespace=self.namespace, error=error)
+
+    async def follow(
+        self, after: int = 0, idle: Optional[float] = None
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield the job's events after sequence number `after` as they happen.
+
+        Ends after the final "done" event.
+
+        Args:
+            after: Last sequence number the caller has seen
+            idle: Yield None after this many seconds without events
+
+        Yields:
+            Event dicts, or None when idle
+        """
+        while True:
+            for event in list(self._events):
+                if event["seq"] > after:
+                    after = event["seq"]
+                    yield event
+            if self.finished:
+                return
+            changed = self._changed
+            try:
+                await asyncio.wait_for(changed.wait(), idle)
+            except asyncio.TimeoutError:
+                yield None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Describe the job (without its events)."""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "state": self.state,
+            "stage": self.stage,
+            "namespace": self.namespace,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "last_seq": self.last_seq,
+            "options": asdict(self.options),
+        }
+
+
+async def _bonfire_stage(job: Job, args: List[str], kubeconfig: str) -> str:
+    """Run a bonfire command, reporting its log lines; returns its stdout."""
+
+    def log(line: str) -> None:
+        if line:
+            job.emit("log", line=line)
+
+    success, stdout, stderr = await run_command(
+        [bonfire_path()] + args,
+        timeout=job.options.timeout + STAGE_GRACE,
+        kubeconfig=kubeconfig,
+        on_stderr_line=log,
+    )
+    if not success:
+        lines = stderr.strip().splitlines()
+        raise JobStageError(lines[-1] if lines else f"bonfire {args[0]} failed")
+    return stdout
+
+
+async def _reserve(job: Job, args: List[str], kubeconfig: str) -> str:
+    """
+    Run the reserve stage and record the reserved namespace on the job.
+
+    bonfire may have reserved a namespace before the job is cancelled, and
+    its name is only known once bonfire returns. So unless the job must not
+    release on cancel (service shutdown), the stage is let finish and the
+    cancellation is raised afterwards, with the namespace known to release.
+
+    Returns:
+        The reserved namespace
+    """
+    stage = asyncio.create_task(_bonfire_stage(job, args, kubeconfig))
+    cancelled = False
+    while not stage.done():
+        try:
+            # Unlike awaiting the stage, a cancelled wait leaves it running
+            await asyncio.wait([stage])
+        except asyncio.CancelledError:
+            if not job.options.release_on_cancel:
+                job.emit("cancel", message="Stopping bonfire without releasing")
+                stage.cancel()
+                raise
+            if not cancelled:
+                job.emit(
+                    "cancel",
+                    message="Cancelled while reserving; releasing the "
+                    "namespace once bonfire returns",
+                )
+            cancelled = True
+
+    try:
+        stdout = stage.result()
+    except JobStageError as e:
+        if cancelled:
+            job.emit("log", line=f"No namespace to release: {e}")
+            raise asyncio.CancelledError()
+        raise
+    lines = stdout.strip().splitlines()
+    name = lines[-1].strip() if lines else ""
+    if not NAMESPACE_NAME.match(name):
+        raise JobStageError(f"Unexpected bonfire reserve output: {stdout!r}")
+    job.namespace = name
+    job.emit("namespace", namespace=name)
+    # The listing now has a new reservation for the user
+    namespace_cache.invalidate(job.username)
+
+    if cancelled:
+        raise asyncio.CancelledError()
+    return name
+
+
+async def _warm(job: Job) -> None:
+    """Prefetch the user's namespace snapshot and the namespace password."""
+    assert job.namespace is not None
+    try:
+        namespace_cache.invalidate(job.username)
+        await namespace_cache.get(job.username, force=True)
+        if await get_namespace_password(job.namespace) is None:
+            job.emit("log", line="Namespace password is not available yet")
+    except Exception as e:
+        # The namespace is ready; a cold cache only slows the next request
+        job.emit("log", line=f"Could not prefetch namespace details: {e}")
+
+
+async def run_reserve(job: Job) -> None:
+    """
+    Reserve a namespace, then deploy apps, wait for it and warm the caches.
+
+    Never raises: the outcome is recorded on the job.
+    """
+    options = job.options
+    try:
+        job.start_stage("authenticate", "Checking the ephemeral cluster login")
+        kubeconfig = await ephemeral_kubeconfig(options.headless)
+        if kubeconfig is None:
+            raise JobStageError("Failed to authenticate to the ephemeral cluster")
+
+        job.start_stage("reserve", f"Reserving a namespace for {options.duration}")
+        args = ["namespace", "reserve", "--duration", options.duration]
+        args += ["--timeout", str(options.timeout)]
+        if options.pool:
+            args += ["--pool", options.pool]
+        name = await _reserve(job, args, kubeconfig)
+
+        if options.apps:
+            job.start_stage("deploy", f"Deploying {', '.join(options.apps)}")
+            args = ["deploy", *options.apps, "--namespace", name]
+            args += ["--timeout", str(options.timeout)]
+            await _bonfire_stage(job, args, kubeconfig)
+        elif options.wait:
+            job.start_stage("wait", f"Waiting for resources in {name}")
+            args = ["namespace", "wait-on-resources", name]
+            args += ["--timeout", str(options.timeout)]
+            await _bonfire_stage(job, args, kubeconfig)
+
+        job.start_stage("warm", "Prefetching namespace details")
+        await _warm(job)
+        job.finish("succeeded")
+
+    except asyncio.CancelledError:
+        if job.namespace and options.release_on_cancel:
+            job.start_stage("release", f"Releasing {job.namespace}")
+            if not await release_namespace(job.namespace, options.headless):
+                job.emit("log", line=f"Failed to release {job.namespace}")
+        job.finish("cancelled", "Cancelled")
+    except JobStageError as e:
+        logger.error(f"Job {job.id} failed in stage {job.stage}: {e}")
+        job.finish("failed", str(e))
+    except Exception as e:
+        logger.error(f"Job {job.id} failed in stage {job.stage}: {e}")
+        job.finish("failed", f"Unexpected error: {e}")
+
+
+class JobManager:
+    """Registry of background namespace jobs."""
+
+    def __init__(self) -> None:
+        """Initialize the registry."""
+        self._jobs: Dict[str, Job] = {}
+
+    def _prune(self) -> None:
+        now = time.time()
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished_at is not None),
+            key=lambda job: job.finished_at or 0.0,
+        )
+        for i, job in enumerate(finished):
+            too_many = len(finished) - i > MAX_FINISHED_JOBS
+            if too_many or now - (job.finished_at or now) > JOB_RETENTION:
+                del self._jobs[job.id]
+
+    def start_reserve(self, username: str, options: ReserveOptions) -> Job:
+        """
+        Start a reserve job in the background.
+
+        Args:
+            username: User reserving the namespace
+            options: What to reserve, deploy and wait for
+
+        Returns:
+            The started job
+        """
+        self._prune()
+        job = Job("reserve", username, options)
+        job.task = asyncio.create_task(run_reserve(job))
+
+        def on_done(task: "asyncio.Task[None]") -> None:
+            # A job cancelled before (or while) handling its cancellation
+            if not job.finished:
+                job.finish("cancelled", "Cancelled")
+
+        job.task.add_done_callback(on_done)
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str, username: Optional[str] = None) -> Optional[Job]:
+        """Get a job, optionally only if it belongs to the user."""
+        job = self._jobs.get(job_id)
+        if job is None or (username is not None and job.username != username):
+            return None
+        return job
+
+    def list_jobs(self, username: Optional[str] = None) -> List[Job]:
+        """Jobs of a user (all users if None), newest first."""
+        self._prune()
+        jobs = [j for j in self._jobs.values() if username in (None, j.username)]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def active(self, username: str, kind: str = "reserve") -> Optional[Job]:
+        """The user's running job of a kind, if any."""
+        for job in self._jobs.values():
+            if job.username == username and job.kind == kind and not job.finished:
+                return job
+        return None
+
+    def cancel(self, job: Job) -> bool:
+        """
+        Cancel a running job.
+
+        Returns:
+            True if the job was running
+        """
+        if job.finished or job.task is None:
+            return False
+        job.task.cancel()
+        return True
+
+    async def stop(self) -> None:
+        """Cancel running jobs without releasing their namespaces."""
+        tasks = []
+        for job in self._jobs.values():
+            if not job.finished and job.task is not None:
+                job.options.release_on_cancel = False
+                job.task.cancel()
+                tasks.append(job.task)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Global instance
+ephemeral_jobs = JobManager()
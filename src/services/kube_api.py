@@ -0,0 +1,335 @@
+"""Shared Kubernetes API client.
+
+Keeps one pooled HTTP client per cluster API server (HTTP/2 when the h2
+package is installed, keep-alive otherwise) and authenticates each request
+with the token from the cluster's kubeconfig, so repeated calls reuse warm
+connections instead of doing a TLS handshake over the VPN every time.
+"""
+
+import base64
+import logging
+import ssl
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+from services.kubeconfig import (
+    KubeconfigEntry,
+    KubeconfigRegistry,
+    kubeconfig_registry,
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_TIMEOUT = 30.0
+
+# Idle upstream connections are kept this long (seconds)
+KEEPALIVE_EXPIRY = 300.0
+
+TimeoutTypes = Union[float, httpx.Timeout, None]
+
+
+class KubeAPIError(Exception):
+    """Raised when a Kubernetes API request cannot be made or fails."""
+
+    def __init__(self, message: str, status_code: int = 502):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class CachedObject:
+    """A cached API object and the validators it was returned with."""
+
+    body: Dict[str, Any]
+    resource_version: Optional[str]
+    etag: Optional[str]
+    hits: int = 0
+
+
+def _raise_for_status(response: httpx.Response) -> None:
+    if response.status_code >= 400:
+        try:
+            message = response.json().get("message") or response.text
+        except ValueError:
+            message = response.text
+        raise KubeAPIError(message, status_code=response.status_code)
+
+
+class KubeAPIClient:
+    """Pooled, authenticated HTTP clients for cluster API servers."""
+
+    def __init__(
+        self,
+        registry: Optional[KubeconfigRegistry] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_connections: int = 20,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            registry: Kubeconfig registry providing server and token
+            timeout: Default request timeout in seconds
+            max_connections: Connection pool size per cluster
+        """
+        self.registry = registry or kubeconfig_registry
+        self.timeout = timeout
+        self.max_connections = max_connections
+        # cluster ID -> (connection settings, client)
+        self._clients: Dict[str, Tuple[Tuple[Any, ...], httpx.AsyncClient]] = {}
+        # (cluster ID, path, query) -> last object returned by get_cached()
+        self._objects: Dict[Tuple[str, str, str], CachedObject] = {}
+
+    def credentials(self, cluster_id: str) -> KubeconfigEntry:
+        """
+        Get the kubeconfig entry used to reach a cluster.
+
+        Raises:
+            KubeAPIError: If there is no valid kubeconfig for the cluster
+        """
+        entry = self.registry.get(cluster_id)
+        if entry is None or not entry.valid:
+            raise KubeAPIError(
+                f"No valid kubeconfig for cluster '{cluster_id}'; "
+                f"log in with POST /kube/configs/{cluster_id}/ensure",
+                status_code=401,
+            )
+        return entry
+
+    @staticmethod
+    def _verify(entry: KubeconfigEntry) -> Union[bool, ssl.SSLContext]:
+        if entry.insecure_skip_tls_verify:
+            return False
+        if entry.certificate_authority_data:
+            cadata = base64.b64decode(entry.certificate_authority_data).decode()
+            return ssl.create_default_context(cadata=cadata)
+        return True
+
+    async def _client(self, entry: KubeconfigEntry) -> httpx.AsyncClient:
+        settings = (
+            entry.server,
+            entry.insecure_skip_tls_verify,
+            entry.certificate_authority_data,
+        )
+        cached = self._clients.get(entry.cluster_id)
+        if cached is not None and cached[0] == settings:
+            return cached[1]
+
+        client = httpx.AsyncClient(
+            base_url=entry.server or "",
+            verify=self._verify(entry),
+            http2=HTTP2_AVAILABLE,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+        self._clients[entry.cluster_id] = (settings, client)
+        logger.info(
+            f"Opened connection pool for cluster '{entry.cluster_id}' "
+            f"({entry.server}, http2={HTTP2_AVAILABLE})"
+        )
+        if cached is not None:
+            await cached[1].aclose()
+        return client
+
+    def _build(
+        self,
+        client: httpx.AsyncClient,
+        entry: KubeconfigEntry,
+        method: str,
+        path: str,
+        params: Any,
+        headers: Optional[Dict[str, str]],
+        content: Optional[bytes],
+        json: Any,
+        timeout: TimeoutTypes,
+    ) -> httpx.Request:
+        # The token is attached per request so a refreshed kubeconfig takes
+        # effect without dropping the pooled connections
+        merged = dict(headers or {})
+        merged["Authorization"] = f"Bearer {entry.token}"
+        return client.build_request(
+            method,
+            path,
+            params=params,
+            headers=merged,
+            content=content,
+            json=json,
+            timeout=self.timeout if timeout is None else timeout,
+        )
+
+    async def send(
+        self,
+        cluster_id: str,
+        method: str,
+        path: str,
+        params: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[bytes] = None,
+        json: Any = None,
+        timeout: TimeoutTypes = None,
+        stream: bool = False,
+    ) -> httpx.Response:
+        """
+        Send a request to a cluster's API server.
+
+        Args:
+            cluster_id: Cluster identifier from rhtoken.json
+            method: HTTP method
+            path: API path, e.g. /api/v1/namespaces
+            params: Query parameters
+            headers: Extra request headers
+            content: Raw request body
+            json: JSON request body
+            timeout: Request timeout (default: client timeout)
+            stream: Return before reading the body; the caller must aclose()
+
+        Returns:
+            The upstream response (any status code)
+
+        Raises:
+            KubeAPIError: If there are no credentials or the request failed
+        """
+        entry = self.credentials(cluster_id)
+        client = await self._client(entry)
+        request = self._build(
+            client, entry, method, path, params, headers, content, json, timeout
+        )
+        try:
+            return await client.send(request, stream=stream)
+        except httpx.TimeoutException as e:
+            raise KubeAPIError(
+                f"Request to cluster '{cluster_id}' timed out: {e}", status_code=504
+            )
+        except httpx.TransportError as e:
+            raise KubeAPIError(f"Request to cluster '{cluster_id}' failed: {e}")
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        cluster_id: str,
+        method: str,
+        path: str,
+        params: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: TimeoutTypes = None,
+    ) -> AsyncIterator[httpx.Response]:
+        """Send a request and stream the response body (e.g. watches, logs)."""
+        response = await self.send(
+            cluster_id,
+            method,
+            path,
+            params=params,
+            headers=headers,
+            timeout=timeout,
+            stream=True,
+        )
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+    async def get_json(
+        self,
+        cluster_id: str,
+        path: str,
+        params: Any = None,
+        timeout: TimeoutTypes = None,
+    ) -> Dict[str, Any]:
+        """
+        GET a resource and decode the JSON body.
+
+        Raises:
+            KubeAPIError: With the upstream status code on an error response
+        """
+        response = await self.send(cluster_id, "GET", path, params, timeout=timeout)
+        _raise_for_status(response)
+        return response.json()  # type: ignore[no-any-return]
+
+    async def get_cached(
+        self,
+        cluster_id: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: TimeoutTypes = None,
+    ) -> Dict[str, Any]:
+        """
+        GET a resource, reusing the cached copy when it has not changed.
+
+        Repeat requests carry the cached resourceVersion, so the API server
+        can answer from its watch cache instead of a quorum read of etcd, and
+        If-None-Match when the server sent an ETag. A 304 response, or a body
+        with the same resourceVersion, returns the cached object.
+
+        Raises:
+            KubeAPIError: With the upstream status code on an error response
+        """
+        query = dict(params or {})
+        key = (cluster_id, path, str(sorted(query.items())))
+        cached = self._objects.get(key)
+
+        headers: Dict[str, str] = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.resource_version:
+                query["resourceVersion"] = cached.resource_version
+                if str(cached.body.get("kind", "")).endswith("List"):
+                    query["resourceVersionMatch"] = "NotOlderThan"
+
+        response = await self.send(
+            cluster_id, "GET", path, query, headers=headers, timeout=timeout
+        )
+        if response.status_code == 304 and cached is not None:
+            cached.hits += 1
+            return cached.body
+        _raise_for_status(response)
+
+        body: Dict[str, Any] = response.json()
+        resource_version = (body.get("metadata") or {}).get("resourceVersion")
+        if cached is not None and resource_version == cached.resource_version:
+            cached.hits += 1
+            return cached.body
+
+        self._objects[key] = CachedObject(
+            body=body,
+            resource_version=resource_version,
+            etag=response.headers.get("etag"),
+        )
+        return body
+
+    def forget(self, cluster_id: str) -> None:
+        """Drop cached objects of a cluster (e.g. after its login changed)."""
+        for key in [k for k in self._objects if k[0] == cluster_id]:
+            del self._objects[key]
+
+    def pools(self) -> List[Dict[str, Any]]:
+        """Describe the open connection pools."""
+        return [
+            {"cluster_id": cluster_id, "server": settings[0], "http2": HTTP2_AVAILABLE}
+            for cluster_id, (settings, _) in sorted(self._clients.items())
+        ]
+
+    async def aclose(self) -> None:
+        """Close all connection pools."""
+        clients = [client for _, client in self._clients.values()]
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+
+# Global instance
+kube_api = KubeAPIClient()
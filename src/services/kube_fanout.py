@@ -0,0 +1,115 @@
+"""Concurrent read queries across clusters.
+
+Runs the same Kubernetes list/get against many clusters at once over the
+shared pooled client, with a per-cluster timeout and a concurrency cap, and
+yields results as each cluster answers so slow clusters never hold back the
+fast ones.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from services.kube_api import KubeAPIClient, KubeAPIError, kube_api
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class KubeQuery:
+    """A read-only Kubernetes resource query."""
+
+    resource: str
+    api_version: str = "v1"
+    namespace: Optional[str] = None
+    name: Optional[str] = None
+    label_selector: Optional[str] = None
+    field_selector: Optional[str] = None
+    limit: Optional[int] = None
+
+    @property
+    def path(self) -> str:
+        """API path, e.g. /apis/apps/v1/namespaces/ns/deployments."""
+        base = "/api/v1" if self.api_version == "v1" else f"/apis/{self.api_version}"
+        if self.namespace:
+            base += f"/namespaces/{self.namespace}"
+        base += f"/{self.resource}"
+        if self.name:
+            base += f"/{self.name}"
+        return base
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        params: Dict[str, Any] = {}
+        if self.label_selector:
+            params["labelSelector"] = self.label_selector
+        if self.field_selector:
+            params["fieldSelector"] = self.field_selector
+        if self.limit:
+            params["limit"] = self.limit
+        return params
+
+
+async def _query_cluster(
+    client: KubeAPIClient, cluster_id: str, query: KubeQuery, timeout: float
+) -> Dict[str, Any]:
+    start = time.perf_counter()
+    result: Dict[str, Any] = {"cluster_id": cluster_id}
+    try:
+        body = await asyncio.wait_for(
+            client.get_json(cluster_id, query.path, query.params, timeout=timeout),
+            timeout,
+        )
+        items = [body] if query.name else body.get("items", [])
+        result.update(status="ok", items=items)
+    except asyncio.TimeoutError:
+        result.update(status="error", code=504, error=f"No response within {timeout}s")
+    except KubeAPIError as e:
+        result.update(status="error", code=e.status_code, error=str(e))
+    except Exception as e:
+        logger.error(f"Fanout query to cluster '{cluster_id}' failed: {e}")
+        result.update(status="error", code=500, error=str(e))
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+async def fanout(
+    query: KubeQuery,
+    cluster_ids: List[str],
+    timeout: float = 10.0,
+    max_concurrency: int = 8,
+    client: Optional[KubeAPIClient] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run a query on every cluster, yielding each cluster's result as it lands.
+
+    Results that are not consumed (e.g. the HTTP client disconnected) have
+    their in-flight requests cancelled.
+
+    Args:
+        query: The resource query
+        cluster_ids: Clusters to query
+        timeout: Per-cluster timeout in seconds, from when its query starts
+        max_concurrency: Maximum number of clusters queried at once
+        client: API client (default: the shared client)
+
+    Yields:
+        Per-cluster dicts with cluster_id, status ("ok" or "error"),
+        items or code/error, and elapsed_ms
+    """
+    client = client or kube_api
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def bounded(cluster_id: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await _query_cluster(client, cluster_id, query, timeout)
+
+    tasks = [asyncio.create_task(bounded(cluster_id)) for cluster_id in cluster_ids]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,308 @@
+"""Local authenticating Kubernetes API proxies.
+
+Serves a reverse proxy per cluster on 127.0.0.1 that forwards requests over
+the shared pooled client (services.kube_api), replacing a per-proxy local
+token with the cluster's cached bearer token. Responses, including watches
+and log follows, are streamed through as they arrive. Local tools use the
+proxy through the kubeconfig written for it.
+"""
+
+import asyncio
+import logging
+import secrets
+import socket
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from services.kube_api import KubeAPIClient, KubeAPIError, kube_api
+from services.kubeconfig import write_kubeconfig
+
+logger = logging.getLogger(__name__)
+
+PROXY_HOST = "127.0.0.1"
+STATE_DIR = Path.home() / ".cache" / "rhotp" / "kube-proxy"
+
+PROXY_METHODS = ["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+
+# Not forwarded in either direction; Authorization is replaced
+HOP_BY_HOP_HEADERS = {
+    "authorization",
+    "connection",
+    "content-length",
+    "host",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+}
+
+
+def _status(code: int, reason: str, message: str) -> JSONResponse:
+    """A Kubernetes-style Status error response."""
+    return JSONResponse(
+        {
+            "kind": "Status",
+            "apiVersion": "v1",
+            "metadata": {},
+            "status": "Failure",
+            "message": message,
+            "reason": reason,
+            "code": code,
+        },
+        status_code=code,
+    )
+
+
+def _is_streaming(request: Request) -> bool:
+    params = request.query_params
+    return params.get("watch") in ("true", "1") or params.get("follow") == "true"
+
+
+class _EmbeddedServer(uvicorn.Server):
+    """uvicorn server that leaves signal handling to the main service."""
+
+    def capture_signals(self):  # type: ignore[no-untyped-def]
+        return nullcontext()
+
+
+@dataclass
+class KubeProxy:
+    """A running local proxy for one cluster."""
+
+    cluster_id: str
+    port: int
+    token: str
+    kubeconfig_path: str
+    started_at: float
+    server: _EmbeddedServer
+    task: "asyncio.Task[None]"
+    requests: int = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://{PROXY_HOST}:{self.port}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cluster_id": self.cluster_id,
+            "url": self.url,
+            "port": self.port,
+            "kubeconfig_path": self.kubeconfig_path,
+            "started_at": self.started_at,
+            "requests": self.requests,
+            "running": not self.task.done(),
+        }
+
+
+class KubeProxyManager:
+    """Starts and stops per-cluster local API proxies."""
+
+    def __init__(
+        self, client: Optional[KubeAPIClient] = None, state_dir: Optional[Path] = None
+    ):
+        """
+        Initialize the proxy manager.
+
+        Args:
+            client: API client used for upstream requests
+            state_dir: Directory for the proxies' kubeconfig files
+        """
+        self.client = client or kube_api
+        self.state_dir = state_dir or STATE_DIR
+        self._proxies: Dict[str, KubeProxy] = {}
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _app(self, cluster_id: str) -> Starlette:
+        async def forward(request: Request) -> Response:
+            proxy = self._proxies.get(cluster_id)
+            if proxy is None:
+                return _status(503, "ServiceUnavailable", "Proxy is stopping")
+
+            auth = request.headers.get("authorization", "")
+            if not secrets.compare_digest(auth, f"Bearer {proxy.token}"):
+                return _status(401, "Unauthorized", "Unauthorized")
+            if "upgrade" in request.headers:
+                # exec, attach and port-forward need SPDY/WebSocket upgrades
+                return _status(
+                    501, "NotImplemented", "Upgrade requests are not proxied"
+                )
+
+            proxy.requests += 1
+            headers = {
+                k: v
+                for k, v in request.headers.items()
+                if k.lower() not in HOP_BY_HOP_HEADERS
+            }
+            # Watches stay open until the server ends them
+            timeout = (
+                httpx.Timeout(self.client.timeout, read=None)
+                if _is_streaming(request)
+                else None
+            )
+            path = request.url.path
+            if request.url.query:
+                path += "?" + request.url.query
+            try:
+                upstream = await self.client.send(
+                    cluster_id,
+                    request.method,
+                    path,
+                    headers=headers,
+                    content=await request.body(),
+                    timeout=timeout,
+                    stream=True,
+                )
+            except KubeAPIError as e:
+                return _status(e.status_code, "BadGateway", str(e))
+
+            response_headers = {
+                k: v
+                for k, v in upstream.headers.items()
+                if k.lower() not in HOP_BY_HOP_HEADERS
+            }
+            return StreamingResponse(
+                upstream.aiter_raw(),
+                status_code=upstream.status_code,
+                headers=response_headers,
+                background=BackgroundTask(upstream.aclose),
+            )
+
+        return Starlette(routes=[Route("/{path:path}", forward, methods=PROXY_METHODS)])
+
+    def _write_kubeconfig(self, cluster_id: str, port: int, token: str) -> str:
+        entry = self.client.credentials(cluster_id)
+        name = f"rhotp-proxy-{cluster_id}"
+        context: Dict[str, Any] = {"cluster": name, "user": name}
+        if entry.context_namespace:
+            context["namespace"] = entry.context_namespace
+
+        path = str(self.state_dir / f"config.{cluster_id}")
+        write_kubeconfig(
+            path,
+            {
+                "apiVersion": "v1",
+                "kind": "Config",
+                "preferences": {},
+                "clusters": [
+                    {"name": name, "cluster": {"server": f"http://{PROXY_HOST}:{port}"}}
+                ],
+                "users": [{"name": name, "user": {"token": token}}],
+                "contexts": [{"name": name, "context": context}],
+                "current-context": name,
+            },
+        )
+        return path
+
+    async def start(self, cluster_id: str, port: int = 0) -> KubeProxy:
+        """
+        Start a proxy for a cluster, or return the running one.
+
+        Args:
+            cluster_id: Cluster identifier from rhtoken.json
+            port: Local port (0 picks a free port)
+
+        Raises:
+            KubeAPIError: If the cluster has no valid kubeconfig
+            OSError: If the port cannot be bound
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            existing = self._proxies.get(cluster_id)
+            if existing is not None and not existing.task.done():
+                return existing
+
+            # Fail early when there are no credentials to inject
+            self.client.credentials(cluster_id)
+
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                sock.bind((PROXY_HOST, port))
+            except OSError:
+                sock.close()
+                raise
+            bound_port = sock.getsockname()[1]
+
+            token = secrets.token_urlsafe(32)
+            kubeconfig_path = self._write_kubeconfig(cluster_id, bound_port, token)
+
+            config = uvicorn.Config(
+                self._app(cluster_id),
+                log_level="warning",
+                access_log=False,
+                lifespan="off",
+                timeout_graceful_shutdown=2,
+            )
+            server = _EmbeddedServer(config)
+            task = asyncio.create_task(server.serve(sockets=[sock]))
+
+            proxy = KubeProxy(
+                cluster_id=cluster_id,
+                port=bound_port,
+                token=token,
+                kubeconfig_path=kubeconfig_path,
+                started_at=time.time(),
+                server=server,
+                task=task,
+            )
+            self._proxies[cluster_id] = proxy
+
+            while not server.started and not task.done():
+                await asyncio.sleep(0.01)
+            if task.done():
+                self._proxies.pop(cluster_id, None)
+                task.result()
+
+            logger.info(f"Started API proxy for cluster '{cluster_id}' on {proxy.url}")
+            return proxy
+
+    async def stop(self, cluster_id: str) -> bool:
+        """
+        Stop a cluster's proxy and remove its kubeconfig.
+
+        Returns:
+            True if a proxy was stopped
+        """
+        proxy = self._proxies.pop(cluster_id, None)
+        if proxy is None:
+            return False
+
+        proxy.server.should_exit = True
+        try:
+            await asyncio.wait_for(proxy.task, 5)
+        except Exception as e:
+            logger.warning(f"API proxy for cluster '{cluster_id}' did not stop: {e}")
+            proxy.task.cancel()
+
+        Path(proxy.kubeconfig_path).unlink(missing_ok=True)
+        logger.info(f"Stopped API proxy for cluster '{cluster_id}'")
+        return True
+
+    async def stop_all(self) -> None:
+        """Stop every proxy."""
+        for cluster_id in list(self._proxies):
+            await self.stop(cluster_id)
+
+    def list_proxies(self) -> List[Dict[str, Any]]:
+        """Describe the running proxies."""
+        return [proxy.to_dict() for _, proxy in sorted(self._proxies.items())]
+
+
+# Global instance
+kube_proxies = KubeProxyManager()
@@ -0,0 +1,264 @@
+"""Cached validity of the service's cluster sessions.
+
+Tracks until when the service's login to a cluster is valid so request
+paths can check it without talking to the cluster and never start a
+browser login themselves. The expiry comes from the kubeconfig token (the
+JWT exp claim, or the file age for opaque tokens) and, for OpenShift
+``sha256~`` tokens, is confirmed against the token's OAuth object in the
+background. Sessions in use are renewed in the background before they
+expire; a request that finds the session stale gets SessionExpiredError
+straight away and a tracked background login is started.
+"""
+
+import asyncio
+import base64
+import hashlib
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from services.kube_api import KubeAPIClient, KubeAPIError
+from services.kubeconfig import EXPIRY_MARGIN, KubeconfigEntry, KubeconfigRegistry
+
+logger = logging.getLogger(__name__)
+
+# Renew a session in use this long before it expires
+REFRESH_LEAD = 15 * 60
+
+# Re-check the token against the OAuth API at most this often
+VERIFY_INTERVAL = 10 * 60
+
+# Wait this long after a failed background login before trying again
+RETRY_DELAY = 5 * 60
+
+# Sessions not used for this long are left to expire
+KEEPALIVE_IDLE = 24 * 3600
+
+OPAQUE_TOKEN_PREFIX = "sha256~"
+
+
+class SessionExpiredError(Exception):
+    """Raised when a cluster session is not valid for a request."""
+
+
+def oauth_token_name(token: Optional[str]) -> Optional[str]:
+    """Name of the OAuthAccessToken object of an OpenShift sha256~ token."""
+    if not token or not token.startswith(OPAQUE_TOKEN_PREFIX):
+        return None
+    digest = hashlib.sha256(token[len(OPAQUE_TOKEN_PREFIX) :].encode()).digest()
+    encoded = base64.urlsafe_b64encode(digest).decode().rstrip("=")
+    return OPAQUE_TOKEN_PREFIX + encoded
+
+
+class ClusterSession:
+    """Login validity of one of the service's cluster kubeconfigs."""
+
+    def __init__(
+        self,
+        registry: KubeconfigRegistry,
+        cluster_id: str,
+        client: Optional[KubeAPIClient] = None,
+    ):
+        """
+        Initialize the session tracker.
+
+        Args:
+            registry: Registry holding the cluster's kubeconfig
+            cluster_id: Cluster identifier from rhtoken.json
+            client: API client used to confirm token expiry
+        """
+        self.registry = registry
+        self.cluster_id = cluster_id
+        self.client = client
+        self.last_used: Optional[float] = None
+        self.last_refresh_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._failed_at = 0.0
+        # Confirmed expiry of the token in the config with this mtime
+        # (None = the token does not expire)
+        self._verified: Optional[Tuple[float, Optional[float]]] = None
+        self._verified_at = 0.0
+        self._revoked_mtime: Optional[float] = None
+        self._refresh_task: "Optional[asyncio.Task[None]]" = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _entry(self) -> Optional[KubeconfigEntry]:
+        return self.registry.get(self.cluster_id)
+
+    def _expiry(self, entry: KubeconfigEntry) -> Tuple[Optional[float], str]:
+        if self._verified is not None and self._verified[0] == entry.mtime:
+            return self._verified[1], "oauth"
+        return entry.expires_at, entry.expiry_source or "unknown"
+
+    def _is_valid(self, entry: Optional[KubeconfigEntry], now: float) -> bool:
+        if entry is None or not entry.server or not entry.token:
+            return False
+        if self._revoked_mtime == entry.mtime:
+            return False
+        expires_at, _ = self._expiry(entry)
+        return expires_at is None or now < expires_at - EXPIRY_MARGIN
+
+    @property
+    def refreshing(self) -> bool:
+        return self._refresh_task is not None and not self._refresh_task.done()
+
+    def require(self) -> str:
+        """
+        Get the kubeconfig path for a request if the session is valid.
+
+        Never logs in itself: a stale session starts a background login (at
+        most one at a time, and not within RETRY_DELAY of a failed one).
+
+        Returns:
+            Path to the kubeconfig
+
+        Raises:
+            SessionExpiredError: If the session is missing or expired
+        """
+        now = time.time()
+        self.last_used = now
+        entry = self._entry()
+        if self._is_valid(entry, now):
+            assert entry is not None
+            return entry.path
+
+        started = self.refresh() is not None
+        message = f"Not logged in to cluster '{self.cluster_id}'"
+        if entry is not None and entry.token:
+            message = f"Login to cluster '{self.cluster_id}' has expired"
+        if self.refreshing:
+            message += "; a background login is in progress, retry shortly"
+        elif not started and self.last_error:
+            message += f"; the last login attempt failed: {self.last_error}"
+        raise SessionExpiredError(message)
+
+    def mark_invalid(self) -> None:
+        """Record that the cluster rejected the current token and renew it."""
+        entry = self._entry()
+        if entry is not None and self._revoked_mtime != entry.mtime:
+            logger.warning(f"Token for cluster '{self.cluster_id}' was rejected")
+            self._revoked_mtime = entry.mtime
+            self.refresh()
+
+    def refresh(
+        self, headless: bool = True, force: bool = False
+    ) -> "Optional[asyncio.Task[None]]":
+        """
+        Start a background login unless one is running.
+
+        Args:
+            headless: Run the browser login headless
+            force: Start even within RETRY_DELAY of a failed login
+
+        Returns:
+            The running login task, or None if none was started
+        """
+        if self.refreshing:
+            return self._refresh_task
+        if not force and time.time() - self._failed_at < RETRY_DELAY:
+            return None
+
+        async def run() -> None:
+            try:
+                await self.registry.renew(self.cluster_id, headless=headless)
+                self.last_refresh_at = time.time()
+                self.last_error = None
+                self._revoked_mtime = None
+                logger.info(f"Renewed login to cluster '{self.cluster_id}'")
+            except Exception as e:
+                self._failed_at = time.time()
+                self.last_error = str(e)
+                logger.error(f"Background login to '{self.cluster_id}' failed: {e}")
+
+        self._refresh_task = asyncio.create_task(run())
+        return self._refresh_task
+
+    async def verify(self) -> None:
+        """Confirm the current token's expiry with the cluster's OAuth API."""
+        entry = self._entry()
+        self._verified_at = time.time()
+        name = oauth_token_name(entry.token if entry else None)
+        if entry is None or name is None or self.client is None:
+            return
+
+        try:
+            token = await self.client.get_json(
+                self.cluster_id,
+                f"/apis/oauth.openshift.io/v1/useroauthaccesstokens/{name}",
+            )
+        except KubeAPIError as e:
+            if e.status_code == 401:
+                self.mark_invalid()
+            else:
+                # e.g. not allowed to read it; keep the estimate
+                logger.debug(f"Cannot verify token of '{self.cluster_id}': {e}")
+            return
+
+        expires_in = token.get("expiresIn") or 0
+        created = (token.get("metadata") or {}).get("creationTimestamp")
+        if expires_in <= 0 or not created:
+            self._verified = (entry.mtime, None)
+            return
+        created_at = datetime.fromisoformat(created.replace("Z", "+00:00"))
+        self._verified = (entry.mtime, created_at.timestamp() + expires_in)
+
+    async def _tick(self) -> float:
+        """One background pass; returns the seconds until the next one."""
+        entry = self._entry()
+        now = time.time()
+        if entry is None or self.last_used is None:
+            return VERIFY_INTERVAL
+        if now - self.last_used > KEEPALIVE_IDLE:
+            return VERIFY_INTERVAL
+
+        if entry.token:
+            stale = self._verified is None or self._verified[0] != entry.mtime
+            if stale or now - self._verified_at >= VERIFY_INTERVAL:
+                await self.verify()
+
+        expires_at, _ = self._expiry(entry)
+        if not self._is_valid(entry, now + REFRESH_LEAD):
+            self.refresh()
+            return RETRY_DELAY
+        if expires_at is None:
+            return VERIFY_INTERVAL
+        return max(30.0, min(VERIFY_INTERVAL, expires_at - REFRESH_LEAD - now))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                delay = await self._tick()
+            except Exception as e:
+                logger.error(f"Session check for '{self.cluster_id}' failed: {e}")
+                delay = RETRY_DELAY
+            await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        """Start background verification and renewal."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task and any login in progress."""
+        for task in (self._task, self._refresh_task):
+            if task is not None:
+                task.cancel()
+        self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        """Describe the session without talking to the cluster."""
+        entry = self._entry()
+        expires_at, source = self._expiry(entry) if entry else (None, None)
+        return {
+            "cluster_id": self.cluster_id,
+            "kubeconfig_path": self.registry.config_path(self.cluster_id),
+            "valid": self._is_valid(entry, time.time()),
+            "expires_at": expires_at,
+            "expiry_source": source,
+            "verified_at": self._verified_at or None,
+            "refreshing": self.refreshing,
+            "last_refresh_at": self.last_refresh_at,
+            "last_error": self.last_error,
+            "last_used": self.last_used,
+        }
@@ -0,0 +1,599 @@
+"""Kubeconfig registry for per-cluster kubeconfig files.
+
+Indexes the ``~/.kube/config.<cluster>[-<namespace>]`` files managed by
+``kubeconfig.sh``, parses the server, token and token expiry of each
+without spawning kubectl, and re-authenticates through rhtoken only when a
+config is missing or expired.
+"""
+
+import asyncio
+import base64
+import binascii
+import copy
+import json
+import logging
+import os
+import shlex
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import yaml
+
+from services.process_supervisor import process_supervisor
+
+logger = logging.getLogger(__name__)
+
+KUBE_DIR = Path.home() / ".kube"
+
+# Kubeconfigs owned by the service itself, never touched by kube/oc project
+SERVICE_KUBE_DIR = Path.home() / ".cache" / "rhotp" / "kube"
+CONFIG_PREFIX = "config."
+
+# OpenShift OAuth access tokens (sha256~...) are opaque; their default
+# lifetime is accessTokenMaxAgeSeconds = 24h, counted from when oc login
+# wrote the kubeconfig
+DEFAULT_TOKEN_LIFETIME = 24 * 3600
+
+# Treat tokens this close to expiry as expired
+EXPIRY_MARGIN = 5 * 60
+
+RHTOKEN_PATH = Path(__file__).resolve().parent.parent / "rhtoken"
+LOGIN_TIMEOUT = 120
+
+EMPTY_KUBECONFIG: Dict[str, Any] = {
+    "apiVersion": "v1",
+    "kind": "Config",
+    "preferences": {},
+    "clusters": [],
+    "users": [],
+    "contexts": [],
+    "current-context": "",
+}
+
+
+class KubeconfigError(Exception):
+    """Raised when a kubeconfig cannot be prepared."""
+
+
+@dataclass
+class KubeconfigEntry:
+    """Parsed summary of one kubeconfig file."""
+
+    path: str
+    cluster_id: str
+    namespace: Optional[str]
+    context: Optional[str]
+    server: Optional[str]
+    user: Optional[str]
+    token: Optional[str]
+    context_namespace: Optional[str]
+    expires_at: Optional[float]
+    expiry_source: Optional[str]
+    mtime: float
+    insecure_skip_tls_verify: bool = False
+    certificate_authority_data: Optional[str] = None
+
+    @property
+    def expired(self) -> bool:
+        if self.expires_at is None:
+            return False
+        return time.time() >= self.expires_at - EXPIRY_MARGIN
+
+    @property
+    def valid(self) -> bool:
+        """Whether the config has a usable, unexpired token and server."""
+        return bool(self.context and self.server and self.token) and not self.expired
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public summary (never includes the token)."""
+        return {
+            "path": self.path,
+            "cluster_id": self.cluster_id,
+            "namespace": self.namespace,
+            "context": self.context,
+            "server": self.server,
+            "user": self.user,
+            "context_namespace": self.context_namespace,
+            "expires_at": self.expires_at,
+            "expiry_source": self.expiry_source,
+            "expired": self.expired,
+            "valid": self.valid,
+        }
+
+
+def _named(items: Optional[List[Dict[str, Any]]], name: Optional[str]) -> Dict:
+    for item in items or []:
+        if item.get("name") == name:
+            return item
+    return {}
+
+
+def jwt_expiry(token: str) -> Optional[float]:
+    """Return the exp claim of a JWT bearer token, or None if not a JWT."""
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        payload = parts[1] + "=" * (-len(parts[1]) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        exp = claims.get("exp")
+        return float(exp) if exp is not None else None
+    except (binascii.Error, ValueError, AttributeError):
+        return None
+
+
+def load_kubeconfig(path: str) -> Dict[str, Any]:
+    """Load a kubeconfig file, returning an empty config if it is blank."""
+    with open(path) as f:
+        config = yaml.safe_load(f)
+    return config if isinstance(config, dict) else copy.deepcopy(EMPTY_KUBECONFIG)
+
+
+def write_kubeconfig(path: str, config: Dict[str, Any]) -> None:
+    """
+    Write a kubeconfig atomically with 0600 permissions.
+
+    Writes to a temp file in the same directory, fsyncs it, and renames it
+    over the target so readers never see a partial file.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".kubeconfig.", dir=directory)
+    try:
+        os.fchmod(fd, 0o600)
+        with os.fdopen(fd, "w") as f:
+            yaml.safe_dump(config, f, default_flow_style=False, sort_keys=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def default_kubeconfig_path() -> str:
+    """The kubeconfig oc would write to: first KUBECONFIG entry or ~/.kube/config."""
+    paths = [p for p in os.environ.get("KUBECONFIG", "").split(os.pathsep) if p]
+    return paths[0] if paths else str(KUBE_DIR / "config")
+
+
+def parse_login_command(command: str) -> Tuple[str, str]:
+    """
+    Extract the server and token from an ``oc login`` command.
+
+    From: oc login --token=sha256~abc --server=https://api.example.com:6443
+
+    Returns:
+        Tuple of (server, token)
+
+    Raises:
+        ValueError: If the command has no server or token
+    """
+    server, token = None, None
+    args = shlex.split(command)
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        for flag in ("--token", "--server", "-s"):
+            if arg == flag and i + 1 < len(args):
+                value = args[i + 1]
+                i += 1
+            elif arg.startswith(flag + "="):
+                value = arg[len(flag) + 1 :]
+            else:
+                continue
+            if flag == "--token":
+                token = value
+            else:
+                server = value
+            break
+        else:
+            if arg.startswith("https://") and server is None:
+                server = arg
+        i += 1
+
+    if not server or not token:
+        raise ValueError("Login command is missing --server or --token")
+    return server, token
+
+
+def oc_cluster_name(server: str) -> str:
+    """
+    Cluster nickname as oc login writes it.
+
+    From: https://api.crc-eph.r9lp.p1.openshiftapps.com:6443
+    To:   api-crc-eph-r9lp-p1-openshiftapps-com:6443
+    """
+    return urlparse(server).netloc.replace(".", "-")
+
+
+def login_kubeconfig(
+    path: str,
+    server: str,
+    token: str,
+    username: str,
+    namespace: Optional[str] = None,
+) -> str:
+    """
+    Write a token login into a kubeconfig, like ``oc login --token`` does.
+
+    Adds or updates the cluster, user and context entries using oc's naming
+    (cluster ``api-host:port``, user ``<user>/<cluster>``, context
+    ``<namespace>/<cluster>/<user>``), makes the context current and writes
+    the file atomically with 0600 permissions. Other entries are kept.
+
+    Args:
+        path: Kubeconfig to update
+        server: API server URL
+        token: Bearer token
+        username: OpenShift user name
+        namespace: Namespace for the context; defaults to the namespace of
+            the existing context for this cluster and user, else "default"
+
+    Returns:
+        Name of the current context
+    """
+    try:
+        config = load_kubeconfig(path)
+    except FileNotFoundError:
+        config = copy.deepcopy(EMPTY_KUBECONFIG)
+
+    cluster_name = oc_cluster_name(server)
+    user_name = f"{username}/{cluster_name}"
+
+    def upsert(key: str, name: str, field: str) -> Dict[str, Any]:
+        items = config.get(key) or []
+        config[key] = items
+        for item in items:
+            if item.get("name") == name:
+                item[field] = item.get(field) or {}
+                return item[field]  # type: ignore[no-any-return]
+        value: Dict[str, Any] = {}
+        items.append({"name": name, field: value})
+        return value
+
+    if namespace is None:
+        namespace = "default"
+        for context in config.get("contexts") or []:
+            details = context.get("context") or {}
+            if (
+                details.get("cluster") == cluster_name
+                and details.get("user") == user_name
+            ):
+                namespace = details.get("namespace") or namespace
+                break
+
+    # Keep existing cluster settings such as certificate-authority-data
+    upsert("clusters", cluster_name, "cluster")["server"] = server
+
+    user = upsert("users", user_name, "user")
+    user.clear()
+    user["token"] = token
+
+    context_name = f"{namespace}/{cluster_name}/{username}"
+    context = upsert("contexts", context_name, "context")
+    context.update(cluster=cluster_name, user=user_name, namespace=namespace)
+
+    config["current-context"] = context_name
+    config.setdefault("apiVersion", "v1")
+    config.setdefault("kind", "Config")
+    write_kubeconfig(path, config)
+    return context_name
+
+
+def current_context_details(
+    config: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """
+    Resolve the current context of a kubeconfig.
+
+    Returns:
+        Tuple of (context, cluster, user) dicts; empty dicts if missing
+    """
+    context = _named(config.get("contexts"), config.get("current-context"))
+    details = context.get("context") or {}
+    cluster = _named(config.get("clusters"), details.get("cluster")).get("cluster")
+    user = _named(config.get("users"), details.get("user")).get("user")
+    return details, cluster or {}, user or {}
+
+
+def parse_kubeconfig(
+    path: str, cluster_id: str, namespace: Optional[str]
+) -> KubeconfigEntry:
+    """Parse a kubeconfig file into a KubeconfigEntry."""
+    mtime = os.stat(path).st_mtime
+    try:
+        config = load_kubeconfig(path)
+    except (OSError, yaml.YAMLError) as e:
+        logger.warning(f"Could not parse kubeconfig {path}: {e}")
+        config = {}
+
+    context, cluster, user = current_context_details(config)
+    token = user.get("token")
+
+    expires_at, expiry_source = None, None
+    if token:
+        expires_at = jwt_expiry(token)
+        if expires_at is not None:
+            expiry_source = "jwt"
+        else:
+            expires_at = mtime + DEFAULT_TOKEN_LIFETIME
+            expiry_source = "mtime"
+
+    return KubeconfigEntry(
+        path=path,
+        cluster_id=cluster_id,
+        namespace=namespace,
+        context=config.get("current-context") or None,
+        server=cluster.get("server"),
+        user=context.get("user"),
+        token=token,
+        context_namespace=context.get("namespace"),
+        expires_at=expires_at,
+        expiry_source=expiry_source,
+        mtime=mtime,
+        insecure_skip_tls_verify=bool(cluster.get("insecure-skip-tls-verify")),
+        certificate_authority_data=cluster.get("certificate-authority-data"),
+    )
+
+
+class KubeconfigRegistry:
+    """Index of per-cluster kubeconfig files with token expiry."""
+
+    def __init__(self, kube_dir: Optional[Path] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            kube_dir: Directory holding config.<cluster> files (default ~/.kube)
+        """
+        self.kube_dir = kube_dir or KUBE_DIR
+        self._lock = threading.Lock()
+        # path -> (mtime_ns, entry); files are only re-parsed when they change
+        self._entries: Dict[str, Tuple[int, KubeconfigEntry]] = {}
+        self._ensure_locks: Dict[str, asyncio.Lock] = {}
+
+    def config_path(self, cluster_id: str, namespace: Optional[str] = None) -> str:
+        """Path of the kubeconfig for a cluster and optional namespace."""
+        name = f"{cluster_id}-{namespace}" if namespace else cluster_id
+        return str(self.kube_dir / f"{CONFIG_PREFIX}{name}")
+
+    @staticmethod
+    def _split_name(name: str, cluster_ids: Iterable[str]) -> Tuple[str, Optional[str]]:
+        # Prefer the longest known cluster ID so IDs containing '-' still work
+        for cluster_id in sorted(cluster_ids, key=len, reverse=True):
+            if name == cluster_id:
+                return cluster_id, None
+            if name.startswith(cluster_id + "-"):
+                return cluster_id, name[len(cluster_id) + 1 :]
+        cluster_id, _, namespace = name.partition("-")
+        return cluster_id, namespace or None
+
+    def scan(self, cluster_ids: Iterable[str] = ()) -> List[KubeconfigEntry]:
+        """
+        Index all config.<cluster>[-<namespace>] files.
+
+        Args:
+            cluster_ids: Known cluster IDs, used to split file names
+
+        Returns:
+            Entries sorted by cluster ID and namespace
+        """
+        cluster_ids = list(cluster_ids)
+        try:
+            names = os.listdir(self.kube_dir)
+        except FileNotFoundError:
+            names = []
+
+        seen = set()
+        entries = []
+        with self._lock:
+            for filename in names:
+                if not filename.startswith(CONFIG_PREFIX):
+                    continue
+                path = str(self.kube_dir / filename)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if not os.path.isfile(path):
+                    continue
+
+                seen.add(path)
+                cached = self._entries.get(path)
+                if cached and cached[0] == st.st_mtime_ns:
+                    entries.append(cached[1])
+                    continue
+
+                cluster_id, namespace = self._split_name(
+                    filename[len(CONFIG_PREFIX) :], cluster_ids
+                )
+                entry = parse_kubeconfig(path, cluster_id, namespace)
+                self._entries[path] = (st.st_mtime_ns, entry)
+                entries.append(entry)
+
+            for path in set(self._entries) - seen:
+                del self._entries[path]
+
+        return sorted(entries, key=lambda e: (e.cluster_id, e.namespace or ""))
+
+    def get(
+        self, cluster_id: str, namespace: Optional[str] = None
+    ) -> Optional[KubeconfigEntry]:
+        """Get the entry for a cluster/namespace, re-parsing it if changed."""
+        path = self.config_path(cluster_id, namespace)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(path, None)
+            return None
+
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached and cached[0] == st.st_mtime_ns:
+                return cached[1]
+            entry = parse_kubeconfig(path, cluster_id, namespace)
+            self._entries[path] = (st.st_mtime_ns, entry)
+            return entry
+
+    def _derive_namespace_config(
+        self, base: KubeconfigEntry, namespace: str
+    ) -> KubeconfigEntry:
+        """Copy a valid base config and point its current context at a namespace."""
+        config = load_kubeconfig(base.path)
+        current = config.get("current-context")
+        for context in config.get("contexts") or []:
+            if context.get("name") == current:
+                context.setdefault("context", {})["namespace"] = namespace
+
+        path = self.config_path(base.cluster_id, namespace)
+        write_kubeconfig(path, config)
+        # Keep the base config's mtime so opaque token expiry estimates match
+        base_stat = os.stat(base.path)
+        os.utime(path, ns=(base_stat.st_atime_ns, base_stat.st_mtime_ns))
+        with self._lock:
+            self._entries.pop(path, None)
+        logger.info(f"Created kubeconfig {path} from {base.path}")
+
+        entry = self.get(base.cluster_id, namespace)
+        assert entry is not None
+        return entry
+
+    async def _login(
+        self, cluster_id: str, headless: bool, path: Optional[str] = None
+    ) -> KubeconfigEntry:
+        """Authenticate with rhtoken, writing into the base cluster config."""
+        path = path or self.config_path(cluster_id)
+        write_kubeconfig(path, copy.deepcopy(EMPTY_KUBECONFIG))
+
+        cmd = [str(RHTOKEN_PATH), cluster_id]
+        if headless:
+            cmd.append("--headless")
+
+        env = dict(os.environ, KUBECONFIG=path)
+        logger.info(f"Authenticating to cluster '{cluster_id}' for {path}")
+        try:
+            await process_supervisor.run_async(
+                cmd, timeout=LOGIN_TIMEOUT, name=f"rhtoken {cluster_id}", env=env
+            )
+        except subprocess.TimeoutExpired:
+            raise KubeconfigError(f"Login to cluster '{cluster_id}' timed out")
+
+        entry = parse_kubeconfig(path, cluster_id, None)
+        if not entry.valid:
+            raise KubeconfigError(f"Login to cluster '{cluster_id}' did not succeed")
+        return entry
+
+    async def _login_replacing(
+        self, cluster_id: str, headless: bool
+    ) -> KubeconfigEntry:
+        """
+        Log in to a staging file, then replace all configs of the cluster.
+
+        Namespace configs share the base token, so they are removed and
+        derived again on their next use. Nothing is removed if the login
+        fails or is cancelled.
+        """
+        staging = str(self.kube_dir / f".{CONFIG_PREFIX}{cluster_id}.login")
+        try:
+            await self._login(cluster_id, headless, staging)
+            os.replace(staging, self.config_path(cluster_id))
+        finally:
+            Path(staging).unlink(missing_ok=True)
+
+        for entry in self.scan([cluster_id]):
+            if entry.cluster_id == cluster_id and entry.namespace:
+                os.unlink(entry.path)
+
+        base = self.get(cluster_id)
+        if base is None or not base.valid:
+            raise KubeconfigError(f"Login to cluster '{cluster_id}' did not succeed")
+        return base
+
+    async def ensure(
+        self,
+        cluster_id: str,
+        namespace: Optional[str] = None,
+        headless: bool = True,
+    ) -> Tuple[KubeconfigEntry, bool]:
+        """
+        Return a ready kubeconfig, re-authenticating only if needed.
+
+        Args:
+            cluster_id: Cluster identifier from rhtoken.json
+            namespace: Optional namespace for an isolated per-namespace config
+            headless: Run the browser login headless if one is needed
+
+        Returns:
+            Tuple of (entry, whether a browser login was performed)
+
+        Raises:
+            KubeconfigError: If authentication failed
+        """
+        lock = self._ensure_locks.setdefault(cluster_id, asyncio.Lock())
+        async with lock:
+            entry = self.get(cluster_id, namespace)
+            if entry is not None and entry.valid:
+                return entry, False
+
+            reauthenticated = False
+            base = self.get(cluster_id)
+            if base is None or not base.valid:
+                base = await self._login_replacing(cluster_id, headless)
+                reauthenticated = True
+
+            if not namespace:
+                return base, reauthenticated
+            return self._derive_namespace_config(base, namespace), reauthenticated
+
+    async def renew(self, cluster_id: str, headless: bool = True) -> KubeconfigEntry:
+        """
+        Log in again, keeping the current config usable until it succeeds.
+
+        The login is written to a staging file that replaces the base config
+        on success; namespace configs (which hold the old token) are removed
+        and derived again on their next use.
+
+        Args:
+            cluster_id: Cluster identifier from rhtoken.json
+            headless: Run the browser login headless
+
+        Returns:
+            The new base config entry
+
+        Raises:
+            KubeconfigError: If authentication failed
+        """
+        lock = self._ensure_locks.setdefault(cluster_id, asyncio.Lock())
+        async with lock:
+            return await self._login_replacing(cluster_id, headless)
+
+    def clean(self, cluster_id: str) -> List[str]:
+        """
+        Remove all kubeconfig files for a cluster (like kube-clean).
+
+        Returns:
+            Paths that were removed
+        """
+        removed = []
+        for entry in self.scan([cluster_id]):
+            if entry.cluster_id == cluster_id:
+                os.unlink(entry.path)
+                removed.append(entry.path)
+        with self._lock:
+            for path in removed:
+                self._entries.pop(path, None)
+        return removed
+
+
+# Global instances: the user's ~/.kube configs and the service's own configs
+kubeconfig_registry = KubeconfigRegistry()
+service_kubeconfigs = KubeconfigRegistry(SERVICE_KUBE_DIR)
@@ -0,0 +1,396 @@
+"""Merged, streaming pod logs from ephemeral namespaces.
+
+Logs of every container of the pods matching a label selector are read
+from the Kubernetes log API over the pooled ephemeral client (one streamed
+request per container, with timestamps) and merged into a single stream
+ordered by timestamp, each line tagged with its pod and container.
+
+Memory is bounded: each container's reader hands lines to the merger
+through a small queue, so a slow client stops the readers, which stop
+reading from the API server (TCP backpressure) instead of buffering. Lines
+are held back for at most MERGE_WINDOW waiting for quieter containers, so
+following stays live while lines arriving close together are ordered.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from services.ephemeral import (
+    EPHEMERAL_CLUSTER_ID,
+    ephemeral_api,
+    ephemeral_session,
+)
+from services.kube_api import KubeAPIError
+
+logger = logging.getLogger(__name__)
+
+# Lines buffered per container before its reader waits for the client
+QUEUE_LINES = 256
+
+# Longest time a line is held back to order it against other containers
+MERGE_WINDOW = 0.25
+
+# Log streams open at once across all requests (each holds a pooled
+# connection unless HTTP/2 is available) and per request
+MAX_ACTIVE_STREAMS = 12
+MAX_STREAMS_PER_REQUEST = 10
+
+# Longest log line passed on and buffered (longer lines are truncated)
+MAX_LINE_BYTES = 16 * 1024
+
+TIMESTAMP = re.compile(r"^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.(\d+))?Z$")
+
+
+class PodLogError(Exception):
+    """Raised when logs cannot be streamed for a request."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def sortable_timestamp(value: str) -> Optional[str]:
+    """
+    Normalize an RFC 3339 UTC timestamp to fixed nanosecond precision.
+
+    The log API trims trailing zeros of the fraction, so its timestamps do
+    not sort as strings until padded.
+    """
+    match = TIMESTAMP.match(value)
+    if match is None:
+        return None
+    return f"{match.group(1)}.{(match.group(2) or '').ljust(9, '0')[:9]}Z"
+
+
+def split_timestamp(line: str) -> "tuple[Optional[str], str]":
+    """Split a `timestamps=true` log line into (timestamp, text)."""
+    stamp, _, text = line.partition(" ")
+    key = sortable_timestamp(stamp)
+    if key is None:
+        return None, line
+    return key, text
+
+
+class StreamBudget:
+    """Counts the log streams open across requests."""
+
+    def __init__(self, limit: int):
+        """
+        Initialize the budget.
+
+        Args:
+            limit: Streams allowed open at once
+        """
+        self.limit = limit
+        self.active = 0
+
+    def acquire(self, count: int) -> bool:
+        """Reserve `count` streams; returns False if that exceeds the limit."""
+        if self.active + count > self.limit:
+            return False
+        self.active += count
+        return True
+
+    def release(self, count: int) -> None:
+        self.active = max(0, self.active - count)
+
+
+# Global instance
+log_stream_budget = StreamBudget(MAX_ACTIVE_STREAMS)
+
+
+@dataclass
+class LogSource:
+    """One container's log stream and the merger's view of it."""
+
+    pod: str
+    container: str
+    queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = field(
+        default_factory=lambda: asyncio.Queue(QUEUE_LINES)
+    )
+    head: Optional[Dict[str, Any]] = None
+    # When the head line was taken from the queue
+    head_since: float = 0.0
+    finished: bool = False
+
+
+@dataclass
+class LogOptions:
+    """What to read from each container's log."""
+
+    follow: bool = False
+    since_seconds: Optional[int] = None
+    tail_lines: Optional[int] = None
+
+    def params(self, container: str) -> Dict[str, str]:
+        params = {"container": container, "timestamps": "true"}
+        if self.follow:
+            params["follow"] = "true"
+        if self.since_seconds is not None:
+            params["sinceSeconds"] = str(self.since_seconds)
+        if self.tail_lines is not None:
+            params["tailLines"] = str(self.tail_lines)
+        return params
+
+
+async def list_sources(
+    namespace: str, selector: Optional[str], container: Optional[str]
+) -> List[LogSource]:
+    """
+    Find the containers whose logs a request reads.
+
+    Raises:
+        SessionExpiredError: If the ephemeral cluster session is not valid
+        KubeAPIError: If the pods cannot be listed
+    """
+    ephemeral_session.require()
+    params = {"labelSelector": selector} if selector else None
+    pods = await ephemeral_api.get_json(
+        EPHEMERAL_CLUSTER_ID, f"/api/v1/namespaces/{namespace}/pods", params
+    )
+    sources = []
+    for pod in pods.get("items") or []:
+        name = (pod.get("metadata") or {}).get("name")
+        if not name:
+            continue
+        containers = (pod.get("spec") or {}).get("containers") or []
+        for spec in containers:
+            if container is None or spec.get("name") == container:
+                sources.append(LogSource(pod=name, container=spec.get("name")))
+    return sorted(sources, key=lambda s: (s.pod, s.container))
+
+
+async def bounded_lines(
+    chunks: AsyncIterator[bytes], limit: int = MAX_LINE_BYTES
+) -> AsyncIterator[str]:
+    """
+    Split a byte stream into lines, keeping at most `limit` bytes of each.
+
+    The rest of a longer line is dropped as it arrives instead of being
+    buffered until its end.
+    """
+    buffer = bytearray()
+    # Dropping the rest of a truncated line
+    skipping = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end == -1:
+                if not skipping:
+                    buffer += chunk[start : start + limit - len(buffer) + 1]
+                    if len(buffer) > limit:
+                        yield buffer[:limit].decode(errors="replace")
+                        buffer.clear()
+                        skipping = True
+                break
+            if skipping:
+                skipping = False
+            else:
+                buffer += chunk[start : min(end, start + limit - len(buffer))]
+                yield buffer.decode(errors="replace").rstrip("\r")
+                buffer.clear()
+            start = end + 1
+    if buffer:
+        yield buffer.decode(errors="replace").rstrip("\r")
+
+
+async def _read(
+    namespace: str,
+    source: LogSource,
+    options: LogOptions,
+    changed: asyncio.Event,
+) -> None:
+    """Feed one container's log lines into its queue until it ends."""
+
+    async def put(item: Optional[Dict[str, Any]]) -> None:
+        await source.queue.put(item)
+        changed.set()
+
+    path = f"/api/v1/namespaces/{namespace}/pods/{source.pod}/log"
+    # A followed log stays open until the container stops
+    timeout = httpx.Timeout(30.0, read=None if options.follow else 60.0)
+    try:
+        async with ephemeral_api.stream(
+            EPHEMERAL_CLUSTER_ID,
+            "GET",
+            path,
+            params=options.params(source.container),
+            timeout=timeout,
+        ) as response:
+            if response.status_code >= 400:
+                body = (await response.aread()).decode(errors="replace")
+                raise KubeAPIError(body[:300], status_code=response.status_code)
+            async for line in bounded_lines(response.aiter_bytes()):
+                stamp, text = split_timestamp(line)
+                await put(
+                    {
+                        "time": stamp,
+                        "pod": source.pod,
+                        "container": source.container,
+                        "line": text,
+                    }
+                )
+    except (KubeAPIError, httpx.HTTPError) as e:
+        await put(
+            {
+                "time": None,
+                "pod": source.pod,
+                "container": source.container,
+                "error": str(e),
+            }
+        )
+    await put(None)
+
+
+async def merge(
+    sources: List[LogSource],
+    changed: asyncio.Event,
+    window: float = MERGE_WINDOW,
+    idle: Optional[float] = None,
+) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Merge queued lines of several sources by timestamp.
+
+    The earliest head line is emitted once every unfinished source has a
+    head, or once it has waited `window` seconds for the others.
+
+    Yields:
+        Line dicts, or None after `idle` seconds without lines
+    """
+    while True:
+        changed.clear()
+        now = time.monotonic()
+        for source in sources:
+            if source.head is None and not source.finished:
+                try:
+                    item = source.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    continue
+                if item is None:
+                    source.finished = True
+                else:
+                    source.head = item
+                    source.head_since = now
+
+        ready = [s for s in sources if s.head is not None]
+        waiting = [s for s in sources if s.head is None and not s.finished]
+        if not ready and not waiting:
+            return
+
+        if ready:
+            oldest = min(s.head_since for s in ready)
+            held = now - oldest
+            if not waiting or held >= window:
+                # Errors (without a timestamp) go first
+                first = min(
+                    ready,
+                    key=lambda s: (s.head or {}).get("time") or "",
+                )
+                line, first.head = first.head, None
+                yield line
+                continue
+            timeout: Optional[float] = window - held
+        else:
+            timeout = idle
+
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            if not ready:
+                yield None
+
+
+async def find_sources(
+    namespace: str,
+    selector: Optional[str] = None,
+    container: Optional[str] = None,
+    max_streams: int = MAX_STREAMS_PER_REQUEST,
+) -> List[LogSource]:
+    """
+    Find the containers of matching pods whose logs a request reads.
+
+    Pods are matched once, when the request starts.
+
+    Args:
+        namespace: Namespace of the pods
+        selector: Label selector (default: every pod)
+        container: Only this container of each pod
+        max_streams: Refuse requests matching more containers than this
+
+    Returns:
+        One source per container, ordered by pod and container
+
+    Raises:
+        PodLogError: If nothing matches or too many streams would be opened
+        SessionExpiredError: If the ephemeral cluster session is not valid
+        KubeAPIError: If the pods cannot be listed
+    """
+    sources = await list_sources(namespace, selector, container)
+    if not sources:
+        raise PodLogError(f"No containers match '{selector or '*'}' in {namespace}")
+    if len(sources) > max_streams:
+        raise PodLogError(
+            f"{len(sources)} containers match; narrow the selector or pick a "
+            f"container (at most {max_streams})"
+        )
+    if log_stream_budget.active + len(sources) > log_stream_budget.limit:
+        raise PodLogError(
+            f"Too many log streams open ({log_stream_budget.active}); "
+            "try again when others have finished",
+            status_code=429,
+        )
+    return sources
+
+
+async def stream_logs(
+    namespace: str,
+    sources: List[LogSource],
+    options: Optional[LogOptions] = None,
+    idle: Optional[float] = None,
+) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Stream the merged logs of containers found by find_sources().
+
+    Failed streams are reported as lines with an "error" key instead of
+    "line". Without `follow` the stream ends with the last container's log.
+
+    Args:
+        namespace: Namespace of the pods
+        sources: Containers to read
+        options: Follow, since and tail options
+        idle: Yield None after this many seconds without lines
+
+    Yields:
+        Dicts with time, pod, container and line (or error); None when idle
+    """
+    options = options or LogOptions()
+    if not log_stream_budget.acquire(len(sources)):
+        # Taken by another request since the sources were found
+        yield {
+            "time": None,
+            "pod": None,
+            "container": None,
+            "error": "Too many log streams open",
+        }
+        return
+
+    changed = asyncio.Event()
+    readers = [
+        asyncio.create_task(_read(namespace, source, options, changed))
+        for source in sources
+    ]
+    try:
+        async for line in merge(sources, changed, idle=idle):
+            yield line
+    finally:
+        for reader in readers:
+            reader.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+        log_stream_budget.release(len(sources))
@@ -0,0 +1,510 @@
+"""Managed port-forwards into ephemeral namespaces.
+
+Each forward listens on 127.0.0.1 and relays connections to a supervised
+``kubectl port-forward`` running with the service's ephemeral kubeconfig.
+The relay counts bytes and measures time to first response byte per
+connection, and keeps the local port stable while kubectl is restarted: when
+the target pod goes away kubectl exits, and it is started again (resolving
+a service or deployment to its new pod) with backoff.
+
+Identical forwards are shared, forwards without connections are torn down
+after their idle timeout, and forwards into a namespace that is no longer
+reserved are stopped.
+"""
+
+import asyncio
+import logging
+import re
+import secrets
+import shutil
+import socket
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.ephemeral import ephemeral_session, namespace_list_cache
+from services.kube_session import SessionExpiredError
+from services.process_supervisor import process_supervisor
+
+logger = logging.getLogger(__name__)
+
+FORWARD_HOST = "127.0.0.1"
+
+# Tear down forwards without connections after this long (seconds)
+DEFAULT_IDLE_TIMEOUT = 900
+
+# Seconds to wait for kubectl to report its local port
+START_TIMEOUT = 20.0
+
+# Seconds a new connection waits for a restarting kubectl
+CONNECT_WAIT = 10.0
+
+# kubectl restart backoff (seconds); reset after it ran this long
+RESTART_DELAY = 1.0
+MAX_RESTART_DELAY = 30.0
+STABLE_RUNTIME = 30.0
+
+# How often idle and released-namespace forwards are looked for (seconds)
+REAP_INTERVAL = 30.0
+
+RELAY_CHUNK = 64 * 1024
+
+TARGET_PATTERN = re.compile(
+    r"^(?:(svc|service|pod|po|deploy|deployment)/)?([a-z0-9]([-a-z0-9.]*[a-z0-9])?)$"
+)
+FORWARDING_LINE = re.compile(r"Forwarding from 127\.0\.0\.1:(\d+)")
+
+
+class PortForwardError(Exception):
+    """Raised when a port-forward cannot be started."""
+
+
+def kubectl_path() -> str:
+    """Path of kubectl (or oc, which takes the same arguments)."""
+    path = shutil.which("kubectl") or shutil.which("oc")
+    if path is None:
+        raise PortForwardError("Neither kubectl nor oc is installed")
+    return path
+
+
+def normalize_target(target: str) -> str:
+    """
+    Normalize a forward target to kind/name (a bare name is a service).
+
+    Raises:
+        PortForwardError: If the target is not a pod, service or deployment
+    """
+    match = TARGET_PATTERN.match(target.strip())
+    if match is None:
+        raise PortForwardError(f"Invalid target '{target}'")
+    kind = {"service": "svc", "po": "pod", "deployment": "deploy"}.get(
+        match.group(1) or "svc", match.group(1) or "svc"
+    )
+    return f"{kind}/{match.group(2)}"
+
+
+@dataclass
+class PortForward:
+    """A local port relayed to a port of a pod, service or deployment."""
+
+    id: str
+    namespace: str
+    target: str
+    remote_port: int
+    idle_timeout: int
+    server: asyncio.AbstractServer
+    local_port: int
+    state: str = "starting"
+    error: Optional[str] = None
+    restarts: int = 0
+    active_connections: int = 0
+    total_connections: int = 0
+    failed_connections: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    # Time from a connection's first request bytes to its first response
+    # bytes: smoothed and last value (milliseconds)
+    latency_ms: Optional[float] = None
+    last_latency_ms: Optional[float] = None
+    created_at: float = field(default_factory=time.time)
+    last_activity: float = field(default_factory=time.time)
+    backend_port: Optional[int] = None
+    pid: Optional[int] = None
+    _ready: asyncio.Event = field(default_factory=asyncio.Event)
+    _proc: Optional[asyncio.subprocess.Process] = None
+    _task: "Optional[asyncio.Task[None]]" = None
+
+    @property
+    def key(self) -> Tuple[str, str, int]:
+        return (self.namespace, self.target, self.remote_port)
+
+    @property
+    def idle(self) -> bool:
+        return (
+            self.active_connections == 0
+            and time.time() - self.last_activity > self.idle_timeout
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "namespace": self.namespace,
+            "target": self.target,
+            "remote_port": self.remote_port,
+            "local_port": self.local_port,
+            "local_address": f"{FORWARD_HOST}:{self.local_port}",
+            "state": self.state,
+            "error": self.error,
+            "restarts": self.restarts,
+            "active_connections": self.active_connections,
+            "total_connections": self.total_connections,
+            "failed_connections": self.failed_connections,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "latency_ms": self.latency_ms,
+            "last_latency_ms": self.last_latency_ms,
+            "idle_timeout": self.idle_timeout,
+            "created_at": self.created_at,
+            "last_activity": self.last_activity,
+            "pid": self.pid,
+        }
+
+    def _record_latency(self, seconds: float) -> None:
+        sample = round(seconds * 1000, 1)
+        self.last_latency_ms = sample
+        if self.latency_ms is None:
+            self.latency_ms = sample
+        else:
+            self.latency_ms = round(0.8 * self.latency_ms + 0.2 * sample, 1)
+
+    async def _read_stderr(self, proc: asyncio.subprocess.Process) -> None:
+        assert proc.stderr is not None
+        async for raw in proc.stderr:
+            line = raw.decode(errors="replace").strip()
+            if line:
+                self.error = line
+                logger.warning(f"port-forward {self.id}: {line}")
+
+    async def _run_kubectl(self, started: "asyncio.Future[None]") -> None:
+        """Run kubectl until it exits, resolving `started` once it forwards."""
+        kubeconfig = ephemeral_session.require()
+        command = [
+            kubectl_path(),
+            "port-forward",
+            "--kubeconfig",
+            kubeconfig,
+            "--namespace",
+            self.namespace,
+            "--address",
+            FORWARD_HOST,
+            self.target,
+            f":{self.remote_port}",
+        ]
+        proc = await process_supervisor.spawn_async(
+            command, name=f"port-forward-{self.id}", pipe_stderr=True
+        )
+        self._proc = proc
+        self.pid = proc.pid
+        stderr_task = asyncio.create_task(self._read_stderr(proc))
+        try:
+            assert proc.stdout is not None
+            while True:
+                raw = await proc.stdout.readline()
+                if not raw:
+                    break
+                match = FORWARDING_LINE.search(raw.decode(errors="replace"))
+                if match and self.backend_port is None:
+                    self.backend_port = int(match.group(1))
+                    self.state = "ready"
+                    self.error = None
+                    self._ready.set()
+                    if not started.done():
+                        started.set_result(None)
+                    logger.info(
+                        f"Forwarding {FORWARD_HOST}:{self.local_port} -> "
+                        f"{self.namespace}/{self.target}:{self.remote_port}"
+                    )
+            await proc.wait()
+        finally:
+            self._ready.clear()
+            self.backend_port = None
+            self._proc = None
+            self.pid = None
+            await asyncio.to_thread(process_supervisor.kill_tree, proc.pid, 1.0)
+            await stderr_task
+
+    async def _supervise(self, started: "asyncio.Future[None]") -> None:
+        """Keep kubectl running, restarting it with backoff when it exits."""
+        delay = RESTART_DELAY
+        while True:
+            began = time.monotonic()
+            try:
+                await self._run_kubectl(started)
+                if not started.done():
+                    raise PortForwardError(self.error or "kubectl port-forward exited")
+                message = self.error or "kubectl port-forward exited"
+            except (PortForwardError, SessionExpiredError, OSError) as e:
+                if not started.done():
+                    started.set_exception(e)
+                    return
+                message = str(e)
+
+            if time.monotonic() - began > STABLE_RUNTIME:
+                delay = RESTART_DELAY
+            self.state = "reconnecting"
+            self.error = message
+            self.restarts += 1
+            logger.info(f"port-forward {self.id} ended ({message}); retry in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RESTART_DELAY)
+
+    async def start(self) -> None:
+        """
+        Start kubectl and wait until it forwards.
+
+        Raises:
+            PortForwardError: If kubectl failed to start forwarding
+            SessionExpiredError: If the ephemeral cluster session is not valid
+        """
+        started: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._supervise(started))
+        try:
+            await asyncio.wait_for(asyncio.shield(started), START_TIMEOUT)
+        except asyncio.TimeoutError:
+            await self.stop()
+            raise PortForwardError(
+                f"kubectl did not start forwarding within {START_TIMEOUT}s"
+            )
+        except BaseException:
+            await self.stop()
+            raise
+
+    async def stop(self) -> None:
+        """Stop listening and stop kubectl."""
+        self.state = "stopped"
+        self.server.close()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        proc = self._proc
+        if proc is not None:
+            await asyncio.to_thread(process_supervisor.kill_tree, proc.pid, 1.0)
+
+    async def _pipe(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        outbound: bool,
+        timing: Dict[str, float],
+    ) -> None:
+        while True:
+            data = await reader.read(RELAY_CHUNK)
+            if not data:
+                break
+            now = time.perf_counter()
+            self.last_activity = time.time()
+            if outbound:
+                self.bytes_out += len(data)
+                timing.setdefault("sent", now)
+            else:
+                self.bytes_in += len(data)
+                if "sent" in timing and "received" not in timing:
+                    timing["received"] = now
+                    self._record_latency(now - timing["sent"])
+            writer.write(data)
+            # Backpressure: stop reading while the other side is slow
+            await writer.drain()
+        if writer.can_write_eof():
+            try:
+                writer.write_eof()
+            except OSError:
+                pass
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Relay one local connection through kubectl."""
+        self.active_connections += 1
+        self.total_connections += 1
+        self.last_activity = time.time()
+        upstream: Optional[asyncio.StreamWriter] = None
+        try:
+            try:
+                await asyncio.wait_for(self._ready.wait(), CONNECT_WAIT)
+                assert self.backend_port is not None
+                upstream_reader, upstream_writer = await asyncio.wait_for(
+                    asyncio.open_connection(FORWARD_HOST, self.backend_port),
+                    CONNECT_WAIT,
+                )
+                # Closed in the outer finally
+                upstream = upstream_writer
+            except (asyncio.TimeoutError, OSError) as e:
+                self.failed_connections += 1
+                logger.warning(f"port-forward {self.id}: no backend ({e})")
+                if self._proc is not None and isinstance(e, OSError):
+                    # kubectl stopped accepting; restart it
+                    await asyncio.to_thread(
+                        process_supervisor.kill_tree, self._proc.pid, 1.0
+                    )
+                return
+
+            timing: Dict[str, float] = {}
+            pipes = [
+                asyncio.create_task(self._pipe(reader, upstream_writer, True, timing)),
+                asyncio.create_task(self._pipe(upstream_reader, writer, False, timing)),
+            ]
+            try:
+                await asyncio.gather(*pipes)
+            except OSError:
+                pass
+            finally:
+                for pipe in pipes:
+                    pipe.cancel()
+        finally:
+            self.active_connections -= 1
+            self.last_activity = time.time()
+            for stream in (writer, upstream):
+                if stream is not None:
+                    stream.close()
+
+
+class PortForwardManager:
+    """Starts, shares and tears down port-forwards."""
+
+    def __init__(self) -> None:
+        """Initialize the manager."""
+        self._forwards: Dict[str, PortForward] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._reaper: "Optional[asyncio.Task[None]]" = None
+
+    def _find(
+        self, key: Tuple[str, str, int], local_port: Optional[int]
+    ) -> Optional[PortForward]:
+        for forward in self._forwards.values():
+            if forward.key == key and local_port in (None, forward.local_port):
+                return forward
+        return None
+
+    async def start(
+        self,
+        namespace: str,
+        target: str,
+        remote_port: int,
+        local_port: Optional[int] = None,
+        idle_timeout: int = DEFAULT_IDLE_TIMEOUT,
+    ) -> Tuple[PortForward, bool]:
+        """
+        Start a port-forward, or reuse an identical running one.
+
+        Args:
+            namespace: Namespace of the target
+            target: Service name, or svc/, pod/ or deploy/ plus a name
+            remote_port: Port on the target
+            local_port: Local port (default: any free port)
+            idle_timeout: Seconds without connections before it is torn down
+
+        Returns:
+            Tuple of (forward, whether an existing one was reused)
+
+        Raises:
+            PortForwardError: If the forward could not be started
+            SessionExpiredError: If the ephemeral cluster session is not valid
+        """
+        key = (namespace, normalize_target(target), remote_port)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            existing = self._find(key, local_port)
+            if existing is not None:
+                existing.last_activity = time.time()
+                return existing, True
+
+            forward_id = secrets.token_hex(4)
+            forwards = self._forwards
+
+            async def handle(
+                reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+            ) -> None:
+                await forwards[forward_id].handle(reader, writer)
+
+            try:
+                server = await asyncio.start_server(
+                    handle, FORWARD_HOST, local_port or 0, family=socket.AF_INET
+                )
+            except OSError as e:
+                raise PortForwardError(
+                    f"Cannot listen on {FORWARD_HOST}:{local_port}: {e}"
+                )
+            port = server.sockets[0].getsockname()[1]
+            forward = PortForward(
+                id=forward_id,
+                namespace=key[0],
+                target=key[1],
+                remote_port=remote_port,
+                idle_timeout=idle_timeout,
+                server=server,
+                local_port=port,
+            )
+            self._forwards[forward_id] = forward
+            try:
+                await forward.start()
+            except BaseException:
+                del self._forwards[forward_id]
+                raise
+
+            if self._reaper is None or self._reaper.done():
+                self._reaper = asyncio.create_task(self._reap_loop())
+            return forward, False
+
+    def get(self, forward_id: str) -> Optional[PortForward]:
+        """Get a forward by ID."""
+        return self._forwards.get(forward_id)
+
+    def list_forwards(self, namespace: Optional[str] = None) -> List[PortForward]:
+        """Running forwards, optionally of one namespace."""
+        return [f for f in self._forwards.values() if namespace in (None, f.namespace)]
+
+    async def stop(self, forward_id: str) -> bool:
+        """Stop a forward; returns whether it was running."""
+        forward = self._forwards.pop(forward_id, None)
+        if forward is None:
+            return False
+        await forward.stop()
+        logger.info(f"Stopped port-forward {forward_id} to {forward.target}")
+        return True
+
+    async def stop_namespace(self, namespace: str) -> int:
+        """Stop every forward into a namespace; returns how many."""
+        ids = [f.id for f in self._forwards.values() if f.namespace == namespace]
+        for forward_id in ids:
+            await self.stop(forward_id)
+        return len(ids)
+
+    async def reap(self) -> int:
+        """
+        Stop idle forwards and forwards into namespaces no longer reserved.
+
+        Returns:
+            Number of forwards stopped
+        """
+        stopped = 0
+        for forward in list(self._forwards.values()):
+            if forward.idle:
+                logger.info(f"Port-forward {forward.id} idle, tearing it down")
+                stopped += await self.stop(forward.id)
+
+        namespaces = {f.namespace for f in self._forwards.values()}
+        if not namespaces:
+            return stopped
+        try:
+            index = await namespace_list_cache.get()
+        except SessionExpiredError:
+            return stopped
+        if index is None:
+            return stopped
+        for namespace in namespaces:
+            reservation = index.get(namespace)
+            if reservation is None or not reservation.reserved:
+                logger.info(f"Namespace {namespace} released, stopping its forwards")
+                stopped += await self.stop_namespace(namespace)
+        return stopped
+
+    async def _reap_loop(self) -> None:
+        while self._forwards:
+            await asyncio.sleep(REAP_INTERVAL)
+            try:
+                await self.reap()
+            except Exception as e:
+                logger.error(f"Port-forward cleanup failed: {e}")
+
+    async def stop_all(self) -> None:
+        """Stop every forward."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+        for forward_id in list(self._forwards):
+            await self.stop(forward_id)
+
+
+# Global instance
+port_forwards = PortForwardManager()
@@ -0,0 +1,512 @@
+"""Supervisor for helper processes spawned by the service.
+
+Every helper (rhtoken, gnome-terminal, xdg-open, vpn-connect, ...) is started
+in its own session and process group and recorded here, so that the whole
+tree - including Chrome and chromedriver started by rhtoken - can be killed
+on timeout or cancellation instead of being orphaned.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+@dataclass
+class SupervisedProcess:
+    """A helper process tracked by the supervisor."""
+
+    pid: int
+    name: str
+    command: List[str]
+    detached: bool
+    started_at: float = field(default_factory=time.time)
+    handle: Any = field(default=None, repr=False)
+    # Kernel start time of the leader, to tell it from a process reusing its pid
+    start_ticks: Optional[int] = None
+
+    @property
+    def pgid(self) -> int:
+        # Processes are started with start_new_session, so pid == pgid
+        return self.pid
+
+    def is_running(self) -> bool:
+        """Check whether the group leader is still alive (reaping it if possible)."""
+        if isinstance(self.handle, subprocess.Popen):
+            return self.handle.poll() is None
+        if self.handle is not None and self.handle.returncode is not None:
+            return False
+        return _pid_alive(self.pid)
+
+    def owns_pid(self) -> bool:
+        """Check whether the pid (alive or a zombie) is still the recorded leader."""
+        return (
+            self.start_ticks is not None
+            and _read_start_ticks(self.pid) == self.start_ticks
+        )
+
+
+def _read_proc_stat(pid: int) -> Optional[Tuple[str, str, int, int]]:
+    """
+    Read (comm, state, ppid, pgid) for a pid from /proc.
+
+    Returns:
+        Tuple of process fields or None if the process is gone
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    # comm may contain spaces and parentheses, so split on the last ')'
+    comm = data[data.find("(") + 1 : data.rfind(")")]
+    fields = data[data.rfind(")") + 2 :].split()
+    return comm, fields[0], int(fields[1]), int(fields[2])
+
+
+def _read_start_ticks(pid: int) -> Optional[int]:
+    """Read the start time of a process (clock ticks since boot) from /proc."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            data = f.read()
+        return int(data[data.rfind(")") + 2 :].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _read_rss_bytes(pid: int) -> Optional[int]:
+    """Read resident set size of a process in bytes from /proc."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    """Check if a pid exists and is not a zombie."""
+    stat = _read_proc_stat(pid)
+    return stat is not None and stat[1] != "Z"
+
+
+def _process_table() -> Dict[int, Tuple[str, str, int, int]]:
+    """Snapshot of all processes visible in /proc keyed by pid."""
+    table = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        stat = _read_proc_stat(int(entry))
+        if stat is not None:
+            table[int(entry)] = stat
+    return table
+
+
+def _tree_members(pgid: int, table: Dict[int, Tuple[str, str, int, int]]) -> Set[int]:
+    """
+    Collect all live members of a helper's process tree.
+
+    Includes every process in the helper's process group plus any descendants
+    that moved to a different group (e.g. browsers that call setsid).
+    """
+    members = {pid for pid, stat in table.items() if stat[3] == pgid}
+    if pgid in table:
+        members.add(pgid)
+
+    changed = True
+    while changed:
+        changed = False
+        for pid, stat in table.items():
+            if pid not in members and stat[2] in members:
+                members.add(pid)
+                changed = True
+
+    return {pid for pid in members if table[pid][1] != "Z"}
+
+
+class ProcessSupervisor:
+    """Tracks helper processes and kills their whole tree when needed."""
+
+    def __init__(self, reap_interval: float = 30.0, kill_grace: float = 3.0):
+        """
+        Initialize the process supervisor.
+
+        Args:
+            reap_interval: Seconds between background reaper passes
+            kill_grace: Seconds to wait after SIGTERM before sending SIGKILL
+        """
+        self.reap_interval = reap_interval
+        self.kill_grace = kill_grace
+        self._lock = threading.Lock()
+        self._processes: Dict[int, SupervisedProcess] = {}
+        self._reaper_task: Optional[asyncio.Task] = None
+
+    def _track(
+        self, pid: int, name: str, cmd: Sequence[str], detached: bool, handle: Any
+    ) -> SupervisedProcess:
+        record = SupervisedProcess(
+            pid=pid,
+            name=name,
+            command=[str(c) for c in cmd],
+            detached=detached,
+            handle=handle,
+            start_ticks=_read_start_ticks(pid),
+        )
+        with self._lock:
+            self._processes[pid] = record
+        logger.debug(f"Tracking helper process {name} (PID {pid})")
+        return record
+
+    def _forget(self, pid: int) -> None:
+        with self._lock:
+            self._processes.pop(pid, None)
+
+    def spawn(
+        self,
+        cmd: Sequence[str],
+        name: Optional[str] = None,
+        detached: bool = False,
+        **popen_kwargs: Any,
+    ) -> subprocess.Popen:
+        """
+        Start a helper process in its own session and track it.
+
+        Args:
+            cmd: Command and arguments
+            name: Label shown in the process listing (defaults to the executable)
+            detached: If True the helper is expected to outlive the request
+                (terminals, browsers) and is never killed by the supervisor
+            **popen_kwargs: Extra arguments passed to subprocess.Popen
+
+        Returns:
+            The started Popen object
+        """
+        popen_kwargs["start_new_session"] = True
+        proc = subprocess.Popen(list(cmd), **popen_kwargs)
+        self._track(
+            proc.pid, name or os.path.basename(str(cmd[0])), cmd, detached, proc
+        )
+        return proc
+
+    def run(
+        self,
+        cmd: Sequence[str],
+        timeout: float,
+        name: Optional[str] = None,
+        check: bool = False,
+        **popen_kwargs: Any,
+    ) -> subprocess.CompletedProcess:
+        """
+        Run a helper to completion, killing its whole tree on timeout.
+
+        Mirrors subprocess.run(capture_output=True, text=True).
+
+        Raises:
+            subprocess.TimeoutExpired: If the helper did not finish in time
+            subprocess.CalledProcessError: If check is True and it failed
+        """
+        proc = self.spawn(
+            cmd,
+            name=name,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            **popen_kwargs,
+        )
+        try:
+            stdout, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Helper {cmd[0]} timed out after {timeout}s, killing tree")
+            self.kill_tree(proc.pid)
+            stdout, stderr = proc.communicate()
+            raise subprocess.TimeoutExpired(cmd, timeout, stdout, stderr)
+        except BaseException:
+            self.kill_tree(proc.pid)
+            proc.wait()
+            raise
+        finally:
+            # Kill anything the helper left behind in its group (e.g. Chrome)
+            self.kill_tree(proc.pid)
+            self._forget(proc.pid)
+
+        if check and proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
+
+        return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+    async def run_async(
+        self,
+        cmd: Sequence[str],
+        timeout: float,
+        name: Optional[str] = None,
+        check: bool = False,
+        env: Optional[Dict[str, str]] = None,
+        on_stderr_line: Optional[Callable[[str], None]] = None,
+        input: Optional[bytes] = None,
+    ) -> subprocess.CompletedProcess:
+        """
+        Async variant of run() that does not block the event loop.
+
+        The helper tree is killed on timeout and when the awaiting task is
+        cancelled (e.g. the HTTP client went away). With `on_stderr_line`,
+        each stderr line is passed to it as soon as it is written (e.g. to
+        report progress of a long-running helper). `input` is written to the
+        helper's stdin through a pipe, which is then closed.
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *[str(c) for c in cmd],
+            stdin=asyncio.subprocess.PIPE if input is not None else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+            start_new_session=True,
+        )
+        self._track(proc.pid, name or os.path.basename(str(cmd[0])), cmd, False, proc)
+
+        async def communicate() -> Tuple[bytes, bytes]:
+            if on_stderr_line is None:
+                return await proc.communicate(input)
+            assert proc.stdout is not None and proc.stderr is not None
+            if input is not None and proc.stdin is not None:
+                proc.stdin.write(input)
+                await proc.stdin.drain()
+                proc.stdin.close()
+            stderr_lines = []
+
+            async def read_stderr() -> None:
+                assert proc.stderr is not None
+                async for line in proc.stderr:
+                    stderr_lines.append(line)
+                    on_stderr_line(line.decode(errors="replace").rstrip())
+
+            # Read both pipes at once so a full stdout pipe cannot block it
+            stdout, _ = await asyncio.gather(proc.stdout.read(), read_stderr())
+            await proc.wait()
+            return stdout, b"".join(stderr_lines)
+
+        timed_out = False
+        try:
+            stdout, stderr = await asyncio.wait_for(communicate(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Helper {cmd[0]} timed out after {timeout}s, killing tree")
+            timed_out = True
+        finally:
+            # Kills the tree on timeout or cancellation, and otherwise anything
+            # the helper left behind in its group; /proc is scanned off the loop
+            try:
+                await asyncio.to_thread(self.kill_tree, proc.pid)
+            finally:
+                self._forget(proc.pid)
+
+        if timed_out:
+            await proc.wait()
+            raise subprocess.TimeoutExpired(cmd, timeout)
+
+        out, err = stdout.decode(errors="replace"), stderr.decode(errors="replace")
+        if check and proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode or 1, cmd, out, err)
+
+        return subprocess.CompletedProcess(cmd, proc.returncode or 0, out, err)
+
+    async def spawn_async(
+        self,
+        cmd: Sequence[str],
+        name: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        limit: int = 2**16,
+        pipe_stderr: bool = False,
+    ) -> asyncio.subprocess.Process:
+        """
+        Start a long-lived helper with piped stdin/stdout and track it.
+
+        Its stderr is inherited (ends up in the service log) unless piped. The
+        helper tree is killed by kill_tree() or when the supervisor stops.
+
+        Args:
+            cmd: Command and arguments
+            name: Label shown in the process listing
+            env: Environment (default: the service's)
+            limit: Maximum line length read from its stdout
+            pipe_stderr: Pipe stderr too; the caller must keep reading it
+
+        Returns:
+            The started asyncio process
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *[str(c) for c in cmd],
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE if pipe_stderr else None,
+            env=env,
+            start_new_session=True,
+            limit=limit,
+        )
+        self._track(proc.pid, name or os.path.basename(str(cmd[0])), cmd, False, proc)
+        return proc
+
+    def kill_tree(self, pgid: int, grace: Optional[float] = None) -> int:
+        """
+        Kill a helper's process group and any descendants.
+
+        Sends SIGTERM, waits up to the grace period, then SIGKILLs survivors.
+        Nothing is killed if the pid now belongs to another process than the
+        tracked helper. Blocks for up to the grace period, so async callers
+        run it in a thread.
+
+        Args:
+            pgid: Process group id (the helper's pid)
+            grace: Override for the SIGTERM grace period
+
+        Returns:
+            Number of processes that were signalled
+        """
+        with self._lock:
+            record = self._processes.get(pgid)
+        if record is not None and record.start_ticks is not None:
+            ticks = _read_start_ticks(pgid)
+            if ticks is not None and ticks != record.start_ticks:
+                logger.warning(f"PID {pgid} was reused, not killing its group")
+                return 0
+
+        members = _tree_members(pgid, _process_table())
+        if not members:
+            return 0
+
+        logger.info(f"Terminating helper tree {pgid}: {sorted(members)}")
+        self._signal_all(pgid, members, signal.SIGTERM)
+
+        deadline = time.monotonic() + (self.kill_grace if grace is None else grace)
+        while time.monotonic() < deadline:
+            if not any(_pid_alive(pid) for pid in members):
+                return len(members)
+            time.sleep(0.1)
+
+        survivors = {pid for pid in members if _pid_alive(pid)}
+        if survivors:
+            logger.warning(f"Killing unresponsive helper processes: {survivors}")
+            self._signal_all(pgid, survivors, signal.SIGKILL)
+
+        return len(members)
+
+    @staticmethod
+    def _signal_all(pgid: int, pids: Set[int], sig: signal.Signals) -> None:
+        try:
+            os.killpg(pgid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+    def reap(self) -> int:
+        """
+        Forget exited helpers and kill stragglers left in their groups.
+
+        Detached helpers are only forgotten once they exit; their trees
+        are never killed. Stragglers are only killed while the exited leader
+        is still unreaped here: once it has been reaped elsewhere its pgid
+        may be reused by an unrelated process group.
+
+        Returns:
+            Number of records removed
+        """
+        with self._lock:
+            records = list(self._processes.values())
+
+        removed = 0
+        for record in records:
+            # Checked before is_running(), which may reap the leader
+            owned = record.owns_pid()
+            if record.is_running():
+                continue
+            if owned and not record.detached:
+                self.kill_tree(record.pgid)
+            self._forget(record.pid)
+            removed += 1
+
+        if removed:
+            logger.debug(f"Reaped {removed} helper process(es)")
+        return removed
+
+    def list_processes(self) -> List[Dict[str, Any]]:
+        """
+        List tracked helpers and the live members of their trees.
+
+        Returns:
+            One entry per helper with per-process RSS in bytes
+        """
+        with self._lock:
+            records = list(self._processes.values())
+
+        table = _process_table()
+        now = time.time()
+        result = []
+        for record in records:
+            members = _tree_members(record.pgid, table)
+            rss = {pid: _read_rss_bytes(pid) for pid in members}
+            children = [
+                {
+                    "pid": pid,
+                    "ppid": table[pid][2],
+                    "name": table[pid][0],
+                    "rss_bytes": rss[pid],
+                }
+                for pid in sorted(members)
+            ]
+            result.append(
+                {
+                    "pid": record.pid,
+                    "name": record.name,
+                    "command": record.command,
+                    "detached": record.detached,
+                    "running": record.is_running(),
+                    "age_seconds": round(now - record.started_at, 1),
+                    "rss_bytes": sum(value or 0 for value in rss.values()),
+                    "processes": children,
+                }
+            )
+        return result
+
+    async def _reaper_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                await asyncio.to_thread(self.reap)
+            except Exception as e:
+                logger.error(f"Error reaping helper processes: {e}")
+
+    def start(self) -> None:
+        """Start the periodic background reaper."""
+        if self._reaper_task is None:
+            self._reaper_task = asyncio.get_running_loop().create_task(
+                self._reaper_loop()
+            )
+
+    async def stop(self) -> None:
+        """Stop the reaper and kill all non-detached helper trees."""
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+
+        with self._lock:
+            records = list(self._processes.values())
+
+        for record in records:
+            if not record.detached:
+                await asyncio.to_thread(self.kill_tree, record.pgid)
+            self._forget(record.pid)
+
+
+# Global instance
+process_supervisor = ProcessSupervisor()
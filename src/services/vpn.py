@@ -1,26 +1,35 @@
 """VPN-related business logic and services."""
 
+import asyncio
 import logging
 import subprocess
+import time
+from dataclasses import dataclass, replace
 from functools import lru_cache
-from pathlib import Path
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, cast
 
-import yaml
 from fastapi import HTTPException
 
+from services.process_supervisor import process_supervisor
+from services.vpn_profiles import ProfileRegistry, profile_store
+
 logger = logging.getLogger(__name__)
 
+try:
+    from dbus_next import BusType, Message, MessageType
+    from dbus_next.aio import MessageBus
 
-# Cache profiles config to avoid repeated YAML parsing
-_profiles_cache = None
-_profiles_cache_mtime = None
+    DBUS_AVAILABLE = True
+except ImportError:
+    DBUS_AVAILABLE = False
 
 
 def load_vpn_profiles(use_cache: bool = True) -> Dict[str, Any]:
     """
     Load VPN profiles from profiles.yaml with optional caching.
 
+    Reloading the file also rebuilds the profile registry.
+
     Args:
         use_cache: If True, use cached profiles if file hasn't changed
 
@@ -30,69 +39,510 @@ def load_vpn_profiles(use_cache: bool = True) -> Dict[str, Any]:
     Raises:
         HTTPException: If profiles file not found
     """
-    global _profiles_cache, _profiles_cache_mtime
+    return _load_profiles(use_cache)[0]
+
+
+def get_profile_registry() -> ProfileRegistry:
+    """
+    Get the indexed VPN profiles, reloading profiles.yaml if it changed.
+
+    Raises:
+        HTTPException: If profiles file not found
+    """
+    return _load_profiles(True)[1]
 
-    profiles_file = Path(__file__).parent.parent / "vpn-profiles" / "profiles.yaml"
 
-    if not profiles_file.exists():
+def _load_profiles(use_cache: bool) -> Tuple[Dict[str, Any], ProfileRegistry]:
+    try:
+        return profile_store.load(use_cache)
+    except FileNotFoundError:
         raise HTTPException(
             status_code=404,
             detail="VPN profiles configuration not found. Run: make vpn-profiles-scan",
         )
 
-    # Check if we can use cache
-    if use_cache and _profiles_cache is not None:
-        current_mtime = profiles_file.stat().st_mtime
-        if current_mtime == _profiles_cache_mtime:
-            logger.debug("Using cached VPN profiles")
-            return cast(Dict[str, Any], _profiles_cache)
 
-    # Load from file
-    with open(profiles_file) as f:
-        config = cast(Dict[str, Any], yaml.safe_load(f))
+# NetworkManager D-Bus names
+NM_BUS = "org.freedesktop.NetworkManager"
+NM_PATH = "/org/freedesktop/NetworkManager"
+NM_ACTIVE = "org.freedesktop.NetworkManager.Connection.Active"
+NM_VPN = "org.freedesktop.NetworkManager.VPN.Connection"
+DBUS_PROPERTIES = "org.freedesktop.DBus.Properties"
+
+# NMActiveConnectionState and NMVpnConnectionState names
+ACTIVE_STATES = {
+    0: "unknown",
+    1: "activating",
+    2: "activated",
+    3: "deactivating",
+    4: "deactivated",
+}
+VPN_STATES = {
+    0: "unknown",
+    1: "prepare",
+    2: "need-auth",
+    3: "connect",
+    4: "ip-config-get",
+    5: "activated",
+    6: "failed",
+    7: "disconnected",
+}
+
+# Seconds between attempts to reconnect to the system bus
+DBUS_RETRY_MIN = 2.0
+DBUS_RETRY_MAX = 60.0
+
+NM_SIGNAL_RULES = [
+    f"type='signal',sender='{NM_BUS}',path='{NM_PATH}',"
+    f"interface='{DBUS_PROPERTIES}',member='PropertiesChanged'",
+    f"type='signal',sender='{NM_BUS}',interface='{NM_ACTIVE}',member='StateChanged'",
+    f"type='signal',sender='{NM_BUS}',interface='{NM_VPN}',member='VpnStateChanged'",
+    "type='signal',sender='org.freedesktop.DBus',member='NameOwnerChanged',"
+    f"arg0='{NM_BUS}'",
+]
+
+
+@dataclass
+class ActiveConnection:
+    """An active NetworkManager connection."""
+
+    path: str
+    name: str
+    uuid: str
+    type: str
+    vpn: bool
+    state: str
+    vpn_state: Optional[str] = None
+
+    @property
+    def is_vpn(self) -> bool:
+        return self.vpn or "vpn" in self.type.lower()
+
+    @property
+    def activated(self) -> bool:
+        if self.vpn_state is not None:
+            return self.vpn_state == "activated"
+        return self.state == "activated"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "profile_name": self.name,
+            "connection_uuid": self.uuid,
+            "type": self.type,
+            "state": self.state,
+            "vpn_state": self.vpn_state,
+        }
+
+
+def vpn_status(connections: List[ActiveConnection], source: str) -> Dict[str, Any]:
+    """
+    Summarize active connections as a VPN status.
 
-    # Update cache
-    if use_cache:
-        _profiles_cache = config
-        _profiles_cache_mtime = profiles_file.stat().st_mtime
-        logger.debug("VPN profiles loaded and cached")
+    The first activated VPN (or else the first activating one) is reported
+    as the connection; every VPN is listed under "vpn_connections".
+    """
+    vpns = [c for c in connections if c.is_vpn]
+    vpns.sort(key=lambda c: not c.activated)
+    status: Dict[str, Any] = {
+        "connected": bool(vpns) and vpns[0].activated,
+        "source": source,
+        "vpn_connections": [c.to_dict() for c in vpns],
+    }
+    if vpns:
+        status.update(vpns[0].to_dict())
+    return status
+
+
+def split_terse(line: str) -> List[str]:
+    """Split an `nmcli -t` line on unescaped colons."""
+    fields, current, escaped = [], [], False
+    for char in line:
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == ":":
+            fields.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    fields.append("".join(current))
+    return fields
+
+
+def nmcli_active_connections() -> List[ActiveConnection]:
+    """
+    List active connections with `nmcli -t`.
 
-    return config
+    Raises:
+        subprocess.CalledProcessError: If nmcli fails
+    """
+    result = subprocess.run(
+        ["nmcli", "-t", "-f", "NAME,UUID,TYPE,STATE", "connection", "show", "--active"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    connections = []
+    for line in result.stdout.splitlines():
+        fields = split_terse(line)
+        if len(fields) != 4:
+            continue
+        name, uuid, type_, state = fields
+        connections.append(
+            ActiveConnection(
+                path="",
+                name=name,
+                uuid=uuid,
+                type=type_,
+                vpn=type_ == "vpn",
+                state=state,
+            )
+        )
+    return connections
 
 
-def get_vpn_connection_status() -> Dict[str, Any]:
-    """Get current VPN connection status using nmcli."""
-    try:
-        result = subprocess.run(
-            ["nmcli", "connection", "show", "--active"],
-            capture_output=True,
-            text=True,
-            check=True,
+class NetworkManagerMonitor:
+    """
+    Tracks NetworkManager's active connections from its D-Bus signals.
+
+    The active connections are read once when the bus is connected and then
+    kept current from ActiveConnections property changes and the state
+    signals of each active (VPN) connection, so status queries are answered
+    from memory. The bus is reconnected (and the state reread) when it drops
+    or NetworkManager restarts. Without dbus-next or a system bus, status
+    queries run `nmcli -t` instead.
+
+    Uses the system bus at $DBUS_SYSTEM_BUS_ADDRESS, so a python-dbusmock
+    NetworkManager on a private bus can stand in for the real one.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the monitor (not connected until start())."""
+        self._bus: Any = None
+        self._task: "Optional[asyncio.Task[None]]" = None
+        # Replaced, never mutated, so threadpool readers see a consistent copy
+        self._connections: Dict[str, ActiveConnection] = {}
+        self._synced = False
+        self._sync_lock = asyncio.Lock()
+        self._pending: "set[asyncio.Task[None]]" = set()
+        self._changed = asyncio.Event()
+
+    @property
+    def available(self) -> bool:
+        """Whether status is being tracked over D-Bus."""
+        return self._synced and self._bus is not None
+
+    def start(self) -> None:
+        """Start tracking in the background if dbus-next is installed."""
+        if not DBUS_AVAILABLE:
+            logger.info("dbus-next not installed; VPN status uses nmcli")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop tracking and disconnect from the bus."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for task in list(self._pending):
+            task.cancel()
+        self._disconnect()
+
+    def _disconnect(self) -> None:
+        self._synced = False
+        if self._bus is not None:
+            self._bus.disconnect()
+            self._bus = None
+
+    async def _run(self) -> None:
+        delay = DBUS_RETRY_MIN
+        while True:
+            try:
+                bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
+                self._bus = bus
+                bus.add_message_handler(self._on_message)
+                for rule in NM_SIGNAL_RULES:
+                    await self._call(
+                        "/org/freedesktop/DBus",
+                        "org.freedesktop.DBus",
+                        "AddMatch",
+                        "s",
+                        [rule],
+                        destination="org.freedesktop.DBus",
+                    )
+                await self._sync()
+                logger.info("Tracking NetworkManager connections over D-Bus")
+                delay = DBUS_RETRY_MIN
+                await bus.wait_for_disconnect()
+                logger.warning("System bus disconnected; VPN status uses nmcli")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"NetworkManager D-Bus unavailable ({e}); using nmcli")
+            self._disconnect()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, DBUS_RETRY_MAX)
+
+    async def _call(
+        self,
+        path: str,
+        interface: str,
+        member: str,
+        signature: str = "",
+        body: Optional[List[Any]] = None,
+        destination: str = NM_BUS,
+    ) -> List[Any]:
+        """Call a (NetworkManager) D-Bus method and return its reply body."""
+        reply = await self._bus.call(
+            Message(
+                destination=destination,
+                path=path,
+                interface=interface,
+                member=member,
+                signature=signature,
+                body=body or [],
+            )
+        )
+        if reply.message_type == MessageType.ERROR:
+            raise RuntimeError(f"{member} failed: {reply.error_name} {reply.body}")
+        return cast(List[Any], reply.body)
+
+    async def _properties(self, path: str, interface: str) -> Dict[str, Any]:
+        (props,) = await self._call(path, DBUS_PROPERTIES, "GetAll", "s", [interface])
+        return {key: variant.value for key, variant in props.items()}
+
+    async def _read_connection(self, path: str) -> Optional[ActiveConnection]:
+        """Read an active connection; None if it is already gone."""
+        try:
+            props = await self._properties(path, NM_ACTIVE)
+            vpn_state = None
+            if props.get("Vpn"):
+                vpn_props = await self._properties(path, NM_VPN)
+                vpn_state = VPN_STATES.get(vpn_props.get("VpnState", 0), "unknown")
+        except RuntimeError:
+            return None
+        return ActiveConnection(
+            path=path,
+            name=props.get("Id", ""),
+            uuid=props.get("Uuid", ""),
+            type=props.get("Type", ""),
+            vpn=bool(props.get("Vpn")),
+            state=ACTIVE_STATES.get(props.get("State", 0), "unknown"),
+            vpn_state=vpn_state,
         )
 
-        # Look for active VPN connections
-        for line in result.stdout.splitlines():
-            parts = line.split()
-            # Check if this is a VPN connection (type field contains 'vpn')
-            if len(parts) >= 4 and "vpn" in parts[-2].lower():
-                conn_name = " ".join(
-                    parts[:-3]
-                )  # Name is everything except last 3 fields (uuid, type, device)
-                conn_uuid = parts[-3]
-
-                return {
-                    "connected": True,
-                    "profile_name": conn_name,
-                    "connection_uuid": conn_uuid,
+    async def _sync(self, paths: Optional[List[str]] = None) -> None:
+        """Bring the model up to date with the given (or current) paths."""
+        async with self._sync_lock:
+            if paths is None:
+                (active,) = await self._call(
+                    NM_PATH,
+                    DBUS_PROPERTIES,
+                    "Get",
+                    "ss",
+                    [NM_BUS, "ActiveConnections"],
+                )
+                paths = list(active.value)
+            read = {}
+            for path in paths:
+                if path not in self._connections:
+                    connection = await self._read_connection(path)
+                    if connection is not None:
+                        read[path] = connection
+            # Known connections may have changed state while reading
+            current = self._connections
+            self._synced = True
+            self._set(
+                {
+                    path: current.get(path) or read[path]
+                    for path in paths
+                    if path in current or path in read
                 }
+            )
+
+    def _schedule(self, coro: Any) -> None:
+        task = asyncio.create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _set(self, connections: Dict[str, ActiveConnection]) -> None:
+        """Replace the model and wake up waiters."""
+        self._connections = connections
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _update(self, path: str, **changes: Any) -> None:
+        known = self._connections.get(path)
+        if known is None:
+            return
+        self._set({**self._connections, path: replace(known, **changes)})
+
+    def _on_message(self, message: Any) -> None:
+        """Apply a NetworkManager signal to the model."""
+        if message.message_type != MessageType.SIGNAL:
+            return
+        member, interface, path = message.member, message.interface, message.path
+        if member == "PropertiesChanged" and path == NM_PATH:
+            interface_name, changed = message.body[0], message.body[1]
+            if interface_name == NM_BUS and "ActiveConnections" in changed:
+                paths = list(changed["ActiveConnections"].value)
+                self._schedule(self._sync(paths))
+        elif member == "StateChanged" and interface == NM_ACTIVE:
+            state = ACTIVE_STATES.get(message.body[0], "unknown")
+            if state == "deactivated":
+                self._set({p: c for p, c in self._connections.items() if p != path})
+            else:
+                self._update(path, state=state)
+        elif member == "VpnStateChanged" and interface == NM_VPN:
+            self._update(path, vpn_state=VPN_STATES.get(message.body[0], "unknown"))
+        elif member == "NameOwnerChanged":
+            # NetworkManager restarted (or stopped): its old paths are stale
+            self._set({})
+            if message.body[2]:
+                self._schedule(self._sync())
+            else:
+                self._synced = False
+
+    def active_connections(self) -> List[ActiveConnection]:
+        """Active connections from memory (empty until synced)."""
+        return list(self._connections.values())
+
+    def find(self, uuid: str) -> Optional[ActiveConnection]:
+        """The active connection of a connection profile UUID, if any."""
+        for connection in self._connections.values():
+            if connection.uuid == uuid:
+                return connection
+        return None
+
+    async def wait_changed(self) -> None:
+        """Wait for the next change of the active connections."""
+        await self._changed.wait()
+
 
-        return {"connected": False}
+# Global instance
+network_manager = NetworkManagerMonitor()
 
-    except subprocess.CalledProcessError as e:
+
+def get_vpn_connection_status() -> Dict[str, Any]:
+    """
+    Get the current VPN connection status.
+
+    Answered from the D-Bus tracked state when available, otherwise from
+    `nmcli -t`.
+
+    Returns:
+        Dict with "connected", the reported connection's "profile_name",
+        "connection_uuid" and state, and every VPN under "vpn_connections"
+    """
+    if network_manager.available:
+        return vpn_status(network_manager.active_connections(), "dbus")
+    try:
+        return vpn_status(nmcli_active_connections(), "nmcli")
+    except (OSError, subprocess.CalledProcessError) as e:
         logger.error(f"Error checking VPN status: {e}")
         return {"connected": False, "error": str(e)}
 
 
+# Seconds NetworkManager may take to activate a VPN
+VPN_CONNECT_TIMEOUT = 60
+
+
+async def connect_vpn(
+    password_store_service, uuid: str, timeout: int = VPN_CONNECT_TIMEOUT
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Connect a VPN profile, reporting its activation progress.
+
+    Generates the associate password (PIN + OTP) in-process and passes it to
+    `nmcli connection up` as its passwd-file through a stdin pipe, so it is
+    never written to disk. While NetworkManager activates the connection,
+    its state changes are reported from the D-Bus monitor (when available).
+
+    Args:
+        password_store_service: Service for accessing password store
+        uuid: NetworkManager connection UUID
+        timeout: Seconds to wait for the activation
+
+    Yields:
+        Progress event dicts with "seq" and "stage" ("credentials",
+        "activating", "state", then "done" with "success" and "error")
+    """
+    seq = 0
+
+    def event(stage: str, **data: Any) -> Dict[str, Any]:
+        nonlocal seq
+        seq += 1
+        return {"seq": seq, "time": time.time(), "stage": stage, **data}
+
+    yield event("credentials", message="Generating VPN credentials")
+    try:
+        _, password = await asyncio.to_thread(
+            password_store_service.get_associate_credentials
+        )
+    except Exception as e:
+        logger.error(f"Error generating VPN credentials: {e}")
+        password = None
+    if not password or "\n" in password:
+        yield event("done", success=False, error="Failed to generate VPN credentials")
+        return
+
+    yield event("activating", message=f"Activating connection {uuid}")
+    activation = asyncio.create_task(
+        process_supervisor.run_async(
+            ["nmcli", "--wait", str(timeout), "connection", "up", "uuid", uuid]
+            + ["passwd-file", "/dev/stdin"],
+            timeout=timeout + 10,
+            name="nmcli connection up",
+            input=f"vpn.secrets.password:{password}\n".encode(),
+        )
+    )
+    reported = None
+    try:
+        while not activation.done():
+            connection = (
+                network_manager.find(uuid) if network_manager.available else None
+            )
+            if connection is not None:
+                state = (connection.state, connection.vpn_state)
+                if state != reported:
+                    reported = state
+                    yield event(
+                        "state",
+                        message=f"{connection.name}: "
+                        f"{connection.vpn_state or connection.state}",
+                        state=connection.state,
+                        vpn_state=connection.vpn_state,
+                    )
+            changed = asyncio.ensure_future(network_manager.wait_changed())
+            await asyncio.wait(
+                {activation, changed}, return_when=asyncio.FIRST_COMPLETED
+            )
+            changed.cancel()
+        result = activation.result()
+    except subprocess.TimeoutExpired:
+        yield event("done", success=False, error="Connection timeout", timeout=True)
+        return
+    except OSError as e:
+        yield event("done", success=False, error=f"Cannot run nmcli: {e}")
+        return
+    finally:
+        # Kills nmcli if the client went away mid-activation
+        activation.cancel()
+
+    if result.returncode != 0:
+        error = (result.stderr or result.stdout or "Connection failed").strip()
+        logger.error(f"VPN connect failed for {uuid}: {error}")
+        yield event("done", success=False, error=error)
+        return
+
+    logger.info(f"Connected VPN {uuid}")
+    yield event("done", success=True, error=None)
+
+
 def get_default_vpn_uuid(password_store_service) -> Optional[str]:
     """
     Get the default VPN UUID from password store.
@@ -0,0 +1,225 @@
+"""Indexed registry of the VPN profiles in profiles.yaml.
+
+profiles.yaml is parsed once per change of the file into compact profile
+objects (with the file's default_settings merged in) and maps by ID,
+UUID and connection name, so lookups do not scan or copy the raw YAML.
+Shared by the API and the vpn-profile-manager command, so it does not
+depend on FastAPI.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+PROFILES_FILE = PROJECT_DIR / "vpn-profiles" / "profiles.yaml"
+
+# Settings with their own profile attributes; the rest stay in `extra`
+PROFILE_FIELDS = (
+    "id",
+    "name",
+    "remote",
+    "uuid",
+    "port",
+    "proto_tcp",
+    "tunnel_mtu",
+    "dns_search",
+    "route_table",
+)
+
+NO_EXTRA: Mapping[str, Any] = MappingProxyType({})
+
+# libyaml's loader parses large files an order of magnitude faster
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@dataclass(frozen=True, slots=True)
+class Profile:
+    """A VPN profile with default_settings merged in."""
+
+    id: str
+    name: str
+    remote: str
+    uuid: Optional[str]
+    port: Optional[int]
+    proto_tcp: Optional[bool]
+    tunnel_mtu: Optional[int]
+    dns_search: Optional[str]
+    route_table: Optional[int]
+    # Other profile-specific settings (usually none)
+    extra: Mapping[str, Any]
+    # default_settings, shared by all profiles of a registry
+    defaults: Mapping[str, Any] = field(repr=False)
+
+    def settings(self) -> Dict[str, Any]:
+        """All settings (defaults overridden by the profile), e.g. for templates."""
+        settings = dict(self.defaults)
+        settings.update(self.extra)
+        for name in PROFILE_FIELDS:
+            value = getattr(self, name)
+            if value is not None or name not in settings:
+                settings[name] = value
+        return settings
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The profile's own attributes, as returned by the API."""
+        return {name: getattr(self, name) for name in PROFILE_FIELDS}
+
+
+def build_profile(raw: Mapping[str, Any], defaults: Mapping[str, Any]) -> Profile:
+    """Build a profile from its profiles.yaml entry and the defaults."""
+
+    def setting(name: str) -> Any:
+        return raw[name] if name in raw else defaults.get(name)
+
+    extra = {k: v for k, v in raw.items() if k not in PROFILE_FIELDS}
+    return Profile(
+        id=str(raw["id"]),
+        name=str(raw.get("name") or raw["id"]),
+        remote=str(raw.get("remote", "")),
+        uuid=raw.get("uuid") or None,
+        port=setting("port"),
+        proto_tcp=setting("proto_tcp"),
+        tunnel_mtu=setting("tunnel_mtu"),
+        dns_search=setting("dns_search"),
+        route_table=setting("route_table"),
+        extra=MappingProxyType(extra) if extra else NO_EXTRA,
+        defaults=defaults,
+    )
+
+
+class ProfileRegistry:
+    """VPN profiles in file order, indexed by ID, UUID and connection name."""
+
+    def __init__(self, profiles: List[Profile], defaults: Mapping[str, Any]):
+        """
+        Initialize the registry.
+
+        Args:
+            profiles: Profiles in file order
+            defaults: default_settings the profiles were built with
+        """
+        self.profiles = profiles
+        self.defaults = defaults
+        self._by_id: Dict[str, Profile] = {}
+        self._by_uuid: Dict[str, Profile] = {}
+        self._by_name: Dict[str, Profile] = {}
+        # Lookups return the first profile of a key, as the old scans did
+        for profile in profiles:
+            self._by_id.setdefault(profile.id.upper(), profile)
+            if profile.uuid:
+                self._by_uuid.setdefault(profile.uuid, profile)
+            self._by_name.setdefault(profile.name, profile)
+
+    @classmethod
+    def from_config(cls, config: Optional[Mapping[str, Any]]) -> "ProfileRegistry":
+        """Build a registry from parsed profiles.yaml content."""
+        config = config or {}
+        defaults = MappingProxyType(dict(config.get("default_settings") or {}))
+        profiles = [
+            build_profile(raw, defaults) for raw in config.get("profiles") or []
+        ]
+        return cls(profiles, defaults)
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def __iter__(self) -> Iterator[Profile]:
+        return iter(self.profiles)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        """Find a profile by ID (case-insensitive)."""
+        return self._by_id.get(profile_id.upper())
+
+    def get_by_uuid(self, uuid: str) -> Optional[Profile]:
+        """Find a profile by NetworkManager connection UUID."""
+        return self._by_uuid.get(uuid)
+
+    def get_by_name(self, name: str) -> Optional[Profile]:
+        """Find a profile by NetworkManager connection name."""
+        return self._by_name.get(name)
+
+    def match_connection(
+        self, name: Optional[str], uuid: Optional[str]
+    ) -> Optional[Profile]:
+        """Find the profile of an active connection, by UUID, then by name."""
+        profile = self.get_by_uuid(uuid) if uuid else None
+        if profile is None and name:
+            profile = self.get_by_name(name)
+        return profile
+
+    @property
+    def global_profile(self) -> Optional[Profile]:
+        """The GLOBAL profile."""
+        return self.get("GLOBAL")
+
+    def duplicates(self) -> Dict[str, List[Profile]]:
+        """
+        Profiles whose ID exactly repeats an earlier profile's, by ID.
+
+        IDs differing only in case are not duplicates, as the connections of
+        duplicates get deleted; get() still only finds the first of them.
+        """
+        seen = set()
+        duplicates: Dict[str, List[Profile]] = {}
+        for profile in self.profiles:
+            if profile.id in seen:
+                duplicates.setdefault(profile.id, []).append(profile)
+            else:
+                seen.add(profile.id)
+        return duplicates
+
+
+class ProfileStore:
+    """Loads profiles.yaml and rebuilds the registry when the file changes."""
+
+    def __init__(self, path: Path = PROFILES_FILE):
+        """
+        Initialize the store.
+
+        Args:
+            path: profiles.yaml location
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded: Optional[Tuple[float, Dict[str, Any], ProfileRegistry]] = None
+
+    def load(self, use_cache: bool = True) -> Tuple[Dict[str, Any], ProfileRegistry]:
+        """
+        Get the parsed file and its registry, reloading if the file changed.
+
+        Args:
+            use_cache: If False, always reread the file
+
+        Returns:
+            (raw config, registry)
+
+        Raises:
+            FileNotFoundError: If profiles.yaml does not exist
+        """
+        mtime = self.path.stat().st_mtime
+        with self._lock:
+            if use_cache and self._loaded is not None and self._loaded[0] == mtime:
+                return self._loaded[1], self._loaded[2]
+
+            with open(self.path) as f:
+                config = yaml.load(f, Loader=YAML_LOADER) or {}
+            registry = ProfileRegistry.from_config(config)
+            self._loaded = (mtime, config, registry)
+            logger.debug(f"Loaded {len(registry)} VPN profiles")
+            return config, registry
+
+    def registry(self) -> ProfileRegistry:
+        """The current registry (see load())."""
+        return self.load()[1]
+
+
+# Global instance
+profile_store = ProfileStore()